@@ -17,6 +17,8 @@ from app.api.v1.routes.staff import router as staff_router
 from app.api.v1.routes.analytics import router as analytics_router
 from app.api.v1.routes.eligibility import router as eligibility_router
 from app.api.v1.routes.dashboard import router as dashboard_router
+from app.api.v1.routes.search import router as search_router
+from app.api.v1.routes.practices import router as practices_router
 
 
 
@@ -36,4 +38,6 @@ api_router.include_router(staff_router, prefix="/staff", tags=["staff"])
 api_router.include_router(analytics_router, prefix="/analytics", tags=["analytics"])
 api_router.include_router(eligibility_router, prefix="/eligibility", tags=["eligibility"])
 api_router.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(search_router, prefix="/search", tags=["search"])
+api_router.include_router(practices_router, prefix="/practices", tags=["practices"])
 
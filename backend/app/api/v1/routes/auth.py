@@ -14,7 +14,7 @@ from app.api.v1.routes.deps import get_db
 from app.core.security import hash_password, verify_password
 from app.db.models.owner import Owner
 from app.db.models.owner_pet import OwnerPet
-from app.db.models.pet import Pet
+from app.db.models.pet import Pet, normalize_microchip
 from app.db.models.user import User
 
 router = APIRouter()
@@ -140,7 +140,7 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
             species=payload.pet.species,
             breed=payload.pet.breed,
             sex=payload.pet.sex,
-            microchip_number=payload.pet.microchip_number,
+            microchip_number=normalize_microchip(payload.pet.microchip_number),
             date_of_birth=payload.pet.date_of_birth,
             photo_url=payload.pet.photo_url,
         )
@@ -205,7 +205,7 @@ async def register_owner(
         species=pet_species.strip(),
         breed=pet_breed.strip() if pet_breed and pet_breed.strip() else None,
         sex=pet_sex.strip() if pet_sex and pet_sex.strip() else None,
-        microchip_number=pet_microchip_number.strip() if pet_microchip_number and pet_microchip_number.strip() else None,
+        microchip_number=normalize_microchip(pet_microchip_number),
         date_of_birth=pet_date_of_birth,
         photo_data=photo_data,
         photo_mime_type=photo_mime_type,
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import uuid
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func, select
@@ -13,6 +13,11 @@ from app.api.v1.routes.deps import get_db
 from app.db.models.organisation import Organisation
 from app.db.models.organisation_member import OrganisationMember
 from app.db.models.vet_visit import VetVisit
+from app.services.availability import MAX_AVAILABILITY_DAYS, SLOT_MINUTES, VISIT_DURATION_MINUTES, clinic_availability
+from app.services.clinic_geo import CLUSTER_KINDS, map_clusters, nearby_clinics
+from app.services.clinic_geocoding import clinic_seed as _clinic_seed
+from app.services.clinic_geocoding import resolve_clinic_coordinates
+from app.services.loaders import loaders_for
 
 router = APIRouter()
 
@@ -25,111 +30,6 @@ def _parse_uuid(value: str, field_name: str = "id") -> uuid.UUID:
         raise HTTPException(status_code=400, detail=f"Invalid {field_name} (must be UUID)")
 
 
-def _to_float(value: str | float | None) -> float | None:
-    if value is None:
-        return None
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _simulated_tas_coordinates(seed: int) -> tuple[float, float]:
-    """
-    Generate deterministic fallback coordinates within Tasmania bounds.
-    This keeps distances/maps usable when source data lacks lat/lon.
-    """
-    # Rough TAS bounds
-    lat_min, lat_max = -43.8, -39.2
-    lon_min, lon_max = 143.7, 148.6
-    # Deterministic pseudo-random fraction from stable seed
-    frac_a = ((seed * 1103515245 + 12345) % 10_000) / 10_000.0
-    frac_b = ((seed * 214013 + 2531011) % 10_000) / 10_000.0
-    lat = lat_min + (lat_max - lat_min) * frac_a
-    lon = lon_min + (lon_max - lon_min) * frac_b
-    return (round(lat, 6), round(lon, 6))
-
-
-# Approximate postcode centroids (TAS) used when imported data lacks lat/lon.
-POSTCODE_COORDS_TAS: dict[str, tuple[float, float]] = {
-    "7000": (-42.8821, 147.3272),  # Hobart
-    "7005": (-42.9050, 147.3230),  # Sandy Bay
-    "7008": (-42.8780, 147.3090),  # Lenah Valley / West Hobart
-    "7009": (-42.8620, 147.2860),  # Moonah area
-    "7011": (-42.8070, 147.2520),  # Claremont
-    "7015": (-42.8360, 147.3530),  # Lindisfarne
-    "7018": (-42.8720, 147.3650),  # Rosny/Bellerive
-    "7050": (-42.9750, 147.3080),  # Kingston
-    "7053": (-42.9850, 147.3200),  # Taroona/Kingston surrounds
-    "7172": (-42.7360, 147.5790),  # Dodges Ferry
-    "7173": (-42.7820, 147.5620),  # Sorell
-    "7216": (-41.3210, 148.2410),  # St Helens
-    "7249": (-41.4550, 147.1320),  # Kings Meadows/South Launceston
-    "7250": (-41.4330, 147.1380),  # Launceston
-    "7260": (-41.1670, 146.9560),  # Lilydale
-    "7268": (-41.1570, 147.5180),  # Scottsdale
-    "7275": (-41.2980, 146.9700),  # Exeter
-    "7301": (-41.5400, 146.6600),  # Deloraine/Longford region
-    "7304": (-41.3900, 146.3300),  # Sheffield
-    "7306": (-41.1900, 146.1650),  # Devonport surrounds
-    "7310": (-41.1760, 146.3510),  # Devonport
-    "7315": (-41.1600, 146.1660),  # Ulverstone
-    "7316": (-41.1100, 146.0700),  # Penguin
-    "7320": (-41.0540, 145.9030),  # Burnie
-    "7330": (-40.8440, 145.1240),  # Smithton
-}
-
-SUBURB_COORDS_TAS: dict[str, tuple[float, float]] = {
-    "sandy bay": (-42.9050, 147.3230),
-    "launceston": (-41.4330, 147.1380),
-    "devonport": (-41.1760, 146.3510),
-    "burnie": (-41.0540, 145.9030),
-    "ulverstone": (-41.1600, 146.1660),
-    "penguin": (-41.1100, 146.0700),
-    "kingston": (-42.9750, 147.3080),
-    "rosny park": (-42.8720, 147.3650),
-    "lindisfarne": (-42.8360, 147.3530),
-    "bellerive": (-42.8750, 147.3700),
-    "claremont": (-42.8070, 147.2520),
-    "st helens": (-41.3210, 148.2410),
-    "sorell": (-42.7820, 147.5620),
-    "smithton": (-40.8440, 145.1240),
-}
-
-
-def _jitter_from_seed(seed: int) -> tuple[float, float]:
-    # Keep clinics in same suburb/postcode visible as separate points without moving far.
-    d_lat = (((seed * 37) % 1000) / 1000.0 - 0.5) * 0.04
-    d_lon = (((seed * 53) % 1000) / 1000.0 - 0.5) * 0.04
-    return d_lat, d_lon
-
-
-def _resolve_clinic_coordinates(clinic: Organisation, seed: int) -> tuple[float, float, bool]:
-    # 1) Prefer stored coordinates if present.
-    lat = _to_float(clinic.latitude)
-    lon = _to_float(clinic.longitude)
-    if lat is not None and lon is not None:
-        return lat, lon, False
-
-    # 2) Use postcode centroid when available.
-    postcode = (clinic.postcode or "").strip()
-    if postcode in POSTCODE_COORDS_TAS:
-        base_lat, base_lon = POSTCODE_COORDS_TAS[postcode]
-        j_lat, j_lon = _jitter_from_seed(seed)
-        return round(base_lat + j_lat, 6), round(base_lon + j_lon, 6), True
-
-    # 3) Fallback to suburb centroid.
-    suburb_key = (clinic.suburb or "").strip().lower()
-    if suburb_key in SUBURB_COORDS_TAS:
-        base_lat, base_lon = SUBURB_COORDS_TAS[suburb_key]
-        j_lat, j_lon = _jitter_from_seed(seed)
-        return round(base_lat + j_lat, 6), round(base_lon + j_lon, 6), True
-
-    # 4) Last resort for unknown suburb/postcode.
-    lat, lon = _simulated_tas_coordinates(seed)
-    return lat, lon, True
-
-
 def _simulated_capacity_metrics(seed: int, staff_count: int, visits_30d: int) -> tuple[int, int]:
     """
     Provide deterministic mock numbers for upcoming visits/cancellations when live
@@ -149,42 +49,47 @@ def _simulated_capacity_metrics(seed: int, staff_count: int, visits_30d: int) ->
 # Endpoint: handles HTTP request/response mapping for this route.
 @router.get("", summary="List clinics with capacity/cancellation insights")
 def list_clinics(limit: int = Query(200, ge=1, le=1000), db: Session = Depends(get_db)):
-    clinics = db.execute(
-        select(Organisation).where(Organisation.org_type == "vet_clinic").limit(limit)
-    ).scalars().all()
+    # Use Python-safe datetime boundaries for cross-dialect compatibility.
+    now = datetime.now(UTC)
+    dt_30 = now - timedelta(days=30)
+
+    # Pre-aggregated per clinic so the listing is one statement rather than four counts per clinic.
+    member_counts = (
+        select(OrganisationMember.organisation_id, func.count(OrganisationMember.user_id).label("staff_count"))
+        .group_by(OrganisationMember.organisation_id)
+        .subquery()
+    )
+    visit_stats = (
+        select(
+            VetVisit.organisation_id,
+            func.count(VetVisit.visit_id).label("visits_30d"),
+            func.count(VetVisit.visit_id).filter(VetVisit.status == "CANCELLED").label("cancellations_30d"),
+            func.count(VetVisit.visit_id)
+            .filter(VetVisit.visit_datetime >= now, VetVisit.visit_datetime <= now + timedelta(days=7))
+            .label("upcoming_7d"),
+        )
+        .where(VetVisit.visit_datetime >= dt_30)
+        .group_by(VetVisit.organisation_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            Organisation,
+            func.coalesce(member_counts.c.staff_count, 0).label("staff_count"),
+            func.coalesce(visit_stats.c.visits_30d, 0).label("visits_30d"),
+            func.coalesce(visit_stats.c.cancellations_30d, 0).label("cancellations_30d"),
+            func.coalesce(visit_stats.c.upcoming_7d, 0).label("upcoming_7d"),
+        )
+        .outerjoin(member_counts, member_counts.c.organisation_id == Organisation.organisation_id)
+        .outerjoin(visit_stats, visit_stats.c.organisation_id == Organisation.organisation_id)
+        .where(Organisation.org_type == "vet_clinic")
+        .limit(limit)
+    ).all()
 
     out = []
-    for clinic in clinics:
+    for clinic, staff_count, visits_30d, cancellations_30d, upcoming_7d in rows:
         cid = clinic.organisation_id
-        clinic_seed = cid.int % 1_000_000
-        staff_count = db.execute(
-            select(func.count(OrganisationMember.user_id)).where(OrganisationMember.organisation_id == cid)
-        ).scalar_one()
-
-        # Use Python-safe datetime boundaries for cross-dialect compatibility.
-        dt_30 = datetime.now(UTC) - timedelta(days=30)
-        visits_30d = db.execute(
-            select(func.count(VetVisit.visit_id)).where(
-                VetVisit.organisation_id == cid,
-                VetVisit.visit_datetime >= dt_30,
-            )
-        ).scalar_one()
-
-        cancellations_30d = db.execute(
-            select(func.count(VetVisit.visit_id)).where(
-                VetVisit.organisation_id == cid,
-                VetVisit.visit_datetime >= dt_30,
-                func.lower(func.coalesce(VetVisit.reason, "")).like("%cancel%"),
-            )
-        ).scalar_one()
-
-        upcoming_7d = db.execute(
-            select(func.count(VetVisit.visit_id)).where(
-                VetVisit.organisation_id == cid,
-                VetVisit.visit_datetime >= datetime.now(UTC),
-                VetVisit.visit_datetime <= datetime.now(UTC) + timedelta(days=7),
-            )
-        ).scalar_one()
+        clinic_seed = _clinic_seed(cid)
 
         # Simulate demand metrics if schedule/cancellation data is empty.
         if int(upcoming_7d or 0) == 0 and int(cancellations_30d or 0) == 0:
@@ -199,7 +104,13 @@ def list_clinics(limit: int = Query(200, ge=1, le=1000), db: Session = Depends(g
         else:
             metrics_simulated = False
 
-        lat, lon, geo_simulated = _resolve_clinic_coordinates(clinic, clinic_seed)
+        # Coordinates are written by the geocoding job; only clinics it hasn't reached yet are resolved here.
+        if clinic.geo_precision and clinic.latitude is not None and clinic.longitude is not None:
+            lat, lon, precision = float(clinic.latitude), float(clinic.longitude), clinic.geo_precision
+        else:
+            lat, lon, precision = resolve_clinic_coordinates(
+                clinic.latitude, clinic.longitude, clinic.postcode, clinic.suburb, clinic_seed
+            )
 
         out.append(
             {
@@ -213,7 +124,8 @@ def list_clinics(limit: int = Query(200, ge=1, le=1000), db: Session = Depends(g
                 "postcode": clinic.postcode,
                 "latitude": lat,
                 "longitude": lon,
-                "geo_simulated": geo_simulated,
+                "geo_simulated": precision != "stored",
+                "geo_precision": precision,
                 "staff_count": int(staff_count or 0),
                 "visits_last_30d": int(visits_30d or 0),
                 "cancellations_last_30d": int(cancellations_30d or 0),
@@ -225,6 +137,74 @@ def list_clinics(limit: int = Query(200, ge=1, le=1000), db: Session = Depends(g
     return out
 
 
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/nearby", summary="Clinics within a radius, nearest first")
+def clinics_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=1000),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    # PostGIS geography + GiST when installed, otherwise an in-process grid index over clinic coordinates.
+    return nearby_clinics(db, lat, lon, radius_km, limit)
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/clusters", summary="Grid-clustered clinic and practice markers for a map viewport")
+def clinics_clusters(
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    types: str | None = Query(default=None, description="Comma-separated: clinic,practice"),
+    db: Session = Depends(get_db),
+):
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range or inverted")
+
+    kinds = CLUSTER_KINDS
+    if types:
+        kinds = tuple(dict.fromkeys(t.strip().lower() for t in types.split(",") if t.strip()))
+        unknown = [k for k in kinds if k not in CLUSTER_KINDS]
+        if unknown or not kinds:
+            raise HTTPException(status_code=400, detail=f"types must be drawn from {', '.join(CLUSTER_KINDS)}")
+
+    return map_clusters(db, (min_lon, min_lat, max_lon, max_lat), zoom, kinds)
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/{clinic_id}/availability", summary="Free appointment windows per vet")
+def clinic_availability_view(
+    clinic_id: str,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    vet_user_id: str | None = Query(default=None),
+    duration_minutes: int = Query(VISIT_DURATION_MINUTES, ge=SLOT_MINUTES, le=8 * 60),
+    db: Session = Depends(get_db),
+):
+    cid = _parse_uuid(clinic_id, "clinic_id")
+    if loaders_for(db).clinics.load(cid) is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to must be on or after from")
+    if (to_date - from_date).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be at most {MAX_AVAILABILITY_DAYS} days")
+    vid = _parse_uuid(vet_user_id, "vet_user_id") if vet_user_id else None
+
+    # Opening hours minus visits and approved leave, as per-vet day bitmaps of SLOT_MINUTES slots.
+    return {
+        "clinic_id": str(cid),
+        "from": from_date,
+        "to": to_date,
+        "slot_minutes": SLOT_MINUTES,
+        "duration_minutes": duration_minutes,
+        "vets": clinic_availability(db, cid, from_date, to_date, vet_user_id=vid, duration_minutes=duration_minutes),
+    }
+
+
 # Endpoint: handles HTTP request/response mapping for this route.
 @router.get("/{clinic_id}/staff", summary="List staff for a clinic")
 def clinic_staff(clinic_id: str, db: Session = Depends(get_db)):
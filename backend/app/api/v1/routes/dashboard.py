@@ -14,6 +14,9 @@ from app.api.v1.routes.deps import get_db
 
 router = APIRouter()
 
+REMINDER_SCOPES = ("ADMIN", "VET", "OWNER")
+REMINDER_STATUSES = ("OPEN", "DONE")
+
 RSPCA_KB_BASE = "https://kb.rspca.org.au/categories/companion-animals"
 
 # Companion-animal links shown to every owner regardless of species.
@@ -213,12 +216,7 @@ def dashboard_kpis(
               (SELECT COUNT(*)::int
                  FROM vet_visits
                 WHERE visit_datetime >= date_trunc('month', NOW())
-                  AND (
-                    LOWER(COALESCE(reason, '')) LIKE '%no show%' OR
-                    LOWER(COALESCE(reason, '')) LIKE '%no-show%' OR
-                    LOWER(COALESCE(reason, '')) LIKE '%cancel%' OR
-                    LOWER(COALESCE(reason, '')) LIKE '%did not attend%'
-                  )
+                  AND status IN ('CANCELLED', 'NO_SHOW')
               ) AS missed_appointments_month,
               (SELECT COUNT(*)::int
                  FROM vet_visits
@@ -240,7 +238,39 @@ def dashboard_kpis(
                    WHERE vv.pet_id = p.pet_id
                      AND vv.visit_datetime >= NOW() - INTERVAL '365 days'
                 )
-              ) AS concerns_unfollowed
+              ) AS concerns_unfollowed,
+              (SELECT COUNT(*)::int
+                 FROM owner_activity_summary s
+                WHERE s.open_concern_count > 0
+              ) AS owners_with_open_concerns,
+              (SELECT COUNT(*)::int
+                 FROM owners o
+                WHERE NOT EXISTS (
+                  SELECT 1
+                    FROM owner_pets op
+                    JOIN vet_visits vv ON vv.pet_id = op.pet_id
+                   WHERE op.owner_id = o.owner_id
+                     AND vv.visit_datetime >= NOW() - INTERVAL '365 days'
+                )
+              ) AS owners_without_visit_12m
+            """
+        )
+
+        # Owner activity comes from owner_activity_summary rather than raw visit/concern scans.
+        owners_follow_up_q = text(
+            """
+            SELECT
+              s.owner_id::text AS owner_id,
+              u.full_name AS owner_name,
+              s.open_concern_count,
+              s.latest_visit_at,
+              s.latest_clinic_name AS clinic_name
+            FROM owner_activity_summary s
+            JOIN owners o ON o.owner_id = s.owner_id
+            JOIN users u ON u.user_id = o.user_id
+            WHERE s.open_concern_count > 0
+            ORDER BY s.open_concern_count DESC, s.latest_visit_at ASC NULLS FIRST
+            LIMIT 8
             """
         )
 
@@ -288,6 +318,7 @@ def dashboard_kpis(
             "summary": dict(db.execute(summary_q).mappings().one()),
             "visits_by_clinic": list(db.execute(visits_by_clinic_q).mappings().all()),
             "injury_by_clinic": list(db.execute(injury_by_clinic_q).mappings().all()),
+            "owners_needing_follow_up": list(db.execute(owners_follow_up_q).mappings().all()),
         }
 
     if role_u == "VET":
@@ -353,11 +384,7 @@ def dashboard_kpis(
                  FROM vet_visits vv
                 WHERE vv.organisation_id::text = ANY(:clinic_ids)
                   AND vv.visit_datetime >= date_trunc('month', NOW())
-                  AND (
-                    LOWER(COALESCE(vv.reason, '')) LIKE '%cancel%' OR
-                    LOWER(COALESCE(vv.reason, '')) LIKE '%no show%' OR
-                    LOWER(COALESCE(vv.reason, '')) LIKE '%did not attend%'
-                  )
+                  AND vv.status IN ('CANCELLED', 'NO_SHOW')
               ) AS cancellations_month,
               (SELECT COUNT(*)::int
                  FROM vet_visits vv
@@ -437,13 +464,13 @@ def list_dashboard_reminders(
 
     # Scope reminder visibility to the current user role and tenancy boundaries.
     if role_u == "ADMIN":
-        sql_filters.append("UPPER(r.role_scope) = 'ADMIN'")
+        sql_filters.append("r.role_scope = 'ADMIN'")
     elif role_u == "VET":
         if not uid:
             raise HTTPException(status_code=400, detail="user_id is required for VET reminders")
         sql_filters.append(
             """
-            UPPER(r.role_scope) = 'VET'
+            r.role_scope = 'VET'
             AND (
               r.user_id = :uid
               OR r.organisation_id IN (
@@ -461,7 +488,7 @@ def list_dashboard_reminders(
         owner_id = _resolve_owner_id(db, uid)
         if not owner_id:
             return []
-        sql_filters.append("UPPER(r.role_scope) = 'OWNER' AND r.owner_id = :owner_id")
+        sql_filters.append("r.role_scope = 'OWNER' AND r.owner_id = :owner_id")
         params["owner_id"] = owner_id
 
     # Optional month filter keeps calendar rendering lightweight on the client.
@@ -513,7 +540,7 @@ def list_dashboard_reminders(
 @router.post("/reminders", summary="Create dashboard reminder")
 def create_dashboard_reminder(payload: ReminderCreate, db: Session = Depends(get_db)):
     role_scope = payload.role_scope.strip().upper()
-    if role_scope not in {"ADMIN", "VET", "OWNER"}:
+    if role_scope not in REMINDER_SCOPES:
         raise HTTPException(status_code=400, detail="role_scope must be ADMIN, VET, or OWNER")
     try:
         due_at = datetime.fromisoformat(payload.due_at.replace("Z", "+00:00"))
@@ -581,6 +608,9 @@ def create_dashboard_reminder(payload: ReminderCreate, db: Session = Depends(get
 @router.patch("/reminders/{reminder_id}", summary="Update reminder status")
 def update_dashboard_reminder(reminder_id: str, payload: ReminderUpdate, db: Session = Depends(get_db)):
     rid = _parse_uuid(reminder_id, "reminder_id")
+    status_u = payload.status.strip().upper()
+    if status_u not in REMINDER_STATUSES:
+        raise HTTPException(status_code=400, detail="status must be OPEN or DONE")
     result = db.execute(
         text(
             """
@@ -590,7 +620,7 @@ def update_dashboard_reminder(reminder_id: str, payload: ReminderUpdate, db: Ses
               AND deleted_at IS NULL
             """
         ),
-        {"status": payload.status.strip().upper(), "reminder_id": rid},
+        {"status": status_u, "reminder_id": rid},
     )
     db.commit()
     if result.rowcount == 0:
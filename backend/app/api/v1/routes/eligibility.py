@@ -8,7 +8,7 @@ from datetime import datetime, timedelta, UTC
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, select
 from sqlalchemy.orm import Session
 
 from app.api.v1.routes.deps import get_db
@@ -16,10 +16,10 @@ from app.db.models.owner import Owner
 from app.db.models.owner_gov_profile import OwnerGovProfile
 from app.db.models.owner_pet import OwnerPet
 from app.db.models.pet import Pet
-from app.db.models.user import User
 from app.db.models.vet_visit import VetVisit
 from app.db.models.vet_cost_guideline import VetCostGuideline
 from app.db.models.weight import Weight
+from app.services.loaders import loaders_for
 
 router = APIRouter()
 
@@ -81,22 +81,45 @@ def _guideline_map(db: Session) -> dict[tuple[str, str], VetCostGuideline]:
     return mapping
 
 
-def _owner_pet_assessments(db: Session, owner_id: uuid.UUID, guideline_lookup: dict[tuple[str, str], VetCostGuideline]) -> list[PetAssessment]:
-    pet_rows = db.execute(
-        select(Pet)
-        .join(OwnerPet, OwnerPet.pet_id == Pet.pet_id)
-        .where(OwnerPet.owner_id == owner_id)
-        .order_by(Pet.created_at.desc())
+def _latest_weights(db: Session, pet_ids: list[uuid.UUID], *conditions) -> dict[uuid.UUID, Weight]:
+    # DISTINCT ON keeps the newest matching weight per pet in a single query.
+    rows = db.execute(
+        select(Weight)
+        .where(Weight.pet_id.in_(pet_ids), *conditions)
+        .order_by(Weight.pet_id, desc(Weight.measured_at))
+        .distinct(Weight.pet_id)
     ).scalars().all()
+    return {w.pet_id: w for w in rows}
 
-    out: list[PetAssessment] = []
-    for pet in pet_rows:
-        latest_weight = db.execute(
-            select(Weight)
-            .where(Weight.pet_id == pet.pet_id)
-            .order_by(desc(Weight.measured_at))
-            .limit(1)
-        ).scalars().first()
+
+def _pet_assessments_by_owner(
+    db: Session,
+    owner_ids: list[uuid.UUID],
+    guideline_lookup: dict[tuple[str, str], VetCostGuideline],
+) -> dict[uuid.UUID, list[PetAssessment]]:
+    pet_rows = db.execute(
+        select(OwnerPet.owner_id, Pet)
+        .join(Pet, Pet.pet_id == OwnerPet.pet_id)
+        .where(OwnerPet.owner_id.in_(owner_ids))
+        .order_by(Pet.created_at.desc())
+    ).all()
+    pet_ids = list({pet.pet_id for _, pet in pet_rows})
+
+    latest_weight_by_pet = _latest_weights(db, pet_ids)
+    latest_owner_weight_by_pet = _latest_weights(db, pet_ids, Weight.visit_id.is_(None))
+    latest_vet_weight_by_pet = _latest_weights(db, pet_ids, Weight.visit_id.is_not(None))
+    latest_visit_by_pet = dict(
+        db.execute(
+            select(VetVisit.pet_id, func.max(VetVisit.visit_datetime))
+            .where(VetVisit.pet_id.in_(pet_ids))
+            .group_by(VetVisit.pet_id)
+        ).all()
+    )
+    cutoff = datetime.now(UTC) - timedelta(days=365)
+
+    out: dict[uuid.UUID, list[PetAssessment]] = {oid: [] for oid in owner_ids}
+    for owner_id, pet in pet_rows:
+        latest_weight = latest_weight_by_pet.get(pet.pet_id)
         latest_weight_kg = _safe_float(latest_weight.weight_kg) if latest_weight else None
 
         size_class = _size_class_from_weight(pet.species or "", latest_weight_kg)
@@ -116,30 +139,13 @@ def _owner_pet_assessments(db: Session, owner_id: uuid.UUID, guideline_lookup: d
             )
             lifespan = int(guideline.avg_lifespan_years or 12)
 
-        latest_visit = db.execute(
-            select(VetVisit)
-            .where(VetVisit.pet_id == pet.pet_id)
-            .order_by(desc(VetVisit.visit_datetime))
-            .limit(1)
-        ).scalars().first()
-        cutoff = datetime.now(UTC) - timedelta(days=365)
-        visit_dt = latest_visit.visit_datetime if latest_visit else None
+        visit_dt = latest_visit_by_pet.get(pet.pet_id)
         if visit_dt and visit_dt.tzinfo is None:
             visit_dt = visit_dt.replace(tzinfo=UTC)
         has_recent_visit = bool(visit_dt and visit_dt >= cutoff)
 
-        latest_owner_weight = db.execute(
-            select(Weight)
-            .where(Weight.pet_id == pet.pet_id, Weight.visit_id.is_(None))
-            .order_by(desc(Weight.measured_at))
-            .limit(1)
-        ).scalars().first()
-        latest_vet_weight = db.execute(
-            select(Weight)
-            .where(Weight.pet_id == pet.pet_id, Weight.visit_id.is_not(None))
-            .order_by(desc(Weight.measured_at))
-            .limit(1)
-        ).scalars().first()
+        latest_owner_weight = latest_owner_weight_by_pet.get(pet.pet_id)
+        latest_vet_weight = latest_vet_weight_by_pet.get(pet.pet_id)
         weight_flag = False
         if latest_owner_weight and latest_vet_weight:
             owner_w = _safe_float(latest_owner_weight.weight_kg)
@@ -148,7 +154,7 @@ def _owner_pet_assessments(db: Session, owner_id: uuid.UUID, guideline_lookup: d
                 delta = abs(owner_w - vet_w) / vet_w
                 weight_flag = delta >= 0.20
 
-        out.append(
+        out[owner_id].append(
             PetAssessment(
                 pet_id=str(pet.pet_id),
                 pet_name=pet.name or "Unnamed",
@@ -163,6 +169,10 @@ def _owner_pet_assessments(db: Session, owner_id: uuid.UUID, guideline_lookup: d
     return out
 
 
+def _owner_pet_assessments(db: Session, owner_id: uuid.UUID, guideline_lookup: dict[tuple[str, str], VetCostGuideline]) -> list[PetAssessment]:
+    return _pet_assessments_by_owner(db, [owner_id], guideline_lookup)[owner_id]
+
+
 def _gov_score(profile: OwnerGovProfile, annual_required: float, pet_count: int) -> tuple[float, dict[str, Any]]:
     household_income = _safe_float(profile.household_income)
     expenses = _safe_float(profile.basic_living_expenses)
@@ -216,12 +226,13 @@ def _vet_score(pets: list[PetAssessment]) -> tuple[float, dict[str, Any]]:
 @router.get("/owner/{owner_id}")
 def owner_eligibility(owner_id: str, db: Session = Depends(get_db)):
     oid = _parse_uuid(owner_id, "owner_id")
-    owner = db.execute(select(Owner).where(Owner.owner_id == oid)).scalars().first()
+    loaders = loaders_for(db)
+    owner = loaders.owners.load(oid)
     if not owner:
         raise HTTPException(status_code=404, detail="Owner not found")
 
-    user = db.execute(select(User).where(User.user_id == owner.user_id)).scalars().first()
-    profile = db.execute(select(OwnerGovProfile).where(OwnerGovProfile.owner_id == oid)).scalars().first()
+    user = loaders.users.load(owner.user_id)
+    profile = loaders.gov_profiles.load(oid)
     if not profile:
         raise HTTPException(status_code=404, detail="Owner government profile not found")
 
@@ -258,13 +269,19 @@ def eligibility_leaderboard(limit: int = Query(50, ge=1, le=200), db: Session =
     owners = db.execute(select(Owner).limit(limit * 2)).scalars().all()
     guideline_lookup = _guideline_map(db)
 
+    # Resolve every owner's profile and user up front: two queries instead of two per owner.
+    loaders = loaders_for(db)
+    profiles = loaders.gov_profiles.load_many(owner.owner_id for owner in owners)
+    users = loaders.users.load_many(owner.user_id for owner in owners)
+    assessments = _pet_assessments_by_owner(db, [o.owner_id for o in owners if profiles.get(o.owner_id)], guideline_lookup)
+
     results = []
     for owner in owners:
-        profile = db.execute(select(OwnerGovProfile).where(OwnerGovProfile.owner_id == owner.owner_id)).scalars().first()
+        profile = profiles.get(owner.owner_id)
         if not profile:
             continue
-        user = db.execute(select(User).where(User.user_id == owner.user_id)).scalars().first()
-        pet_assessments = _owner_pet_assessments(db, owner.owner_id, guideline_lookup)
+        user = users.get(owner.user_id)
+        pet_assessments = assessments[owner.owner_id]
         annual_required = sum(p.annual_min_cost for p in pet_assessments)
         vet_score, _ = _vet_score(pet_assessments)
         gov_score, _ = _gov_score(profile, annual_required, len(pet_assessments))
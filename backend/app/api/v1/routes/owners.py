@@ -3,21 +3,22 @@
 import uuid
 from datetime import UTC, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlalchemy import desc, func, select, text
+from sqlalchemy import desc, select, text
 from sqlalchemy.orm import Session
 
 from app.api.v1.routes.deps import get_db
-from app.db.models.organisation import Organisation
-from app.db.models.owner import Owner
 from app.db.models.owner_pet import OwnerPet
 from app.db.models.pet import Pet
-from app.db.models.user import User
-from app.db.models.vet_visit import VetVisit
+from app.services.loaders import loaders_for
+from app.services.owner_activity import refresh_owner_activity
+from app.services.owner_timeline import TIMELINE_SOURCES, InvalidCursor, decode_cursor, load_owner_timeline
 
 router = APIRouter()
 
+CONCERN_STATUSES = ("OPEN", "UNDER_REVIEW", "RESOLVED", "CLOSED")
+
 
 # Validate and coerce UUID inputs from query/path payloads.
 def _parse_uuid(value: str, field_name: str = "id") -> uuid.UUID:
@@ -29,8 +30,7 @@ def _parse_uuid(value: str, field_name: str = "id") -> uuid.UUID:
 
 def _ensure_owner_exists(db: Session, owner_id: uuid.UUID) -> None:
     # Fail early if caller references a non-existent owner id.
-    exists = db.execute(select(Owner.owner_id).where(Owner.owner_id == owner_id)).scalar_one_or_none()
-    if not exists:
+    if loaders_for(db).owners.load(owner_id) is None:
         raise HTTPException(status_code=404, detail="Owner not found")
 
 
@@ -70,96 +70,73 @@ class ConcernUpdate(BaseModel):
 # Endpoint: handles HTTP request/response mapping for this route.
 @router.get("", summary="List owners (simple)")
 def list_owners(limit: int = 200, offset: int = 0, db: Session = Depends(get_db)):
+    # Activity columns come from owner_activity_summary, maintained by the note/concern/visit write paths; the rolling
+    # 12-month visit count is read per page owner from idx_vet_visits_pet_datetime so it ages without a rebuild.
     rows = db.execute(
-        select(
-            Owner.owner_id.label("id"),
-            Owner.user_id.label("user_id"),
-            Owner.verified_identity_level.label("verified_identity_level"),
-            User.full_name.label("full_name"),
-            User.email.label("email"),
-            User.phone.label("phone"),
-            User.address.label("address"),
-        )
-        .join(User, User.user_id == Owner.user_id)
-        .offset(offset)
-        .limit(limit)
-    ).mappings().all()
-
-    out = []
-    for r in rows:
-        d = dict(r)
-        d["id"] = str(d["id"])
-        d["user_id"] = str(d["user_id"])
-
-        owner_id = uuid.UUID(d["id"])
-        year_ago = datetime.now(UTC) - timedelta(days=365)
-        visit_count_year = db.execute(
-            select(func.count(VetVisit.visit_id))
-            .select_from(VetVisit)
-            .join(Pet, Pet.pet_id == VetVisit.pet_id)
-            .join(OwnerPet, OwnerPet.pet_id == Pet.pet_id)
-            .where(OwnerPet.owner_id == owner_id, VetVisit.visit_datetime >= year_ago)
-        ).scalar_one()
-
-        recent_visit = db.execute(
-            select(
-                VetVisit.visit_datetime.label("visit_datetime"),
-                VetVisit.reason.label("reason"),
-                VetVisit.notes_visible_to_owner.label("notes_visible_to_owner"),
-                Organisation.name.label("clinic_name"),
-            )
-            .select_from(VetVisit)
-            .join(Pet, Pet.pet_id == VetVisit.pet_id)
-            .join(OwnerPet, OwnerPet.pet_id == Pet.pet_id)
-            .outerjoin(Organisation, Organisation.organisation_id == VetVisit.organisation_id)
-            .where(OwnerPet.owner_id == owner_id)
-            .order_by(desc(VetVisit.visit_datetime))
-            .limit(1)
-        ).mappings().first()
-
-        recent_note = db.execute(
-            text(
-                """
-                SELECT n.note_text
-                FROM owner_notes n
-                WHERE n.owner_id = :owner_id
-                  AND n.deleted_at IS NULL
-                ORDER BY n.created_at DESC
-                LIMIT 1
-                """
+        text(
+            """
+            WITH page AS MATERIALIZED (
+              SELECT
+                o.owner_id,
+                o.user_id,
+                o.verified_identity_level,
+                u.full_name,
+                u.email,
+                u.phone,
+                u.address,
+                ROW_NUMBER() OVER () AS page_order
+              FROM owners o
+              JOIN users u ON u.user_id = o.user_id
+              OFFSET :offset
+              LIMIT :limit
             ),
-            {"owner_id": owner_id},
-        ).scalar_one_or_none()
-
-        open_concerns = db.execute(
-            text(
-                """
-                SELECT COUNT(*)::int
-                FROM concern_flags c
-                WHERE c.owner_id = :owner_id
-                  AND UPPER(COALESCE(c.status, 'OPEN')) = 'OPEN'
-                """
+            new_pets AS (
+              SELECT op.owner_id, COUNT(p.pet_id)::int AS pet_count
+              FROM page
+              JOIN owner_pets op ON op.owner_id = page.owner_id
+              JOIN pets p ON p.pet_id = op.pet_id
+              WHERE p.created_at >= :pets_since
+              GROUP BY op.owner_id
             ),
-            {"owner_id": owner_id},
-        ).scalar_one()
-
-        pets_recent = db.execute(
-            select(func.count(Pet.pet_id))
-            .select_from(Pet)
-            .join(OwnerPet, OwnerPet.pet_id == Pet.pet_id)
-            .where(OwnerPet.owner_id == owner_id, Pet.created_at >= datetime.now(UTC) - timedelta(days=90))
-        ).scalar_one()
-
-        d["new_pets_last_90d"] = int(pets_recent or 0)
-        d["visits_last_12m"] = int(visit_count_year or 0)
-        d["recent_visit_at"] = recent_visit["visit_datetime"] if recent_visit else None
-        d["recent_visit_reason"] = recent_visit["reason"] if recent_visit else None
-        d["recent_visit_notes"] = recent_visit["notes_visible_to_owner"] if recent_visit else None
-        d["recent_clinical_note"] = recent_note
-        d["open_concern_count"] = int(open_concerns or 0)
-        d["clinic_name"] = recent_visit["clinic_name"] if recent_visit else None
-        out.append(d)
-    return out
+            recent_visits AS (
+              SELECT op.owner_id, COUNT(*)::int AS visit_count
+              FROM page
+              JOIN owner_pets op ON op.owner_id = page.owner_id
+              JOIN vet_visits vv ON vv.pet_id = op.pet_id
+              WHERE vv.visit_datetime >= :year_ago
+              GROUP BY op.owner_id
+            )
+            SELECT
+              page.owner_id::text AS id,
+              page.user_id::text AS user_id,
+              page.verified_identity_level,
+              page.full_name,
+              page.email,
+              page.phone,
+              page.address,
+              COALESCE(recent_visits.visit_count, 0) AS visits_last_12m,
+              s.latest_visit_at AS recent_visit_at,
+              s.latest_visit_reason AS recent_visit_reason,
+              s.latest_visit_notes AS recent_visit_notes,
+              s.latest_note_text AS recent_clinical_note,
+              COALESCE(s.open_concern_count, 0) AS open_concern_count,
+              s.latest_clinic_name AS clinic_name,
+              COALESCE(new_pets.pet_count, 0) AS new_pets_last_90d
+            FROM page
+            LEFT JOIN owner_activity_summary s ON s.owner_id = page.owner_id
+            LEFT JOIN new_pets ON new_pets.owner_id = page.owner_id
+            LEFT JOIN recent_visits ON recent_visits.owner_id = page.owner_id
+            ORDER BY page.page_order
+            """
+        ),
+        {
+            "limit": limit,
+            "offset": offset,
+            "pets_since": datetime.now(UTC) - timedelta(days=90),
+            "year_ago": datetime.now(UTC) - timedelta(days=365),
+        },
+    ).mappings().all()
+    return [dict(r) for r in rows]
 
 
 # Endpoint: handles HTTP request/response mapping for this route.
@@ -255,6 +232,7 @@ def create_owner_note(owner_id: str, payload: OwnerNoteCreate, db: Session = Dep
             "created_at": datetime.now(UTC),
         },
     ).mappings().one()
+    refresh_owner_activity(db, [oid])
     db.commit()
     return {"id": row["id"]}
 
@@ -277,6 +255,7 @@ def delete_owner_note(owner_id: str, note_id: str, db: Session = Depends(get_db)
         ),
         {"deleted_at": datetime.now(UTC), "owner_id": oid, "note_id": nid},
     )
+    refresh_owner_activity(db, [oid])
     db.commit()
     if updated.rowcount == 0:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -289,10 +268,13 @@ def list_owner_concerns(owner_id: str, status: str = "ALL", limit: int = 100, db
     oid = _parse_uuid(owner_id, "owner_id")
     _ensure_owner_exists(db, oid)
     status_u = status.upper().strip()
+    if status_u != "ALL" and status_u not in CONCERN_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be ALL or one of {', '.join(CONCERN_STATUSES)}")
     status_sql = ""
     params: dict[str, object] = {"owner_id": oid, "limit": limit}
     if status_u != "ALL":
-        status_sql = "AND UPPER(COALESCE(c.status, 'OPEN')) = :status"
+        # Status is stored upper-case (ck_concern_flags_status), so compare the bare column.
+        status_sql = "AND c.status = :status"
         params["status"] = status_u
     rows = db.execute(
         text(
@@ -361,6 +343,7 @@ def create_owner_concern(owner_id: str, payload: ConcernCreate, db: Session = De
             "created_at": datetime.now(UTC),
         },
     ).mappings().one()
+    refresh_owner_activity(db, [oid])
     db.commit()
     return {"id": row["id"]}
 
@@ -373,6 +356,8 @@ def update_owner_concern(owner_id: str, flag_id: str, payload: ConcernUpdate, db
     _ensure_owner_exists(db, oid)
     resolved_by_uuid = _parse_uuid(payload.resolved_by_user_id, "resolved_by_user_id") if payload.resolved_by_user_id else None
     status_u = payload.status.strip().upper()
+    if status_u not in CONCERN_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(CONCERN_STATUSES)}")
     resolved_at = datetime.now(UTC) if status_u in {"RESOLVED", "CLOSED"} else None
     result = db.execute(
         text(
@@ -396,7 +381,34 @@ def update_owner_concern(owner_id: str, flag_id: str, payload: ConcernUpdate, db
             "flag_id": fid,
         },
     )
+    refresh_owner_activity(db, [oid])
     db.commit()
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Concern flag not found")
     return {"ok": True}
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/{owner_id}/timeline", summary="Merged owner history (notes, concerns, visits, vaccinations, weights, medications)")
+def get_owner_timeline(
+    owner_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    types: str | None = Query(default=None, description="Comma-separated subset of " + ",".join(TIMELINE_SOURCES)),
+    db: Session = Depends(get_db),
+):
+    oid = _parse_uuid(owner_id, "owner_id")
+    _ensure_owner_exists(db, oid)
+
+    selected = list(TIMELINE_SOURCES)
+    if types:
+        selected = [t.strip().lower() for t in types.split(",") if t.strip()]
+        if not selected or any(t not in TIMELINE_SOURCES for t in selected):
+            raise HTTPException(status_code=400, detail=f"types must be a subset of {', '.join(TIMELINE_SOURCES)}")
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    items, next_cursor = load_owner_timeline(db, oid, limit=limit, types=selected, cursor=position)
+    return {"owner_id": str(oid), "items": items, "next_cursor": next_cursor}
@@ -8,13 +8,14 @@ from datetime import date, datetime
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
 from fastapi.responses import Response
 from pydantic import BaseModel
-from sqlalchemy import desc, select
+from sqlalchemy import desc, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.v1.routes.deps import get_db
 from app.db.models.owner import Owner
 from app.db.models.owner_pet import OwnerPet
-from app.db.models.pet import Pet
+from app.db.models.pet import Pet, normalize_microchip
 from app.db.models.user import User
 from app.db.models.vaccination import Vaccination
 from app.db.models.weight import Weight
@@ -26,6 +27,50 @@ router = APIRouter()
 
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png"}
 MAX_IMAGE_BYTES = 5 * 1024 * 1024
+MAX_MICROCHIP_BATCH = 500
+
+# Must match the expression behind uq_pets_microchip_normalized (see app/main.py).
+MICROCHIP_LOOKUP_SQL = """
+    SELECT
+      p.pet_id::text AS id,
+      p.name AS name,
+      p.species AS species,
+      p.breed AS breed,
+      p.sex AS sex,
+      p.microchip_number AS microchip_number,
+      UPPER(regexp_replace(p.microchip_number, '[^0-9A-Za-z]', '', 'g')) AS microchip_normalized,
+      p.date_of_birth AS date_of_birth,
+      p.photo_mime_type IS NOT NULL AS has_photo,
+      owner_link.owner_id::text AS owner_id,
+      u.user_id::text AS user_id,
+      u.full_name AS owner_full_name,
+      u.email AS owner_email,
+      u.phone AS owner_phone,
+      latest_visit.organisation_id::text AS clinic_id,
+      latest_visit.clinic_name AS clinic_name,
+      latest_visit.visit_datetime AS last_visit_at
+    FROM pets p
+    LEFT JOIN LATERAL (
+      SELECT op.owner_id
+      FROM owner_pets op
+      WHERE op.pet_id = p.pet_id
+        AND op.end_date IS NULL
+      ORDER BY op.start_date DESC
+      LIMIT 1
+    ) owner_link ON TRUE
+    LEFT JOIN owners o ON o.owner_id = owner_link.owner_id
+    LEFT JOIN users u ON u.user_id = o.user_id
+    LEFT JOIN LATERAL (
+      SELECT vv.organisation_id, org.name AS clinic_name, vv.visit_datetime
+      FROM vet_visits vv
+      JOIN organisations org ON org.organisation_id = vv.organisation_id
+      WHERE vv.pet_id = p.pet_id
+      ORDER BY vv.visit_datetime DESC
+      LIMIT 1
+    ) latest_visit ON TRUE
+    WHERE p.microchip_number ~ '[0-9A-Za-z]'
+      AND UPPER(regexp_replace(p.microchip_number, '[^0-9A-Za-z]', '', 'g')) = ANY(:chips)
+"""
 
 
 class WeightCreatePayload(BaseModel):
@@ -33,6 +78,10 @@ class WeightCreatePayload(BaseModel):
     measured_at: datetime | None = None
 
 
+class MicrochipBatchPayload(BaseModel):
+    microchip_numbers: list[str]
+
+
 # -------------------------
 # Helpers
 # -------------------------
@@ -51,6 +100,15 @@ def _normalize_optional(value: str | None) -> str | None:
     return cleaned if cleaned else None
 
 
+def _flush_pet(db: Session) -> None:
+    # Surface uq_pets_microchip_normalized violations as a conflict instead of a 500.
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Microchip number already registered to another pet")
+
+
 async def _read_image_file(photo: UploadFile | None) -> tuple[bytes | None, str | None]:
     if not photo:
         return None, None
@@ -186,14 +244,14 @@ async def create_pet(
         species=species.strip(),
         breed=_normalize_optional(breed),
         sex=_normalize_optional(sex),
-        microchip_number=_normalize_optional(microchip_number),
+        microchip_number=normalize_microchip(microchip_number),
         date_of_birth=date_of_birth,
         photo_data=photo_data,
         photo_mime_type=photo_mime_type,
         photo_url=None,
     )
     db.add(pet)
-    db.flush()
+    _flush_pet(db)
 
     db.add(
         OwnerPet(
@@ -245,7 +303,7 @@ async def update_pet(
     pet.species = species.strip()
     pet.breed = _normalize_optional(breed)
     pet.sex = _normalize_optional(sex)
-    pet.microchip_number = _normalize_optional(microchip_number)
+    pet.microchip_number = normalize_microchip(microchip_number)
     pet.date_of_birth = date_of_birth
 
     if photo:
@@ -254,6 +312,7 @@ async def update_pet(
         pet.photo_mime_type = photo_mime_type
         pet.photo_url = None
 
+    _flush_pet(db)
     db.commit()
     db.refresh(pet)
 
@@ -269,6 +328,36 @@ async def update_pet(
     }
 
 
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/by-microchip/{number}", summary="Look up a pet by microchip number")
+def get_pet_by_microchip(number: str, db: Session = Depends(get_db)):
+    chip = normalize_microchip(number)
+    if not chip:
+        raise HTTPException(status_code=400, detail="Invalid microchip number")
+
+    row = db.execute(text(MICROCHIP_LOOKUP_SQL), {"chips": [chip]}).mappings().first()
+    if not row:
+        raise HTTPException(status_code=404, detail="No pet registered with this microchip")
+    return dict(row)
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.post("/by-microchip", summary="Look up pets for a batch of microchip numbers")
+def get_pets_by_microchips(payload: MicrochipBatchPayload, db: Session = Depends(get_db)):
+    if len(payload.microchip_numbers) > MAX_MICROCHIP_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MICROCHIP_BATCH} microchip numbers per request")
+
+    requested = {raw: normalize_microchip(raw) for raw in payload.microchip_numbers}
+    chips = sorted({chip for chip in requested.values() if chip})
+    rows = db.execute(text(MICROCHIP_LOOKUP_SQL), {"chips": chips}).mappings().all() if chips else []
+
+    by_chip = {row["microchip_normalized"]: dict(row) for row in rows}
+    return {
+        "results": list(by_chip.values()),
+        "not_found": [raw for raw, chip in requested.items() if chip not in by_chip],
+    }
+
+
 # Endpoint: handles HTTP request/response mapping for this route.
 @router.get("/{pet_id}/photo", summary="Get pet photo")
 def get_pet_photo(
@@ -0,0 +1,57 @@
+"""Module: practices."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.v1.routes.deps import get_db
+from app.services.practice_search import PRACTICE_SORTS, InvalidCursor, decode_cursor, open_practices, search_practices
+
+router = APIRouter()
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("", summary="Search vet practices with filters, facet counts and keyset pagination")
+def list_practices(
+    service_types: str | None = Query(default=None, description="Comma-separated; a practice must offer all of them"),
+    after_hours: bool | None = None,
+    min_rating: float | None = Query(default=None, ge=0, le=5),
+    suburb: str | None = None,
+    postcode: str | None = None,
+    practice_type: str | None = None,
+    open_now: bool = False,
+    sort: str = Query("name", description="One of " + ",".join(PRACTICE_SORTS)),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    if sort not in PRACTICE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(PRACTICE_SORTS)}")
+    try:
+        position = decode_cursor(cursor, sort) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    filters = {
+        "service_types": [s.strip() for s in service_types.split(",") if s.strip()] if service_types else None,
+        "after_hours": after_hours,
+        "min_rating": min_rating,
+        "suburb": suburb.strip() if suburb else None,
+        "postcode": postcode.strip() if postcode else None,
+        "practice_type": practice_type.strip() if practice_type else None,
+        "open_now": open_now,
+    }
+    return search_practices(db, filters, sort=sort, limit=limit, cursor=position)
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/open", summary="Vet practices open at a given time (default: now, Tasmanian local time)")
+def list_open_practices(
+    at: datetime | None = Query(default=None, description="ISO datetime; without an offset it is read as local time"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    return open_practices(db, at, limit)
@@ -0,0 +1,158 @@
+"""Module: search."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.api.v1.routes.deps import get_db
+from app.db.models.pet import normalize_microchip
+
+router = APIRouter()
+
+SEARCH_TYPES = ("pet", "owner", "clinic")
+
+# Cached per process; pg_trgm is created at startup in app/main.py when the server ships contrib.
+_TRGM_AVAILABLE: bool | None = None
+
+
+def _trgm_available(db: Session) -> bool:
+    global _TRGM_AVAILABLE
+    if _TRGM_AVAILABLE is None:
+        _TRGM_AVAILABLE = bool(
+            db.execute(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")).scalar()
+        )
+    return _TRGM_AVAILABLE
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _match_sql(column: str, fuzzy: bool) -> str:
+    # ILIKE and <% are both served by the gin_trgm_ops indexes; without pg_trgm only substring matching remains.
+    if fuzzy:
+        return f"({column} ILIKE :contains OR :q <% {column})"
+    return f"{column} ILIKE :contains"
+
+
+def _score_sql(column: str, fuzzy: bool) -> str:
+    # Prefix hits rank above substring hits, which rank above typo-tolerant matches.
+    similarity = f"word_similarity(:q, COALESCE({column}, ''))" if fuzzy else "0"
+    return (
+        f"CASE WHEN {column} ILIKE :prefix THEN 1.0 "
+        f"WHEN {column} ILIKE :contains THEN 0.8 "
+        f"ELSE {similarity} * 0.75 END"
+    )
+
+
+def _search_sql(types: list[str], fuzzy: bool) -> str:
+    parts: list[str] = []
+    if "pet" in types:
+        parts.append(
+            f"""
+            (
+              SELECT
+                'pet'::text AS type,
+                p.pet_id::text AS id,
+                p.name AS label,
+                CONCAT_WS(' · ', p.species, p.breed, p.microchip_number) AS detail,
+                GREATEST(
+                  {_score_sql('p.name', fuzzy)},
+                  {_score_sql('p.breed', fuzzy)} * 0.9,
+                  CASE WHEN p.microchip_number ILIKE :chip_prefix THEN 1.0 ELSE 0 END
+                ) AS score
+              FROM pets p
+              WHERE {_match_sql('p.name', fuzzy)}
+                 OR {_match_sql('p.breed', fuzzy)}
+                 OR p.microchip_number ILIKE :chip_prefix
+              ORDER BY score DESC
+              LIMIT :limit
+            )
+            """
+        )
+    if "owner" in types:
+        parts.append(
+            f"""
+            (
+              SELECT
+                'owner'::text AS type,
+                o.owner_id::text AS id,
+                u.full_name AS label,
+                u.email AS detail,
+                GREATEST(
+                  {_score_sql('u.full_name', fuzzy)},
+                  {_score_sql('u.email', fuzzy)} * 0.9
+                ) AS score
+              FROM users u
+              JOIN owners o ON o.user_id = u.user_id
+              WHERE {_match_sql('u.full_name', fuzzy)}
+                 OR {_match_sql('u.email', fuzzy)}
+              ORDER BY score DESC
+              LIMIT :limit
+            )
+            """
+        )
+    if "clinic" in types:
+        parts.append(
+            f"""
+            (
+              SELECT
+                'clinic'::text AS type,
+                org.organisation_id::text AS id,
+                org.name AS label,
+                CONCAT_WS(', ', org.suburb, org.postcode) AS detail,
+                GREATEST(
+                  {_score_sql('org.name', fuzzy)},
+                  {_score_sql('org.suburb', fuzzy)} * 0.9
+                ) AS score
+              FROM organisations org
+              WHERE org.org_type = 'vet_clinic'
+                AND ({_match_sql('org.name', fuzzy)} OR {_match_sql('org.suburb', fuzzy)})
+              ORDER BY score DESC
+              LIMIT :limit
+            )
+            """
+        )
+    return f"""
+        SELECT type, id, label, detail, ROUND(score::numeric, 3)::float AS score
+        FROM ({' UNION ALL '.join(parts)}) hits
+        ORDER BY score DESC, label ASC
+        LIMIT :limit
+    """
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("", summary="Typo-tolerant search across pets, owners and clinics")
+def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    types: str | None = Query(default=None, description="Comma-separated subset of pet,owner,clinic"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    term = " ".join(q.split())
+    if len(term) < 2:
+        raise HTTPException(status_code=400, detail="Search term must be at least 2 characters")
+
+    selected = list(SEARCH_TYPES)
+    if types:
+        selected = [t.strip().lower() for t in types.split(",") if t.strip()]
+        unknown = [t for t in selected if t not in SEARCH_TYPES]
+        if unknown or not selected:
+            raise HTTPException(status_code=400, detail="types must be a subset of pet, owner, clinic")
+
+    escaped = _escape_like(term)
+    # Chips are stored normalized, so "956 000-012" has to be searched as "956000012"; NULL matches nothing.
+    chip = normalize_microchip(term)
+    rows = db.execute(
+        text(_search_sql(selected, _trgm_available(db))),
+        {
+            "q": term,
+            "prefix": f"{escaped}%",
+            "contains": f"%{escaped}%",
+            "chip_prefix": f"{chip}%" if chip else None,
+            "limit": limit,
+        },
+    ).mappings().all()
+    return {"query": term, "results": [dict(r) for r in rows]}
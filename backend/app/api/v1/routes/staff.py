@@ -3,18 +3,25 @@
 from __future__ import annotations
 
 import uuid
-from datetime import date
+from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import and_, or_, select
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api.v1.routes.deps import get_db
-from app.db.models.organisation import Organisation
 from app.db.models.organisation_member import OrganisationMember
 from app.db.models.staff_leave import StaffLeave
-from app.db.models.user import User
+from app.services.staff_capacity import MAX_CAPACITY_DAYS, refresh_staffing_for_leave, staffing_capacity
+from app.services.staff_dashboard import (
+    ClinicAccessDenied,
+    ClinicNotFound,
+    StaffUserNotFound,
+    invalidate_staff_dashboard,
+    load_staff_dashboard,
+)
+from app.services.staff_leave import LeaveOverlap, ensure_no_overlapping_leave, lock_staff_leave, staff_on_leave
 
 router = APIRouter()
 
@@ -43,128 +50,54 @@ def staff_dashboard(
     db: Session = Depends(get_db),
 ):
     uid = _parse_uuid(user_id, "user_id")
-    user = db.execute(select(User).where(User.user_id == uid)).scalar_one_or_none()
-    if not user:
+    cid = _parse_uuid(organisation_id, "organisation_id") if organisation_id else None
+    try:
+        return load_staff_dashboard(db, uid, cid)
+    except StaffUserNotFound:
         raise HTTPException(status_code=404, detail="User not found")
-    is_admin = (user.role or "").upper() == "ADMIN"
-
-    member_clinic_ids = [
-        row.organisation_id
-        for row in db.execute(
-            select(OrganisationMember.organisation_id).where(OrganisationMember.user_id == uid)
-        ).scalars().all()
-    ]
-    if is_admin:
-        allowed_clinic_ids = db.execute(
-            select(Organisation.organisation_id).where(Organisation.org_type == "vet_clinic")
-        ).scalars().all()
-    else:
-        allowed_clinic_ids = member_clinic_ids
-
-    clinic_ids = list(allowed_clinic_ids)
-
-    if organisation_id:
-        req_cid = _parse_uuid(organisation_id, "organisation_id")
-        if (not is_admin) and req_cid not in member_clinic_ids:
-            raise HTTPException(status_code=403, detail="User is not a member of requested clinic")
-        if is_admin and req_cid not in allowed_clinic_ids:
-            raise HTTPException(status_code=404, detail="Requested clinic not found")
-        clinic_ids = [req_cid]
-
-    if not clinic_ids:
-        return {"clinics": [], "staff": [], "leave_now": [], "leave_upcoming": [], "policies": []}
-
-    staff_rows = db.execute(
-        select(
-            OrganisationMember.organisation_id.label("organisation_id"),
-            OrganisationMember.member_role.label("member_role"),
-            User.user_id.label("user_id"),
-            User.full_name.label("full_name"),
-            User.email.label("email"),
-            User.phone.label("phone"),
-        )
-        .select_from(OrganisationMember)
-        .join(User, User.user_id == OrganisationMember.user_id)
-        .where(OrganisationMember.organisation_id.in_(clinic_ids))
-    ).mappings().all()
-
-    today = date.today()
-    leave_now_rows = db.execute(
-        select(StaffLeave).where(
-            StaffLeave.organisation_id.in_(clinic_ids),
-            StaffLeave.status == "APPROVED",
-            StaffLeave.start_date <= today,
-            StaffLeave.end_date >= today,
-        )
-    ).scalars().all()
-
-    leave_upcoming_rows = db.execute(
-        select(StaffLeave).where(
-            StaffLeave.organisation_id.in_(clinic_ids),
-            or_(
-                StaffLeave.status == "PENDING",
-                and_(
-                    StaffLeave.status == "APPROVED",
-                    StaffLeave.start_date > today,
-                ),
-            ),
-        )
-    ).scalars().all()
+    except ClinicNotFound:
+        raise HTTPException(status_code=404, detail="Requested clinic not found")
+    except ClinicAccessDenied:
+        raise HTTPException(status_code=403, detail="User is not a member of requested clinic")
 
-    user_lookup = {
-        u.user_id: u
-        for u in db.execute(
-            select(User).where(User.user_id.in_([row.user_id for row in leave_now_rows + leave_upcoming_rows]))
-        ).scalars().all()
-    }
 
-    clinic_ids_out = list(allowed_clinic_ids)
-    clinic_lookup = {
-        c.organisation_id: c
-        for c in db.execute(select(Organisation).where(Organisation.organisation_id.in_(clinic_ids_out))).scalars().all()
-    }
-    clinics = [
-        {
-            "id": str(cid),
-            "name": clinic_lookup.get(cid).name if clinic_lookup.get(cid) else str(cid),
-        }
-        for cid in clinic_ids_out
-    ]
-    policies = [
-        {"id": "onboarding", "title": "Onboarding Handbook", "category": "Onboarding"},
-        {"id": "leave-policy", "title": "Leave and Entitlements Policy", "category": "HR"},
-        {"id": "clinical-protocols", "title": "Clinical Safety Protocols", "category": "Clinical"},
-        {"id": "incident-form", "title": "Incident Report Form", "category": "Forms"},
-        {"id": "med-order-form", "title": "Medication Order Request Form", "category": "Forms"},
-    ]
-
-    staff = []
-    for row in staff_rows:
-        d = dict(row)
-        d["organisation_id"] = str(d["organisation_id"])
-        d["user_id"] = str(d["user_id"])
-        staff.append(d)
-
-    def leave_to_dict(leave: StaffLeave):
-        u = user_lookup.get(leave.user_id)
-        return {
-            "leave_id": str(leave.leave_id),
-            "organisation_id": str(leave.organisation_id),
-            "user_id": str(leave.user_id),
-            "staff_name": u.full_name if u else None,
-            "start_date": leave.start_date,
-            "end_date": leave.end_date,
-            "reason": leave.reason,
-            "status": leave.status,
-        }
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/leave", summary="Staff on approved leave on a date, across clinics")
+def list_staff_on_leave(
+    on_date: date | None = Query(default=None, alias="date", description="Defaults to today"),
+    organisation_ids: str | None = Query(default=None, description="Comma-separated clinic ids; all clinics when omitted"),
+    db: Session = Depends(get_db),
+):
+    day = on_date or date.today()
+    cids = (
+        [_parse_uuid(v.strip(), "organisation_ids") for v in organisation_ids.split(",") if v.strip()]
+        if organisation_ids
+        else None
+    )
+    items = staff_on_leave(db, day, cids)
+    return {"date": day, "total": len(items), "items": items}
 
-    return {
-        "clinics": clinics,
-        "staff": staff,
-        "leave_now": [leave_to_dict(l) for l in leave_now_rows],
-        "leave_upcoming": [leave_to_dict(l) for l in leave_upcoming_rows],
-        "policies": policies,
-    }
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/capacity", summary="Rostered, on-leave and available staff per clinic per day")
+def staff_capacity(
+    from_date: date | None = Query(default=None, alias="from", description="Defaults to today"),
+    to_date: date | None = Query(default=None, alias="to", description="Inclusive; defaults to two weeks from `from`"),
+    organisation_ids: str | None = Query(default=None, description="Comma-separated clinic ids; all clinics when omitted"),
+    db: Session = Depends(get_db),
+):
+    start = from_date or date.today()
+    end = to_date or start + timedelta(days=13)
+    if end < start:
+        raise HTTPException(status_code=400, detail="to must be on or after from")
+    if (end - start).days + 1 > MAX_CAPACITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be at most {MAX_CAPACITY_DAYS} days")
+    cids = (
+        [_parse_uuid(v.strip(), "organisation_ids") for v in organisation_ids.split(",") if v.strip()]
+        if organisation_ids
+        else None
+    )
+    return {"from": start, "to": end, "items": staffing_capacity(db, start, end, cids)}
 
 
 # Endpoint: handles HTTP request/response mapping for this route.
@@ -184,6 +117,13 @@ def apply_leave(payload: LeaveRequestCreate, db: Session = Depends(get_db)):
     if payload.end_date < payload.start_date:
         raise HTTPException(status_code=400, detail="end_date must be on or after start_date")
 
+    lock_staff_leave(db, uid)
+    try:
+        ensure_no_overlapping_leave(db, uid, payload.start_date, payload.end_date)
+    except LeaveOverlap as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(exc))
+
     leave = StaffLeave(
         organisation_id=cid,
         user_id=uid,
@@ -193,8 +133,11 @@ def apply_leave(payload: LeaveRequestCreate, db: Session = Depends(get_db)):
         status="PENDING",
     )
     db.add(leave)
+    db.flush()
+    refresh_staffing_for_leave(db, uid, payload.start_date, payload.end_date)
     db.commit()
     db.refresh(leave)
+    invalidate_staff_dashboard(cid)
 
     return {
         "leave_id": str(leave.leave_id),
@@ -1,20 +1,33 @@
 """Module: visits."""
 
-from collections import defaultdict
 from datetime import UTC, date, datetime, timedelta
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc, text, func
+from sqlalchemy import insert, select, desc, text
 from app.api.v1.routes.deps import get_db
-from app.db.models.vet_visit import VetVisit
+from app.db.models.vet_visit import VISIT_STATUSES, VetVisit
 from app.db.models.pet import Pet
 from app.db.models.owner import Owner
 from app.db.models.owner_pet import OwnerPet
 from app.db.models.user import User
 from app.db.models.organisation import Organisation
+from app.services.availability import (
+    SlotUnavailable,
+    ensure_slot_free,
+    find_booking_conflicts,
+    lock_vet_schedule,
+    lock_vet_schedules,
+    normalize_visit_datetimes,
+)
+from app.services.loaders import loaders_for
+from app.services.owner_activity import refresh_owner_activity_for_pets
+from app.services.visit_export import EXPORT_FORMATS, stream_visit_export
+from app.services.visit_outbox import VISIT_CANCELLED, VISIT_CREATED, enqueue_visit_events
+from app.services.visit_rollup import calendar_summary, invalidate_visit_rollup
 
 
 class VisitCreatePayload(BaseModel):
@@ -24,11 +37,35 @@ class VisitCreatePayload(BaseModel):
     visit_datetime: datetime
     reason: str | None = None
     notes_visible_to_owner: str | None = None
+    status: str = "SCHEDULED"
+
+
+# Total visits (after expanding recurrences) one batch request may create.
+MAX_VISIT_BATCH = 500
+RECURRENCE_UNITS = {"days": 1, "weeks": 7}
+# Largest recurrence step, in units.
+MAX_RECURRENCE_EVERY = 365
+
+
+class VisitRecurrence(BaseModel):
+    every: int = Field(1, ge=1, le=MAX_RECURRENCE_EVERY)
+    unit: str = "weeks"
+    count: int | None = Field(None, ge=1, le=MAX_VISIT_BATCH)
+    until: date | None = None
+
+
+class VisitBatchItem(VisitCreatePayload):
+    recurrence: VisitRecurrence | None = None
+
+
+class VisitBatchPayload(BaseModel):
+    visits: list[VisitBatchItem]
 
 
 class VisitCancelPayload(BaseModel):
     reason: str | None = None
 
+
 router = APIRouter()
 
 
@@ -59,6 +96,7 @@ def list_visits(
             VetVisit.vet_user_id.label("vet_user_id"),
             VetVisit.visit_datetime.label("visit_datetime"),
             VetVisit.reason.label("reason"),
+            VetVisit.status.label("status"),
             VetVisit.notes_visible_to_owner.label("notes_visible_to_owner"),
             Pet.name.label("pet_name"),
             Pet.species.label("pet_species"),
@@ -87,7 +125,7 @@ def list_visits(
         oid = _parse_uuid(organisation_id, "organisation_id")
         stmt = stmt.where(VetVisit.organisation_id == oid)
     if not include_cancelled:
-        stmt = stmt.where(~func.lower(func.coalesce(VetVisit.reason, "")).like("%cancel%"))
+        stmt = stmt.where(VetVisit.status != "CANCELLED")
 
     rows = db.execute(stmt.offset(offset).limit(limit)).mappings().all()
 
@@ -111,71 +149,85 @@ def visits_calendar_summary(
     organisation_id: str | None = Query(default=None),
     db: Session = Depends(get_db),
 ):
-    # Parse YYYY-MM safely and compute month bounds in Python to stay DB-agnostic.
     try:
-        month_start = datetime.strptime(f"{month}-01", "%Y-%m-%d")
+        month_start = datetime.strptime(f"{month}-01", "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid month format (expected YYYY-MM)")
 
-    if month_start.month == 12:
-        month_end = datetime(month_start.year + 1, 1, 1)
-    else:
-        month_end = datetime(month_start.year, month_start.month + 1, 1)
+    oid = _parse_uuid(organisation_id, "organisation_id") if organisation_id else None
+    # Past months are served from visit_daily_rollup; the current and future months aggregate live in SQL.
+    # Note this GET can write: a past month missing from the rollup is rebuilt and committed on first read.
+    return calendar_summary(db, month_start, oid)
 
-    stmt = select(VetVisit.visit_datetime, VetVisit.reason).where(
-        VetVisit.visit_datetime >= month_start,
-        VetVisit.visit_datetime < month_end,
-    )
-    if organisation_id:
-        oid = _parse_uuid(organisation_id, "organisation_id")
-        stmt = stmt.where(VetVisit.organisation_id == oid)
 
-    rows = db.execute(stmt).all()
-
-    # Aggregate per-day in Python for consistent behavior across Postgres/SQLite.
-    day_counts: dict[str, dict[str, int]] = defaultdict(lambda: {"total_visits": 0, "cancelled_or_missed": 0})
-    for visit_datetime, reason in rows:
-        if visit_datetime is None:
-            continue
-        day_key = visit_datetime.date().isoformat()
-        day_counts[day_key]["total_visits"] += 1
-
-        reason_text = (reason or "").lower()
-        if ("cancel" in reason_text) or ("no show" in reason_text) or ("did not attend" in reason_text):
-            day_counts[day_key]["cancelled_or_missed"] += 1
-
-    out = []
-    for day in sorted(day_counts.keys()):
-        out.append(
-            {
-                "day": day,
-                "total_visits": int(day_counts[day]["total_visits"]),
-                "cancelled_or_missed": int(day_counts[day]["cancelled_or_missed"]),
-            }
-        )
-    return out
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.get("/export", summary="Stream visit history as CSV or NDJSON")
+def export_visits(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    organisation_id: str | None = Query(default=None),
+    export_format: str = Query(default="csv", alias="format"),
+    gzip: bool = False,
+):
+    export_format = export_format.strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to must be on or after from")
+    oid = _parse_uuid(organisation_id, "organisation_id") if organisation_id else None
+
+    # Rows go from the DB cursor to the client block by block, so memory is flat regardless of the range.
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"visits_{from_date.isoformat()}_{to_date.isoformat()}.{export_format}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(
+        stream_visit_export(from_date, to_date, oid, export_format=export_format, gzip=gzip),
+        media_type=media_type,
+        headers=headers,
+    )
 
 
 # Endpoint: handles HTTP request/response mapping for this route.
 @router.post("", summary="Create a visit")
 def create_visit(payload: VisitCreatePayload, db: Session = Depends(get_db)):
     pet_id = _parse_uuid(payload.pet_id, "pet_id")
-    pet = db.execute(select(Pet).where(Pet.pet_id == pet_id)).scalar_one_or_none()
-    if not pet:
+    if loaders_for(db).pets.load(pet_id) is None:
         raise HTTPException(status_code=404, detail="Pet not found")
 
+    status = payload.status.strip().upper()
+    if status not in VISIT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(VISIT_STATUSES)}")
+
     organisation_uuid = _parse_uuid(payload.organisation_id, "organisation_id") if payload.organisation_id else None
     vet_user_uuid = _parse_uuid(payload.vet_user_id, "vet_user_id") if payload.vet_user_id else None
+    [visit_datetime] = normalize_visit_datetimes(db, [payload.visit_datetime])
+
+    if vet_user_uuid and status != "CANCELLED":
+        # Held until commit, so a concurrent booking for the same vet waits and then sees this visit.
+        lock_vet_schedule(db, vet_user_uuid)
+        try:
+            ensure_slot_free(db, vet_user_uuid, visit_datetime)
+        except SlotUnavailable as exc:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=str(exc))
 
     visit = VetVisit(
         pet_id=pet_id,
         organisation_id=organisation_uuid,
         vet_user_id=vet_user_uuid,
-        visit_datetime=payload.visit_datetime,
+        visit_datetime=visit_datetime,
         reason=(payload.reason or "General check").strip(),
         notes_visible_to_owner=(payload.notes_visible_to_owner or "").strip() or None,
+        status=status,
     )
     db.add(visit)
+    db.flush()
+    refresh_owner_activity_for_pets(db, [visit.pet_id])
+    invalidate_visit_rollup(db, visit.visit_datetime)
+    enqueue_visit_events(db, VISIT_CREATED, [visit])
     db.commit()
     db.refresh(visit)
 
@@ -186,10 +238,129 @@ def create_visit(payload: VisitCreatePayload, db: Session = Depends(get_db)):
         "vet_user_id": str(visit.vet_user_id) if visit.vet_user_id else None,
         "visit_datetime": visit.visit_datetime,
         "reason": visit.reason,
+        "status": visit.status,
         "notes_visible_to_owner": visit.notes_visible_to_owner,
     }
 
 
+def _expand_recurrence(item: VisitBatchItem) -> list[datetime]:
+    rule = item.recurrence
+    if rule is None:
+        return [item.visit_datetime]
+    unit = rule.unit.strip().lower()
+    if unit not in RECURRENCE_UNITS:
+        raise HTTPException(status_code=400, detail=f"recurrence.unit must be one of {', '.join(RECURRENCE_UNITS)}")
+    if rule.count is None and rule.until is None:
+        raise HTTPException(status_code=400, detail="recurrence needs count or until")
+
+    step = timedelta(days=rule.every * RECURRENCE_UNITS[unit])
+    occurrences: list[datetime] = []
+    current = item.visit_datetime
+    while rule.count is None or len(occurrences) < rule.count:
+        if rule.until is not None and current.date() > rule.until:
+            break
+        occurrences.append(current)
+        if len(occurrences) > MAX_VISIT_BATCH:
+            break
+        try:
+            current += step
+        except OverflowError:
+            raise HTTPException(status_code=400, detail="recurrence runs past the last supported date")
+    return occurrences
+
+
+# Endpoint: handles HTTP request/response mapping for this route.
+@router.post(":batch", summary="Create many visits, optionally recurring, in one request")
+def create_visits_batch(payload: VisitBatchPayload, db: Session = Depends(get_db)):
+    if not payload.visits:
+        raise HTTPException(status_code=400, detail="visits must not be empty")
+
+    rows: list[dict] = []
+    for item in payload.visits:
+        status = item.status.strip().upper()
+        if status not in VISIT_STATUSES:
+            raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(VISIT_STATUSES)}")
+        pet_id = _parse_uuid(item.pet_id, "pet_id")
+        organisation_uuid = _parse_uuid(item.organisation_id, "organisation_id") if item.organisation_id else None
+        vet_user_uuid = _parse_uuid(item.vet_user_id, "vet_user_id") if item.vet_user_id else None
+        for visit_datetime in _expand_recurrence(item):
+            rows.append(
+                {
+                    "visit_id": uuid.uuid4(),
+                    "pet_id": pet_id,
+                    "organisation_id": organisation_uuid,
+                    "vet_user_id": vet_user_uuid,
+                    "visit_datetime": visit_datetime,
+                    "reason": (item.reason or "General check").strip(),
+                    "notes_visible_to_owner": (item.notes_visible_to_owner or "").strip() or None,
+                    "status": status,
+                    "created_at": datetime.utcnow(),
+                }
+            )
+            if len(rows) > MAX_VISIT_BATCH:
+                raise HTTPException(status_code=400, detail=f"At most {MAX_VISIT_BATCH} visits per batch")
+
+    # Offset and naive times can be mixed in one payload; check and store them as the column will hold them.
+    for row, visit_datetime in zip(rows, normalize_visit_datetimes(db, [r["visit_datetime"] for r in rows])):
+        row["visit_datetime"] = visit_datetime
+
+    # One round trip validates every referenced pet, clinic and vet.
+    pet_ids = sorted({r["pet_id"] for r in rows}, key=str)
+    org_ids = sorted({r["organisation_id"] for r in rows if r["organisation_id"]}, key=str)
+    vet_ids = sorted({r["vet_user_id"] for r in rows if r["vet_user_id"]}, key=str)
+    found = db.execute(
+        text(
+            """
+            SELECT 'pet_id' AS kind, pet_id AS id FROM pets WHERE pet_id = ANY(:pet_ids)
+            UNION ALL
+            SELECT 'organisation_id', organisation_id FROM organisations WHERE organisation_id = ANY(:org_ids)
+            UNION ALL
+            SELECT 'vet_user_id', user_id FROM users WHERE user_id = ANY(:vet_ids)
+            """
+        ),
+        {"pet_ids": pet_ids, "org_ids": org_ids, "vet_ids": vet_ids},
+    ).all()
+    known = {(kind, ident) for kind, ident in found}
+    for kind, ids in (("pet_id", pet_ids), ("organisation_id", org_ids), ("vet_user_id", vet_ids)):
+        missing = [str(i) for i in ids if (kind, i) not in known]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown {kind}: {', '.join(missing)}")
+
+    bookings = [(r["vet_user_id"], r["visit_datetime"]) for r in rows if r["vet_user_id"] and r["status"] != "CANCELLED"]
+    if bookings:
+        lock_vet_schedules(db, [vet_id for vet_id, _ in bookings])
+        conflicts = find_booking_conflicts(db, bookings)
+        if conflicts:
+            db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail=[
+                    {
+                        "vet_user_id": str(c["vet_user_id"]),
+                        "visit_datetime": c["visit_datetime"].isoformat(),
+                        "conflicts_with": c["conflicts_with"].isoformat(),
+                    }
+                    for c in conflicts
+                ],
+            )
+
+    # Single multi-row INSERT ... VALUES for the whole batch.
+    db.execute(insert(VetVisit).values(rows))
+    refresh_owner_activity_for_pets(db, pet_ids)
+    for month_start in sorted({r["visit_datetime"].replace(day=1, hour=0, minute=0, second=0, microsecond=0) for r in rows}):
+        invalidate_visit_rollup(db, month_start)
+    enqueue_visit_events(db, VISIT_CREATED, rows)
+    db.commit()
+
+    return {
+        "count": len(rows),
+        "visits": [
+            {"id": str(r["visit_id"]), "pet_id": str(r["pet_id"]), "visit_datetime": r["visit_datetime"]}
+            for r in rows
+        ],
+    }
+
+
 # Endpoint: handles HTTP request/response mapping for this route.
 @router.patch("/{visit_id}/cancel", summary="Cancel a visit")
 def cancel_visit(visit_id: str, payload: VisitCancelPayload, db: Session = Depends(get_db)):
@@ -200,11 +371,17 @@ def cancel_visit(visit_id: str, payload: VisitCancelPayload, db: Session = Depen
 
     reason_suffix = (payload.reason or "Cancelled by clinic").strip()
     visit.reason = f"Cancelled: {reason_suffix}"
+    visit.status = "CANCELLED"
+    db.flush()
+    refresh_owner_activity_for_pets(db, [visit.pet_id])
+    invalidate_visit_rollup(db, visit.visit_datetime)
+    enqueue_visit_events(db, VISIT_CANCELLED, [visit])
     db.commit()
     db.refresh(visit)
 
     return {
         "id": str(visit.visit_id),
         "reason": visit.reason,
+        "status": visit.status,
     }
 
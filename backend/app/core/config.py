@@ -10,6 +10,10 @@ class Settings(BaseSettings):
     mock_gov_base_url: str = "http://mock-gov:8001"
     # Base URL for mocked veterinarian integration service used in dev/test.
     mock_vet_base_url: str = "http://mock-vet:8002"
+    # Run the in-process visit outbox dispatcher that pushes visit events to the vet gateway.
+    vet_outbox_dispatch_enabled: bool = True
+    # Seconds the dispatcher sleeps when the outbox has nothing due.
+    vet_outbox_poll_seconds: float = 2.0
 
     # Configure pydantic-settings to also load values from local .env file.
     class Config:
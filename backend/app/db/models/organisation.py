@@ -1,7 +1,7 @@
 """Module: organisation."""
 
 import uuid
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, DateTime, ForeignKey, Numeric
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
@@ -21,8 +21,16 @@ class Organisation(Base):
     suburb: Mapped[str] = mapped_column(String, nullable=True)
     state: Mapped[str] = mapped_column(String, nullable=True)
     postcode: Mapped[str] = mapped_column(String, nullable=True)
-    latitude: Mapped[str] = mapped_column(String, nullable=True)
-    longitude: Mapped[str] = mapped_column(String, nullable=True)
+    latitude: Mapped[float] = mapped_column(Numeric(9, 6), nullable=True)
+    longitude: Mapped[float] = mapped_column(Numeric(9, 6), nullable=True)
+    # stored, postcode, suburb or simulated; set by app.scripts.geocode_clinics.
+    geo_precision: Mapped[str] = mapped_column(String, nullable=True)
+    geo_input_hash: Mapped[str] = mapped_column(String, nullable=True)
+    geocoded_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # The vet_practices row this clinic is synced from (app.services.practice_ingest).
+    practice_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("vet_practices.id", ondelete="SET NULL"), nullable=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -10,6 +10,15 @@ from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
 
+def normalize_microchip(value: str | None) -> str | None:
+    # Scanners and owners format chips differently ("956 000-012 345 678"); store and search one canonical form.
+    # Must match the expression behind uq_pets_microchip_normalized (see app/main.py).
+    if value is None:
+        return None
+    cleaned = "".join(ch for ch in value if ch.isascii() and ch.isalnum()).upper()
+    return cleaned or None
+
+
 # Core pet profile model used by visits, vaccinations, weights, and owner dashboards.
 class Pet(Base):
     __tablename__ = "pets"
@@ -26,4 +26,5 @@ class PracticeStaff(Base):
     source_url: Mapped[str] = mapped_column(Text, nullable=False)
     scraped_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    source_hash: Mapped[str] = mapped_column(Text, nullable=True)
 
@@ -37,7 +37,9 @@ class VetPractice(Base):
 
     service_types: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=True)
     opening_hours_text: Mapped[str] = mapped_column(String, nullable=True)
+    # Structured weekly hours parsed from opening_hours_text; rows live in practice_opening_hours.
     opening_hours_json: Mapped[str] = mapped_column(String, nullable=True)
+    opening_hours_hash: Mapped[str] = mapped_column(String, nullable=True)
     after_hours_available: Mapped[bool] = mapped_column(Boolean, nullable=True)
     after_hours_notes: Mapped[str] = mapped_column(String, nullable=True)
     emergency_referral: Mapped[str] = mapped_column(String, nullable=True)
@@ -45,4 +47,6 @@ class VetPractice(Base):
     rating: Mapped[float] = mapped_column(Numeric(3, 2), nullable=True)
     review_count: Mapped[int] = mapped_column(Integer, nullable=True)
     scraped_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Fingerprint of the source row; the ingestion command skips rows whose hash is unchanged.
+    source_hash: Mapped[str] = mapped_column(String, nullable=True)
 
@@ -8,6 +8,10 @@ from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
 
+VISIT_STATUSES = ("SCHEDULED", "COMPLETED", "CANCELLED", "NO_SHOW")
+# Statuses reported as "cancelled or missed" by the calendar and dashboard KPIs.
+MISSED_VISIT_STATUSES = ("CANCELLED", "NO_SHOW")
+
 # Clinical visit/appointment records for pets with optional clinic and vet context.
 class VetVisit(Base):
     __tablename__ = "vet_visits"
@@ -33,6 +37,7 @@ class VetVisit(Base):
     visit_datetime: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     reason: Mapped[str] = mapped_column(String, nullable=True)
     notes_visible_to_owner: Mapped[str] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="SCHEDULED", server_default="SCHEDULED")
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -1,14 +1,34 @@
 """Module: main."""
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.api.v1.api import api_router
+from app.core.config import settings
 from app.db.base import Base
 from app.db.session import engine
+from app.services.practice_ingest import LINK_CLINICS_SQL
+from app.services.visit_outbox import run_outbox_dispatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background push of visit_outbox to the vet gateway; visit writes never wait on the upstream.
+    stop = asyncio.Event()
+    dispatcher = None
+    if settings.vet_outbox_dispatch_enabled:
+        dispatcher = asyncio.create_task(run_outbox_dispatcher(settings.vet_outbox_poll_seconds, stop))
+    yield
+    stop.set()
+    if dispatcher:
+        await dispatcher
+
 
-app = FastAPI(title="Pet Protect API", version="0.1.0")
+app = FastAPI(title="Pet Protect API", version="0.1.0", lifespan=lifespan)
 
 app.include_router(api_router, prefix="/api/v1")
 
@@ -118,6 +138,32 @@ with engine.begin() as conn:
             """
         )
     )
+    conn.execute(
+        text(
+            """
+            -- Chips registered before writes were normalized; search prefix-matches the stored canonical form.
+            UPDATE pets
+            SET microchip_number = NULLIF(UPPER(regexp_replace(microchip_number, '[^0-9A-Za-z]', '', 'g')), '')
+            WHERE microchip_number IS DISTINCT FROM NULLIF(UPPER(regexp_replace(microchip_number, '[^0-9A-Za-z]', '', 'g')), '');
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            DO $$
+            BEGIN
+              -- Scanner lookups match on the separator-free, upper-case chip number.
+              CREATE UNIQUE INDEX IF NOT EXISTS uq_pets_microchip_normalized
+              ON pets ((UPPER(regexp_replace(microchip_number, '[^0-9A-Za-z]', '', 'g'))))
+              WHERE microchip_number ~ '[0-9A-Za-z]';
+            EXCEPTION
+              WHEN unique_violation THEN
+                RAISE WARNING 'Duplicate microchip numbers found; uq_pets_microchip_normalized not created';
+            END $$;
+            """
+        )
+    )
     conn.execute(
         text(
             """
@@ -194,17 +240,29 @@ with engine.begin() as conn:
     conn.execute(
         text(
             """
-            ALTER TABLE organisations ADD COLUMN IF NOT EXISTS latitude VARCHAR;
+            ALTER TABLE organisations ADD COLUMN IF NOT EXISTS latitude NUMERIC(9,6);
             """
         )
     )
     conn.execute(
         text(
             """
-            ALTER TABLE organisations ADD COLUMN IF NOT EXISTS longitude VARCHAR;
+            ALTER TABLE organisations ADD COLUMN IF NOT EXISTS longitude NUMERIC(9,6);
             """
         )
     )
+    # Coordinate provenance written by the clinic geocoding job.
+    conn.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS geo_precision VARCHAR;"))
+    conn.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS geo_input_hash VARCHAR;"))
+    conn.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS geocoded_at TIMESTAMP;"))
+    # The practice a clinic was synced from; set by practice ingest, backfilled by name where that is unambiguous.
+    conn.execute(
+        text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS practice_id UUID REFERENCES vet_practices(id) ON DELETE SET NULL;")
+    )
+    conn.execute(
+        text("CREATE UNIQUE INDEX IF NOT EXISTS uq_organisations_practice_id ON organisations (practice_id) WHERE practice_id IS NOT NULL;")
+    )
+    conn.execute(text(LINK_CLINICS_SQL), {"practice_ids": None})
     conn.execute(
         text(
             """
@@ -300,6 +358,7 @@ with engine.begin() as conn:
     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_vet_practices_suburb_postcode ON vet_practices (suburb, postcode);"))
     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_vet_practices_rating ON vet_practices (rating);"))
     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_vet_practices_service_types_gin ON vet_practices USING GIN (service_types);"))
+    conn.execute(text("ALTER TABLE vet_practices ADD COLUMN IF NOT EXISTS source_hash VARCHAR;"))
     conn.execute(
         text(
             """
@@ -394,6 +453,159 @@ with engine.begin() as conn:
         )
     )
     conn.execute(text("CREATE INDEX IF NOT EXISTS idx_dashboard_reminders_scope_due ON dashboard_reminders (role_scope, due_at);"))
+    # Backfill canonical upper-case status/scope values so queries can compare columns directly.
+    conn.execute(
+        text(
+            """
+            UPDATE concern_flags
+            SET status = UPPER(TRIM(status))
+            WHERE status IS DISTINCT FROM UPPER(TRIM(status));
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            UPDATE dashboard_reminders
+            SET
+              status = UPPER(TRIM(status)),
+              role_scope = UPPER(TRIM(role_scope))
+            WHERE status IS DISTINCT FROM UPPER(TRIM(status))
+               OR role_scope IS DISTINCT FROM UPPER(TRIM(role_scope));
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            UPDATE staff_leaves
+            SET status = UPPER(TRIM(status))
+            WHERE status IS DISTINCT FROM UPPER(TRIM(status));
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            DO $$
+            DECLARE
+              spec TEXT[];
+            BEGIN
+              -- Added NOT VALID so startup never fails on legacy rows; new writes are always checked.
+              FOREACH spec SLICE 1 IN ARRAY ARRAY[
+                ARRAY['concern_flags', 'ck_concern_flags_status', 'status IN (''OPEN'', ''UNDER_REVIEW'', ''RESOLVED'', ''CLOSED'')'],
+                ARRAY['dashboard_reminders', 'ck_dashboard_reminders_status', 'status IN (''OPEN'', ''DONE'')'],
+                ARRAY['dashboard_reminders', 'ck_dashboard_reminders_role_scope', 'role_scope IN (''ADMIN'', ''VET'', ''OWNER'')'],
+                ARRAY['staff_leaves', 'ck_staff_leaves_status', 'status IN (''PENDING'', ''APPROVED'', ''REJECTED'', ''CANCELLED'')']
+              ]
+              LOOP
+                IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = spec[2]) THEN
+                  EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (%s) NOT VALID', spec[1], spec[2], spec[3]);
+                END IF;
+                BEGIN
+                  EXECUTE format('ALTER TABLE %I VALIDATE CONSTRAINT %I', spec[1], spec[2]);
+                EXCEPTION
+                  WHEN check_violation THEN
+                    RAISE WARNING 'Rows in % violate %; constraint left NOT VALID', spec[1], spec[2];
+                END;
+              END LOOP;
+            END $$;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_concern_flags_owner_open
+            ON concern_flags (owner_id, created_at DESC)
+            WHERE status = 'OPEN';
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_dashboard_reminders_active_scope_due
+            ON dashboard_reminders (role_scope, due_at)
+            WHERE deleted_at IS NULL;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_dashboard_reminders_active_owner_due
+            ON dashboard_reminders (owner_id, due_at)
+            WHERE deleted_at IS NULL AND role_scope = 'OWNER';
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_owner_notes_owner_active
+            ON owner_notes (owner_id, created_at DESC)
+            WHERE deleted_at IS NULL;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_staff_leaves_org_approved
+            ON staff_leaves (organisation_id, start_date, end_date)
+            WHERE status = 'APPROVED';
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            -- Inclusive leave window as a range; inverted legacy rows get NULL instead of failing startup.
+            ALTER TABLE staff_leaves
+            ADD COLUMN IF NOT EXISTS leave_period DATERANGE GENERATED ALWAYS AS (
+              CASE WHEN end_date >= start_date THEN daterange(start_date, end_date, '[]') END
+            ) STORED;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_staff_leaves_period_approved
+            ON staff_leaves USING GIST (leave_period)
+            WHERE status = 'APPROVED';
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            DO $$
+            BEGIN
+              BEGIN
+                CREATE EXTENSION IF NOT EXISTS btree_gist;
+              EXCEPTION
+                WHEN OTHERS THEN
+                  NULL;
+              END;
+              -- btree_gist provides GiST equality on user_id; without it overlaps are only checked by POST /staff/leave.
+              IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'btree_gist')
+                 AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ex_staff_leaves_approved_overlap') THEN
+                BEGIN
+                  ALTER TABLE staff_leaves
+                    ADD CONSTRAINT ex_staff_leaves_approved_overlap
+                    EXCLUDE USING GIST (user_id WITH =, leave_period WITH &&)
+                    WHERE (status = 'APPROVED');
+                EXCEPTION
+                  WHEN exclusion_violation THEN
+                    RAISE WARNING 'Overlapping approved leave found; ex_staff_leaves_approved_overlap not created';
+                END;
+              END IF;
+            END $$;
+            """
+        )
+    )
     conn.execute(
         text(
             """
@@ -402,6 +614,7 @@ with engine.begin() as conn:
             """
         )
     )
+    conn.execute(text("ALTER TABLE practice_staff ADD COLUMN IF NOT EXISTS source_hash TEXT;"))
     conn.execute(
         text(
             """
@@ -425,4 +638,271 @@ with engine.begin() as conn:
             """
         )
     )
+    conn.execute(
+        text(
+            """
+            DO $$
+            BEGIN
+              -- Clinic coordinates were stored as text; convert once, dropping values that are not plain decimals.
+              IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'organisations' AND column_name = 'latitude' AND data_type = 'character varying'
+              ) THEN
+                ALTER TABLE organisations
+                  ALTER COLUMN latitude TYPE NUMERIC(9,6)
+                    USING CASE WHEN TRIM(latitude) ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN ROUND(TRIM(latitude)::numeric, 6) END,
+                  ALTER COLUMN longitude TYPE NUMERIC(9,6)
+                    USING CASE WHEN TRIM(longitude) ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN ROUND(TRIM(longitude)::numeric, 6) END;
+              END IF;
+              -- With PostGIS, nearby search runs on a GiST-indexed geography point derived from the columns.
+              -- Simulated coordinates are placeholders, not positions, so they get no point.
+              IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'postgis') THEN
+                IF EXISTS (
+                  SELECT 1 FROM information_schema.columns
+                  WHERE table_name = 'organisations' AND column_name = 'geog'
+                    AND generation_expression NOT LIKE '%simulated%'
+                ) THEN
+                  ALTER TABLE organisations DROP COLUMN geog;
+                END IF;
+                IF NOT EXISTS (
+                  SELECT 1 FROM information_schema.columns
+                  WHERE table_name = 'organisations' AND column_name = 'geog'
+                ) THEN
+                  ALTER TABLE organisations
+                    ADD COLUMN geog geography(Point, 4326) GENERATED ALWAYS AS (
+                      CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL AND geo_precision IS DISTINCT FROM 'simulated'
+                        THEN ST_SetSRID(ST_MakePoint(longitude::float8, latitude::float8), 4326)::geography
+                      END
+                    ) STORED;
+                END IF;
+                CREATE INDEX IF NOT EXISTS idx_organisations_geog ON organisations USING GIST (geog);
+              END IF;
+            END $$;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            DO $$
+            BEGIN
+              BEGIN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+              EXCEPTION
+                WHEN OTHERS THEN
+                  NULL;
+              END;
+              -- Trigram indexes back /search; skipped when the server has no contrib modules.
+              IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS idx_pets_name_trgm ON pets USING GIN (name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_pets_breed_trgm ON pets USING GIN (breed gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_pets_microchip_trgm ON pets USING GIN (microchip_number gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm ON users USING GIN (full_name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_organisations_name_trgm ON organisations USING GIN (name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_organisations_suburb_trgm ON organisations USING GIN (suburb gin_trgm_ops);
+              END IF;
+            END $$;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS owner_activity_summary (
+                owner_id UUID PRIMARY KEY REFERENCES owners(owner_id) ON DELETE CASCADE,
+                visit_count_total INTEGER NOT NULL DEFAULT 0,
+                latest_visit_at TIMESTAMP,
+                latest_visit_reason VARCHAR,
+                latest_visit_notes VARCHAR,
+                latest_clinic_id UUID REFERENCES organisations(organisation_id) ON DELETE SET NULL,
+                latest_clinic_name VARCHAR,
+                latest_note_text TEXT,
+                latest_note_at TIMESTAMP,
+                open_concern_count INTEGER NOT NULL DEFAULT 0,
+                refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    )
+    # Rolling 12-month visit counts are computed at read time; a stored count went stale as visits aged out.
+    conn.execute(text("ALTER TABLE owner_activity_summary DROP COLUMN IF EXISTS visits_last_12m;"))
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_owner_activity_open_concerns
+            ON owner_activity_summary (open_concern_count)
+            WHERE open_concern_count > 0;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS visit_daily_rollup (
+                organisation_id UUID REFERENCES organisations(organisation_id) ON DELETE SET NULL,
+                visit_day DATE NOT NULL,
+                total_visits INTEGER NOT NULL DEFAULT 0,
+                cancelled_or_missed INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_visit_daily_rollup_day_org ON visit_daily_rollup (visit_day, organisation_id);"))
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS visit_rollup_months (
+                month_start DATE PRIMARY KEY,
+                refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            DO $$
+            BEGIN
+              -- One-off backfill when the column first appears; afterwards status is written explicitly.
+              IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'vet_visits' AND column_name = 'status'
+              ) THEN
+                ALTER TABLE vet_visits ADD COLUMN status VARCHAR NOT NULL DEFAULT 'SCHEDULED';
+                UPDATE vet_visits
+                SET status = CASE
+                  WHEN LOWER(COALESCE(reason, '')) LIKE '%cancel%' THEN 'CANCELLED'
+                  WHEN LOWER(COALESCE(reason, '')) ~ '(no[ -]show|did not attend)' THEN 'NO_SHOW'
+                  WHEN visit_datetime < NOW() THEN 'COMPLETED'
+                  ELSE 'SCHEDULED'
+                END;
+              END IF;
+              IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ck_vet_visits_status') THEN
+                ALTER TABLE vet_visits
+                ADD CONSTRAINT ck_vet_visits_status
+                CHECK (status IN ('SCHEDULED', 'COMPLETED', 'CANCELLED', 'NO_SHOW'));
+              END IF;
+            END $$;
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_vet_visits_org_status_datetime
+            ON vet_visits (organisation_id, status, visit_datetime);
+            """
+        )
+    )
+    # Clinic hours now come from the linked practice's practice_opening_hours; nothing ever wrote this table.
+    conn.execute(text("DROP TABLE IF EXISTS clinic_opening_hours;"))
+    # Weekly practice hours parsed from opening_hours_text (weekday 0 = Monday); see app.services.opening_hours.
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS practice_opening_hours (
+                practice_id UUID NOT NULL REFERENCES vet_practices(id) ON DELETE CASCADE,
+                weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+                open_minute SMALLINT NOT NULL CHECK (open_minute BETWEEN 0 AND 1440),
+                close_minute SMALLINT NOT NULL CHECK (close_minute BETWEEN 0 AND 1440),
+                PRIMARY KEY (practice_id, weekday, open_minute),
+                CHECK (close_minute > open_minute)
+            );
+            """
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_practice_opening_hours_weekday ON practice_opening_hours (weekday, open_minute, close_minute);"))
+    # 'inferred' rows are guesses from listings that only give a closing time; open-now checks skip them.
+    conn.execute(
+        text(
+            """
+            ALTER TABLE practice_opening_hours
+            ADD COLUMN IF NOT EXISTS precision VARCHAR NOT NULL DEFAULT 'parsed' CHECK (precision IN ('parsed', 'inferred'));
+            """
+        )
+    )
+    conn.execute(text("ALTER TABLE vet_practices ADD COLUMN IF NOT EXISTS opening_hours_hash VARCHAR;"))
+    # Per-clinic, per-day staffing by role; months are built on first read and kept current by leave writes.
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS clinic_staffing_days (
+                organisation_id UUID NOT NULL REFERENCES organisations(organisation_id) ON DELETE CASCADE,
+                staffing_day DATE NOT NULL,
+                member_role VARCHAR NOT NULL,
+                rostered INTEGER NOT NULL DEFAULT 0,
+                on_leave INTEGER NOT NULL DEFAULT 0,
+                pending_leave INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (organisation_id, staffing_day, member_role)
+            );
+            """
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clinic_staffing_days_day_org ON clinic_staffing_days (staffing_day, organisation_id);"))
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS clinic_staffing_months (
+                month_start DATE PRIMARY KEY,
+                refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    )
+    # Visit events awaiting push to the vet gateway; written in the same transaction as the visit.
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS visit_outbox (
+                outbox_id BIGSERIAL PRIMARY KEY,
+                event_type VARCHAR NOT NULL,
+                visit_id UUID NOT NULL,
+                idempotency_key VARCHAR NOT NULL UNIQUE,
+                payload JSONB NOT NULL,
+                status VARCHAR NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'SENT', 'FAILED')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                last_error TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                sent_at TIMESTAMP
+            );
+            """
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_visit_outbox_pending_due ON visit_outbox (next_attempt_at, outbox_id) WHERE status = 'PENDING';"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_visit_outbox_pending_visit ON visit_outbox (visit_id, outbox_id) WHERE status = 'PENDING';"))
+
+# Hot-path foreign key / time-column indexes. CONCURRENTLY cannot run inside a transaction,
+# so these build on an autocommit connection without blocking writes on a live database.
+HOT_PATH_INDEXES = {
+    "idx_vet_visits_pet_datetime": "vet_visits (pet_id, visit_datetime)",
+    "idx_vet_visits_org_datetime": "vet_visits (organisation_id, visit_datetime)",
+    "idx_vet_visits_vet_datetime": "vet_visits (vet_user_id, visit_datetime)",
+    "idx_vet_visits_datetime": "vet_visits (visit_datetime)",
+    "idx_weights_pet_measured": "weights (pet_id, measured_at)",
+    "idx_weights_visit": "weights (visit_id)",
+    "idx_vaccinations_pet_administered": "vaccinations (pet_id, administered_at)",
+    "idx_vaccinations_visit": "vaccinations (visit_id)",
+    "idx_owner_pets_pet": "owner_pets (pet_id)",
+    "idx_organisation_members_user": "organisation_members (user_id)",
+    "idx_medications_pet_start": "medications (pet_id, start_date)",
+}
 
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    for index_name, index_target in HOT_PATH_INDEXES.items():
+        # An interrupted concurrent build leaves an INVALID index that IF NOT EXISTS would skip; rebuild it.
+        invalid = conn.execute(
+            text(
+                """
+                SELECT 1
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = :name AND NOT i.indisvalid
+                """
+            ),
+            {"name": index_name},
+        ).scalar()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {index_target}"))
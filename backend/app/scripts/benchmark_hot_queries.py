@@ -0,0 +1,202 @@
+"""Module: benchmark_hot_queries."""
+
+import argparse
+import sys
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.owner_activity import REFRESH_SQL
+from app.services.owner_timeline import TIMELINE_SOURCES, timeline_sql
+
+DEFAULT_SCALE = 20
+# Seq scans are only a failure on tables at least this big; tiny lookup tables are cheaper to scan.
+LARGE_TABLE_ROWS = 10_000
+
+# Per-table column overrides used when cloning seed rows; every cloned id is derived from the source id + copy number.
+_CLONE_PLAN = [
+    ("pets", {"pet_id": "md5(src.pet_id::text || gs.i)::uuid", "microchip_number": "NULL", "photo_data": "NULL"}),
+    ("owner_pets", {"pet_id": "md5(src.pet_id::text || gs.i)::uuid"}),
+    ("vet_visits", {"visit_id": "md5(src.visit_id::text || gs.i)::uuid", "pet_id": "md5(src.pet_id::text || gs.i)::uuid"}),
+    (
+        "weights",
+        {
+            "weight_id": "md5(src.weight_id::text || gs.i)::uuid",
+            "pet_id": "md5(src.pet_id::text || gs.i)::uuid",
+            "visit_id": "md5(src.visit_id::text || gs.i)::uuid",
+        },
+    ),
+    (
+        "vaccinations",
+        {
+            "vaccination_id": "md5(src.vaccination_id::text || gs.i)::uuid",
+            "pet_id": "md5(src.pet_id::text || gs.i)::uuid",
+            "visit_id": "md5(src.visit_id::text || gs.i)::uuid",
+        },
+    ),
+    ("medications", {"medication_id": "md5(src.medication_id::text || gs.i)::uuid", "pet_id": "md5(src.pet_id::text || gs.i)::uuid"}),
+]
+
+# Hot queries: the shapes routes and analytics run per request, keyed by the index each relies on.
+HOT_QUERIES: list[tuple[str, str]] = [
+    (
+        "pet_visit_history",
+        "SELECT visit_id, visit_datetime, reason FROM vet_visits WHERE pet_id = :pet_id ORDER BY visit_datetime DESC LIMIT 50",
+    ),
+    (
+        "clinic_visits_30d",
+        "SELECT COUNT(*) FROM vet_visits WHERE organisation_id = :organisation_id AND visit_datetime >= :since",
+    ),
+    ("latest_pet_weight", "SELECT weight_kg FROM weights WHERE pet_id = :pet_id ORDER BY measured_at DESC LIMIT 1"),
+    ("visit_weights", "SELECT weight_id, weight_kg FROM weights WHERE visit_id = :visit_id"),
+    (
+        "pet_vaccinations",
+        "SELECT vaccine_type, administered_at FROM vaccinations WHERE pet_id = :pet_id ORDER BY administered_at DESC",
+    ),
+    ("visit_vaccinations", "SELECT vaccination_id FROM vaccinations WHERE visit_id = :visit_id"),
+    ("pet_owners", "SELECT owner_id, start_date, end_date FROM owner_pets WHERE pet_id = :pet_id"),
+    ("user_clinics", "SELECT organisation_id, member_role FROM organisation_members WHERE user_id = :user_id"),
+    ("pet_medications", "SELECT name, start_date FROM medications WHERE pet_id = :pet_id ORDER BY start_date DESC"),
+    ("owner_timeline", timeline_sql(list(TIMELINE_SOURCES))),
+    ("owner_activity_refresh", REFRESH_SQL),
+]
+
+
+def scale_dataset(conn, scale: int) -> dict[str, int]:
+    # Adds (scale - 1) copies of every pet and its care history; callers roll the transaction back afterwards.
+    copies = max(0, scale - 1)
+    inserted: dict[str, int] = {}
+    if copies:
+        for table, overrides in _CLONE_PLAN:
+            columns = conn.execute(
+                text(
+                    """
+                    SELECT column_name
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = :table
+                    ORDER BY ordinal_position
+                    """
+                ),
+                {"table": table},
+            ).scalars().all()
+            select_list = ", ".join(overrides.get(col, f"src.{col}") for col in columns)
+            result = conn.execute(
+                text(
+                    f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    SELECT {select_list}
+                    FROM {table} src
+                    CROSS JOIN generate_series(1, :copies) AS gs(i)
+                    """
+                ),
+                {"copies": copies},
+            )
+            inserted[table] = result.rowcount
+    # Fresh statistics so the planner sees the scaled row counts.
+    conn.execute(text("ANALYZE"))
+    return inserted
+
+
+def sample_params(conn) -> dict:
+    pet_id = conn.execute(
+        text("SELECT pet_id FROM vet_visits GROUP BY pet_id ORDER BY COUNT(*) DESC, pet_id LIMIT 1")
+    ).scalar()
+    owner_id = conn.execute(text("SELECT owner_id FROM owner_pets WHERE pet_id = :pet_id LIMIT 1"), {"pet_id": pet_id}).scalar()
+    return {
+        "pet_id": pet_id,
+        "organisation_id": conn.execute(
+            text("SELECT organisation_id FROM vet_visits WHERE organisation_id IS NOT NULL GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1")
+        ).scalar(),
+        "visit_id": conn.execute(text("SELECT visit_id FROM weights WHERE visit_id IS NOT NULL LIMIT 1")).scalar(),
+        "user_id": conn.execute(text("SELECT user_id FROM organisation_members LIMIT 1")).scalar(),
+        "owner_id": owner_id,
+        "owner_ids": [owner_id],
+        "since": datetime.now(UTC).replace(tzinfo=None) - timedelta(days=30),
+        "year_ago": datetime.now(UTC).replace(tzinfo=None) - timedelta(days=365),
+        "refreshed_at": datetime.now(UTC).replace(tzinfo=None),
+        "fetch": 51,
+    }
+
+
+def large_tables(conn, min_rows: int = LARGE_TABLE_ROWS) -> set[str]:
+    return set(
+        conn.execute(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public' AND c.relkind = 'r' AND c.reltuples >= :min_rows
+                """
+            ),
+            {"min_rows": min_rows},
+        ).scalars().all()
+    )
+
+
+def iter_plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def explain(conn, sql: str, params: dict, analyze: bool = True) -> dict:
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    return conn.execute(text(f"EXPLAIN ({options}) {sql}"), params).scalar()[0]
+
+
+def run_benchmark(scale: int = DEFAULT_SCALE, min_rows: int = LARGE_TABLE_ROWS) -> list[dict]:
+    session = SessionLocal()
+    conn = session.connection()
+    try:
+        inserted = scale_dataset(conn, scale)
+        if inserted:
+            print("Scaled dataset (rolled back afterwards): " + ", ".join(f"{t}+{n}" for t, n in inserted.items()))
+        params = sample_params(conn)
+        big = large_tables(conn, min_rows)
+
+        results = []
+        for name, sql in HOT_QUERIES:
+            plan = explain(conn, sql, params)
+            seq_scans = sorted(
+                {
+                    node["Relation Name"]
+                    for node in iter_plan_nodes(plan["Plan"])
+                    if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in big
+                }
+            )
+            results.append(
+                {
+                    "name": name,
+                    "execution_ms": round(plan["Execution Time"], 3),
+                    "total_cost": plan["Plan"]["Total Cost"],
+                    "seq_scans": seq_scans,
+                }
+            )
+        return results
+    finally:
+        session.rollback()
+        # pg_class.reltuples is updated in place and survives the rollback; re-analyze so live plans see real sizes.
+        session.execute(text(f"ANALYZE {', '.join(table for table, _ in _CLONE_PLAN)}"))
+        session.commit()
+        session.close()
+
+
+if __name__ == "__main__":
+    # docker exec -it petcheck_backend python -m app.scripts.benchmark_hot_queries --scale 20
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE hot queries on a scaled copy of the seed data.")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="Multiply pets and their care history (1 = as seeded)")
+    parser.add_argument("--min-rows", type=int, default=LARGE_TABLE_ROWS, help="Row count above which a seq scan fails")
+    args = parser.parse_args()
+
+    results = run_benchmark(scale=args.scale, min_rows=args.min_rows)
+    print(f"{'query':<24} {'exec_ms':>9} {'cost':>10}  seq scans on large tables")
+    for r in results:
+        print(f"{r['name']:<24} {r['execution_ms']:>9} {r['total_cost']:>10.1f}  {', '.join(r['seq_scans']) or '-'}")
+
+    failures = [r["name"] for r in results if r["seq_scans"]]
+    if failures:
+        print(f"FAIL: sequential scans on large tables in {', '.join(failures)}")
+        sys.exit(1)
+    print("OK: no sequential scans on large tables")
@@ -0,0 +1,53 @@
+"""Module: benchmark_owner_list."""
+
+import statistics
+import time
+
+from sqlalchemy import event
+
+from app.api.v1.routes.owners import list_owners
+from app.db.session import SessionLocal, engine
+
+PAGE_SIZES = [10, 50, 200, 500]
+RUNS_PER_SIZE = 5
+
+
+def benchmark(session, page_size: int, runs: int = RUNS_PER_SIZE) -> dict:
+    statements = 0
+
+    def _count(*_args, **_kwargs):
+        nonlocal statements
+        statements += 1
+
+    # Count round trips so a regression back to per-owner queries is obvious.
+    event.listen(engine, "before_cursor_execute", _count)
+    timings: list[float] = []
+    rows = 0
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            rows = len(list_owners(limit=page_size, offset=0, db=session))
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    return {
+        "page_size": page_size,
+        "rows": rows,
+        "queries_per_call": statements / runs,
+        "median_ms": round(statistics.median(timings), 2),
+        "ms_per_row": round(statistics.median(timings) / max(rows, 1), 3),
+    }
+
+
+if __name__ == "__main__":
+    # docker exec -it petcheck_backend python -m app.scripts.benchmark_owner_list
+    session = SessionLocal()
+    try:
+        list_owners(limit=10, offset=0, db=session)  # warm connection + plan cache
+        print(f"{'page_size':>9} {'rows':>5} {'queries':>8} {'median_ms':>10} {'ms/row':>7}")
+        for size in PAGE_SIZES:
+            r = benchmark(session, size)
+            print(f"{r['page_size']:>9} {r['rows']:>5} {r['queries_per_call']:>8.0f} {r['median_ms']:>10} {r['ms_per_row']:>7}")
+    finally:
+        session.close()
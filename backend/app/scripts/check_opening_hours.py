@@ -0,0 +1,55 @@
+"""Module: check_opening_hours."""
+
+import sys
+
+from app.services.opening_hours import DAY_NAMES, parse_opening_hours
+
+WEEKDAY_9_TO_5 = [(9 * 60, 17 * 60)]
+
+# Listing text -> (precision, {day name: [(open_minute, close_minute)]}); days left out are closed.
+PARSER_CHECKS: list[tuple[str, tuple[str, dict[str, list[tuple[int, int]]]] | None]] = [
+    # Minutes without am/pm still read the earlier closing time as pm.
+    ("Mon-Fri 9-5:30", ("parsed", {d: [(9 * 60, 17 * 60 + 30)] for d in DAY_NAMES[:5]})),
+    # Each day group takes the times that follow it.
+    (
+        "Mon-Fri 7:30am-6:30pm Sat 8am-12pm",
+        ("parsed", {**{d: [(7 * 60 + 30, 18 * 60 + 30)] for d in DAY_NAMES[:5]}, "sat": [(8 * 60, 12 * 60)]}),
+    ),
+    ("9am-5pm Mon-Fri", ("parsed", {d: WEEKDAY_9_TO_5 for d in DAY_NAMES[:5]})),
+    ("Mon, Wed, Fri 9am-5pm", ("parsed", {d: WEEKDAY_9_TO_5 for d in ("mon", "wed", "fri")})),
+    ("Open 7 days, 10 - 4", ("parsed", {d: [(10 * 60, 16 * 60)] for d in DAY_NAMES})),
+    ("Mon-Fri 8-12, 1-5pm", ("parsed", {d: [(8 * 60, 12 * 60), (13 * 60, 17 * 60)] for d in DAY_NAMES[:5]})),
+    ("Fri 22:00-2:00", ("parsed", {"fri": [(22 * 60, 24 * 60)], "sat": [(0, 2 * 60)]})),
+    (
+        "Mon-Fri 8am-6pm; Sat 9am-1pm; Sun closed",
+        ("parsed", {**{d: [(8 * 60, 18 * 60)] for d in DAY_NAMES[:5]}, "sat": [(9 * 60, 13 * 60)]}),
+    ),
+    ("24/7", ("parsed", {d: [(0, 24 * 60)] for d in DAY_NAMES})),
+    ("Open until 6pm (snapshot)", ("inferred", {d: [(8 * 60, 18 * 60)] for d in DAY_NAMES[:5]})),
+    ("Call for hours", None),
+]
+
+
+def run_checks() -> list[str]:
+    failures = []
+    for listing, expected in PARSER_CHECKS:
+        hours = parse_opening_hours(listing)
+        actual = None
+        if hours is not None:
+            actual = (
+                hours.precision,
+                {DAY_NAMES[day]: ranges for day, ranges in sorted(hours.intervals.items()) if ranges},
+            )
+        if actual != expected:
+            failures.append(f"{listing!r}: expected {expected}, got {actual}")
+    return failures
+
+
+if __name__ == "__main__":
+    # docker exec -it petcheck_backend python -m app.scripts.check_opening_hours
+    failures = run_checks()
+    for line in failures:
+        print(f"FAIL {line}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(PARSER_CHECKS)} opening-hours listings parsed as expected")
@@ -0,0 +1,240 @@
+"""Module: check_query_plans."""
+
+import argparse
+import json
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.api.v1.routes.deps import get_db
+from app.db.session import engine
+from app.main import app
+from app.scripts.benchmark_hot_queries import (
+    DEFAULT_SCALE,
+    LARGE_TABLE_ROWS,
+    iter_plan_nodes,
+    large_tables,
+    scale_dataset,
+)
+
+SNAPSHOT_PATH = Path(__file__).resolve().parent / "query_plan_snapshots.json"
+# Inner side of a nested loop executed this many times is treated as a blowup.
+NESTED_LOOP_MAX_LOOPS = 5_000
+# Estimated cost growth beyond this factor is reported (not failed) so intentional changes can be re-snapshotted.
+COST_WARN_FACTOR = 2.0
+
+# Read-only endpoints whose SQL is checked; placeholders are filled from sample_ids().
+HOT_ROUTES: list[tuple[str, str]] = [
+    ("analytics.kpis", "/api/v1/analytics/kpis"),
+    ("analytics.care_events_by_month", "/api/v1/analytics/care-events-by-month"),
+    ("analytics.species_breakdown", "/api/v1/analytics/species-breakdown"),
+    ("analytics.vaccinations_by_type", "/api/v1/analytics/vaccinations-by-type"),
+    ("analytics.top_organisations", "/api/v1/analytics/top-organisations-by-visits"),
+    ("analytics.visits_by_reason", "/api/v1/analytics/visits-by-reason"),
+    ("analytics.filter_options", "/api/v1/analytics/filter-options"),
+    ("dashboard.kpis_admin", "/api/v1/dashboard/kpis?role=ADMIN"),
+    ("dashboard.kpis_vet", "/api/v1/dashboard/kpis?role=VET&user_id={vet_user_id}"),
+    ("dashboard.kpis_owner", "/api/v1/dashboard/kpis?role=OWNER&user_id={owner_user_id}"),
+    ("dashboard.reminders_vet", "/api/v1/dashboard/reminders?role=VET&user_id={vet_user_id}"),
+    ("dashboard.reminders_owner", "/api/v1/dashboard/reminders?role=OWNER&user_id={owner_user_id}"),
+    ("owners.list", "/api/v1/owners?limit=200"),
+    ("owners.notes", "/api/v1/owners/{owner_id}/notes"),
+    ("owners.concerns", "/api/v1/owners/{owner_id}/concerns?status=OPEN"),
+    ("owners.timeline", "/api/v1/owners/{owner_id}/timeline"),
+    ("visits.list", "/api/v1/visits?organisation_id={organisation_id}"),
+    ("visits.calendar_current_month", "/api/v1/visits/calendar-summary?month={month}&organisation_id={organisation_id}"),
+    ("clinics.list", "/api/v1/clinics"),
+    ("practices.search", "/api/v1/practices?service_types=Small%20animal&min_rating=3"),
+    ("practices.open_at", "/api/v1/practices/open?at=2026-10-19T17:45:00"),
+    ("staff.dashboard", "/api/v1/staff?user_id={vet_user_id}"),
+    ("staff.on_leave", "/api/v1/staff/leave?date=2026-10-19"),
+    # An old month, so every run takes the same build-then-read path (the build rolls back with the run).
+    ("staff.capacity", "/api/v1/staff/capacity?from=2020-01-01&to=2020-01-31"),
+    ("eligibility.leaderboard", "/api/v1/eligibility/owners?limit=50"),
+]
+
+_WHOLE_TABLE = "aggregates over every row, so a sequential scan is the cheapest plan"
+_VET_CLINIC_FILTER = "filters organisation_id::text = ANY(...), which no index serves; predates this check"
+
+# The only large-table seq scans the check accepts, per statement, each with the reason it is the right plan (or
+# why it is tolerated). Anything else fails, whatever the snapshot holds; the snapshot only tracks plan shape/cost.
+ACCEPTED_SEQ_SCANS: dict[str, tuple[set[str], str]] = {
+    "analytics.care_events_by_month#0": ({"vaccinations", "vet_visits", "weights"}, _WHOLE_TABLE),
+    "analytics.filter_options#1": ({"vaccinations", "vet_visits", "weights"}, _WHOLE_TABLE),
+    "analytics.filter_options#2": ({"vaccinations"}, _WHOLE_TABLE),
+    "analytics.filter_options#3": ({"vet_visits"}, _WHOLE_TABLE),
+    "analytics.kpis#0": ({"pets", "vaccinations", "vet_visits", "weights"}, _WHOLE_TABLE),
+    "analytics.species_breakdown#0": ({"pets"}, _WHOLE_TABLE),
+    "analytics.top_organisations#0": ({"vet_visits"}, _WHOLE_TABLE),
+    "analytics.vaccinations_by_type#0": ({"vaccinations"}, _WHOLE_TABLE),
+    "analytics.visits_by_reason#0": ({"vet_visits"}, _WHOLE_TABLE),
+    "dashboard.kpis_admin#0": ({"pets", "vet_visits"}, "system-wide counts for the admin dashboard"),
+    "dashboard.kpis_admin#1": ({"vet_visits"}, "visit counts for every clinic"),
+    "dashboard.kpis_vet#1": ({"medications", "vet_visits"}, _VET_CLINIC_FILTER),
+    "dashboard.kpis_vet#2": ({"medications", "vet_visits"}, _VET_CLINIC_FILTER),
+    "eligibility.leaderboard#4": (
+        {"owner_pets", "pets"}, "loads the pets of every scored owner (a quarter of the benchmark owners) in one pass"
+    ),
+    "eligibility.leaderboard#5": ({"weights"}, "latest weight for every scored owner's pets in one pass"),
+    "eligibility.leaderboard#7": ({"weights"}, "latest weight for every scored owner's pets in one pass"),
+    "eligibility.leaderboard#8": ({"vet_visits"}, "latest visit for every scored owner's pets in one pass"),
+    "owners.list#0": (
+        {"owner_pets", "pets", "vet_visits"},
+        "the benchmark page (limit=200) covers a large share of all owners, so counting their new pets and 12-month "
+        "visits reads most of owner_pets, pets and vet_visits; per-owner probes instead exceed NESTED_LOOP_MAX_LOOPS",
+    ),
+}
+
+
+def sample_ids(conn) -> dict[str, str]:
+    row = conn.execute(
+        text(
+            """
+            SELECT
+              (SELECT op.owner_id::text FROM owner_pets op JOIN vet_visits vv ON vv.pet_id = op.pet_id
+                GROUP BY op.owner_id ORDER BY COUNT(*) DESC, op.owner_id LIMIT 1) AS owner_id,
+              (SELECT organisation_id::text FROM vet_visits WHERE organisation_id IS NOT NULL
+                GROUP BY organisation_id ORDER BY COUNT(*) DESC, organisation_id LIMIT 1) AS organisation_id,
+              (SELECT om.user_id::text FROM organisation_members om JOIN users u ON u.user_id = om.user_id
+                WHERE u.role = 'VET' ORDER BY om.user_id LIMIT 1) AS vet_user_id
+            """
+        )
+    ).mappings().one()
+    ids = dict(row)
+    ids["owner_user_id"] = conn.execute(
+        text("SELECT user_id::text FROM owners WHERE owner_id = CAST(:owner_id AS uuid)"), {"owner_id": ids["owner_id"]}
+    ).scalar()
+    ids["month"] = datetime.now(UTC).strftime("%Y-%m")
+    return ids
+
+
+def capture_route_sql(client: TestClient, conn, url: str) -> list[tuple[str, object]]:
+    captured: list[tuple[str, object]] = []
+
+    def _record(_conn, _cursor, statement, parameters, _context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", _record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(conn, "before_cursor_execute", _record)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} returned {response.status_code}: {response.text[:200]}")
+
+    unique: dict[str, object] = {}
+    for statement, parameters in captured:
+        unique.setdefault(statement, parameters)
+    return list(unique.items())
+
+
+def summarize_plan(plan: dict, big: set[str]) -> dict:
+    nodes = list(iter_plan_nodes(plan["Plan"]))
+    nested_loop_blowups = [
+        node["Plans"][1].get("Relation Name") or node["Plans"][1]["Node Type"]
+        for node in nodes
+        if node["Node Type"] == "Nested Loop"
+        and len(node.get("Plans", [])) == 2
+        and node["Plans"][1].get("Actual Loops", 0) >= NESTED_LOOP_MAX_LOOPS
+    ]
+    return {
+        "node_types": [node["Node Type"] for node in nodes],
+        "total_cost": round(plan["Plan"]["Total Cost"], 1),
+        "seq_scans": sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in big}),
+        "nested_loop_blowups": sorted(set(nested_loop_blowups)),
+        "sort_spills": sorted({n.get("Sort Method", "") for n in nodes if n.get("Sort Space Type") == "Disk"}),
+    }
+
+
+def collect_plans(scale: int, min_rows: int) -> dict[str, dict]:
+    conn = engine.connect()
+    outer = conn.begin()
+    # Route commits only release a savepoint, so the scaled data and any writes roll back at the end.
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    app.dependency_overrides[get_db] = lambda: session
+    try:
+        scale_dataset(conn, scale)
+        big = large_tables(conn, min_rows)
+        ids = sample_ids(conn)
+        client = TestClient(app)
+
+        plans: dict[str, dict] = {}
+        for name, url_template in HOT_ROUTES:
+            for i, (statement, parameters) in enumerate(capture_route_sql(client, conn, url_template.format(**ids))):
+                plan = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters).scalar()[0]
+                plans[f"{name}#{i}"] = summarize_plan(plan, big)
+        return plans
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        session.close()
+        outer.rollback()
+        # reltuples is updated in place by ANALYZE and survives the rollback.
+        conn.execute(text("ANALYZE pets, owner_pets, vet_visits, weights, vaccinations, medications"))
+        conn.commit()
+        conn.close()
+
+
+def compare(current: dict[str, dict], snapshot: dict[str, dict]) -> tuple[list[str], list[str]]:
+    failures: list[str] = []
+    warnings: list[str] = []
+    for key, plan in current.items():
+        base = snapshot.get(key, {})
+        unaccepted = sorted(set(plan["seq_scans"]) - ACCEPTED_SEQ_SCANS.get(key, (set(), ""))[0])
+        if unaccepted:
+            failures.append(f"{key}: seq scan on {', '.join(unaccepted)}")
+        for field, label in (
+            ("nested_loop_blowups", "nested-loop blowup into"),
+            ("sort_spills", "sort spilled to disk"),
+        ):
+            introduced = sorted(set(plan[field]) - set(base.get(field, [])))
+            if introduced:
+                failures.append(f"{key}: {label} {', '.join(introduced)}")
+        if not base:
+            warnings.append(f"{key}: no snapshot yet")
+            continue
+        if plan["node_types"] != base["node_types"]:
+            warnings.append(f"{key}: plan shape changed")
+        if base["total_cost"] and plan["total_cost"] > base["total_cost"] * COST_WARN_FACTOR:
+            warnings.append(f"{key}: estimated cost {base['total_cost']} -> {plan['total_cost']}")
+    return failures, warnings
+
+
+if __name__ == "__main__":
+    # docker exec -it petcheck_backend python -m app.scripts.check_query_plans [--update]
+    parser = argparse.ArgumentParser(description="Query-plan regression check for the hand-written route SQL.")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE)
+    parser.add_argument("--min-rows", type=int, default=LARGE_TABLE_ROWS)
+    parser.add_argument(
+        "--update",
+        nargs="+",
+        metavar="ROUTE",
+        help="Accept the current plans of these routes (e.g. owners.timeline) into the snapshot; other entries are kept",
+    )
+    args = parser.parse_args()
+
+    current = collect_plans(args.scale, args.min_rows)
+    snapshot = json.loads(SNAPSHOT_PATH.read_text()) if SNAPSHOT_PATH.exists() else {}
+
+    if args.update:
+        unknown = sorted(set(args.update) - {name for name, _ in HOT_ROUTES})
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(unknown)}")
+        refreshed = {key: plan for key, plan in current.items() if key.split("#")[0] in args.update}
+        snapshot = {key: plan for key, plan in snapshot.items() if key.split("#")[0] not in args.update}
+        SNAPSHOT_PATH.write_text(json.dumps({**snapshot, **refreshed}, indent=2, sort_keys=True) + "\n")
+        print(f"Refreshed {len(refreshed)} plan snapshots for {', '.join(args.update)} in {SNAPSHOT_PATH}")
+        sys.exit(0)
+
+    failures, warnings = compare(current, snapshot)
+    for line in warnings:
+        print(f"WARN {line}")
+    for line in failures:
+        print(f"FAIL {line}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(current)} statements checked, no new seq scans, nested-loop blowups or sort spills")
@@ -0,0 +1,20 @@
+"""Module: geocode_clinics."""
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.clinic_geocoding import geocode_clinics
+
+if __name__ == "__main__":
+    # Incremental pass for new or re-addressed clinics, e.g. after an import:
+    # docker exec -it petcheck_backend python -m app.scripts.geocode_clinics
+    parser = argparse.ArgumentParser(description="Resolve and persist clinic coordinates with their precision.")
+    parser.add_argument("--full", action="store_true", help="Re-resolve every clinic without source coordinates")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        counts = geocode_clinics(session, full=args.full)
+    finally:
+        session.close()
+    print("Geocoded clinics: " + ", ".join(f"{precision}={n}" for precision, n in counts.items()))
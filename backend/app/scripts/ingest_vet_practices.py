@@ -0,0 +1,30 @@
+"""Module: ingest_vet_practices."""
+
+import argparse
+from pathlib import Path
+
+from app.db.session import SessionLocal
+from app.services.practice_ingest import PRACTICES_CSV_PATH, STAFF_SNAPSHOT_CSV_PATH, ingest_practice_snapshots
+
+if __name__ == "__main__":
+    # Refresh practices, clinics and practice staff from updated snapshots without a reseed:
+    # docker exec -it petcheck_backend python -m app.scripts.ingest_vet_practices
+    parser = argparse.ArgumentParser(description="Upsert the vet practice and practice staff CSV snapshots.")
+    parser.add_argument("--practices-csv", type=Path, default=PRACTICES_CSV_PATH)
+    parser.add_argument("--staff-csv", type=Path, default=STAFF_SNAPSHOT_CSV_PATH)
+    parser.add_argument("--skip-staff", action="store_true", help="Only ingest the practices CSV")
+    parser.add_argument("--dry-run", action="store_true", help="Report counts, then roll everything back")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        report = ingest_practice_snapshots(
+            session,
+            practices_csv=args.practices_csv,
+            staff_csv=None if args.skip_staff else args.staff_csv,
+            dry_run=args.dry_run,
+        )
+    finally:
+        session.close()
+    for section, counts in report.items():
+        print(f"{section}: " + ", ".join(f"{key}={n}" for key, n in counts.items()))
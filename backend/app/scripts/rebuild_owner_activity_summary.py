@@ -0,0 +1,47 @@
+"""Module: rebuild_owner_activity_summary."""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.owner_activity import refresh_owner_activity
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_WORKERS = 4
+
+
+def _refresh_chunk(owner_ids: list) -> int:
+    # Each worker owns its session so chunks commit independently and in parallel.
+    session = SessionLocal()
+    try:
+        n = refresh_owner_activity(session, owner_ids)
+        session.commit()
+        return n
+    finally:
+        session.close()
+
+
+def rebuild_owner_activity_summary(chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = DEFAULT_WORKERS) -> int:
+    session = SessionLocal()
+    try:
+        owner_ids = session.execute(text("SELECT owner_id FROM owners ORDER BY owner_id")).scalars().all()
+    finally:
+        session.close()
+
+    chunks = [owner_ids[i : i + chunk_size] for i in range(0, len(owner_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return sum(pool.map(_refresh_chunk, chunks))
+
+
+if __name__ == "__main__":
+    # Full rebuild, e.g. after a bulk import that bypassed the write paths:
+    # docker exec -it petcheck_backend python -m app.scripts.rebuild_owner_activity_summary
+    parser = argparse.ArgumentParser(description="Rebuild owner_activity_summary in parallel chunks.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    refreshed = rebuild_owner_activity_summary(chunk_size=args.chunk_size, workers=args.workers)
+    print(f"Refreshed owner_activity_summary rows: {refreshed}")
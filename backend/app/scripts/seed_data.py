@@ -6,7 +6,7 @@ import string
 import csv
 import uuid
 from pathlib import Path
-from datetime import datetime, UTC, timedelta
+from datetime import date, datetime, UTC, timedelta
 from sqlalchemy import select, text
 
 from app.db.session import SessionLocal
@@ -19,7 +19,7 @@ from app.db.models.owner_pet import OwnerPet
 
 from app.db.models.organisation import Organisation
 from app.db.models.organisation_member import OrganisationMember
-from app.db.models.vet_visit import VetVisit
+from app.db.models.vet_visit import MISSED_VISIT_STATUSES, VetVisit
 from app.db.models.weight import Weight
 from app.db.models.vaccination import Vaccination
 from app.db.models.medication import Medication
@@ -29,6 +29,16 @@ from app.db.models.staff_leave import StaffLeave
 from app.db.models.vet_practice import VetPractice
 from app.db.models.practice_staff import PracticeStaff
 from app.db.models.practice_staff_source import PracticeStaffSource
+from app.scripts.rebuild_owner_activity_summary import rebuild_owner_activity_summary
+from app.services.clinic_geocoding import geocode_clinics
+from app.services.opening_hours import sync_practice_opening_hours
+from app.services.practice_ingest import (
+    PRACTICES_CSV_PATH,
+    STAFF_SNAPSHOT_CSV_PATH,
+    parse_practice_row,
+    parse_staff_row,
+    practice_lookup_key,
+)
 
 fake = Faker()
 random.seed(42)
@@ -251,8 +261,17 @@ def ensure_clinic_profile_columns(session) -> None:
     session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS suburb VARCHAR;"))
     session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS state VARCHAR;"))
     session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS postcode VARCHAR;"))
-    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS latitude VARCHAR;"))
-    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS longitude VARCHAR;"))
+    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS latitude NUMERIC(9,6);"))
+    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS longitude NUMERIC(9,6);"))
+    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS geo_precision VARCHAR;"))
+    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS geo_input_hash VARCHAR;"))
+    session.execute(text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS geocoded_at TIMESTAMP;"))
+    session.execute(
+        text("ALTER TABLE organisations ADD COLUMN IF NOT EXISTS practice_id UUID REFERENCES vet_practices(id) ON DELETE SET NULL;")
+    )
+    session.execute(
+        text("CREATE UNIQUE INDEX IF NOT EXISTS uq_organisations_practice_id ON organisations (practice_id) WHERE practice_id IS NOT NULL;")
+    )
     session.execute(
         text(
             """
@@ -269,6 +288,16 @@ def ensure_clinic_profile_columns(session) -> None:
             """
         )
     )
+    session.execute(
+        text(
+            """
+            ALTER TABLE staff_leaves
+            ADD COLUMN IF NOT EXISTS leave_period DATERANGE GENERATED ALWAYS AS (
+              CASE WHEN end_date >= start_date THEN daterange(start_date, end_date, '[]') END
+            ) STORED;
+            """
+        )
+    )
     session.execute(
         text(
             """
@@ -306,6 +335,7 @@ def ensure_clinic_profile_columns(session) -> None:
     session.execute(text("CREATE INDEX IF NOT EXISTS idx_vet_practices_suburb_postcode ON vet_practices (suburb, postcode);"))
     session.execute(text("CREATE INDEX IF NOT EXISTS idx_vet_practices_rating ON vet_practices (rating);"))
     session.execute(text("CREATE INDEX IF NOT EXISTS idx_vet_practices_service_types_gin ON vet_practices USING GIN (service_types);"))
+    session.execute(text("ALTER TABLE vet_practices ADD COLUMN IF NOT EXISTS source_hash VARCHAR;"))
     session.execute(
         text(
             """
@@ -347,6 +377,7 @@ def ensure_clinic_profile_columns(session) -> None:
             """
         )
     )
+    session.execute(text("ALTER TABLE practice_staff ADD COLUMN IF NOT EXISTS source_hash TEXT;"))
     session.execute(
         text(
             """
@@ -424,6 +455,7 @@ def ensure_care_coordination_tables(session) -> None:
         )
     )
     session.execute(text("CREATE INDEX IF NOT EXISTS idx_owner_notes_owner_created ON owner_notes (owner_id, created_at DESC);"))
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_owner_notes_owner_active ON owner_notes (owner_id, created_at DESC) WHERE deleted_at IS NULL;"))
     session.execute(
         text(
             """
@@ -445,6 +477,7 @@ def ensure_care_coordination_tables(session) -> None:
         )
     )
     session.execute(text("CREATE INDEX IF NOT EXISTS idx_concern_flags_owner_status ON concern_flags (owner_id, status, created_at DESC);"))
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_concern_flags_owner_open ON concern_flags (owner_id, created_at DESC) WHERE status = 'OPEN';"))
     session.execute(
         text(
             """
@@ -468,6 +501,125 @@ def ensure_care_coordination_tables(session) -> None:
         )
     )
     session.execute(text("CREATE INDEX IF NOT EXISTS idx_dashboard_reminders_scope_due ON dashboard_reminders (role_scope, due_at);"))
+    session.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_dashboard_reminders_active_scope_due "
+            "ON dashboard_reminders (role_scope, due_at) WHERE deleted_at IS NULL;"
+        )
+    )
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS owner_activity_summary (
+                owner_id UUID PRIMARY KEY REFERENCES owners(owner_id) ON DELETE CASCADE,
+                visit_count_total INTEGER NOT NULL DEFAULT 0,
+                latest_visit_at TIMESTAMP,
+                latest_visit_reason VARCHAR,
+                latest_visit_notes VARCHAR,
+                latest_clinic_id UUID REFERENCES organisations(organisation_id) ON DELETE SET NULL,
+                latest_clinic_name VARCHAR,
+                latest_note_text TEXT,
+                latest_note_at TIMESTAMP,
+                open_concern_count INTEGER NOT NULL DEFAULT 0,
+                refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    )
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS visit_daily_rollup (
+                organisation_id UUID REFERENCES organisations(organisation_id) ON DELETE SET NULL,
+                visit_day DATE NOT NULL,
+                total_visits INTEGER NOT NULL DEFAULT 0,
+                cancelled_or_missed INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+    )
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_visit_daily_rollup_day_org ON visit_daily_rollup (visit_day, organisation_id);"))
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS visit_rollup_months (
+                month_start DATE PRIMARY KEY,
+                refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    )
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS practice_opening_hours (
+                practice_id UUID NOT NULL REFERENCES vet_practices(id) ON DELETE CASCADE,
+                weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+                open_minute SMALLINT NOT NULL CHECK (open_minute BETWEEN 0 AND 1440),
+                close_minute SMALLINT NOT NULL CHECK (close_minute BETWEEN 0 AND 1440),
+                PRIMARY KEY (practice_id, weekday, open_minute),
+                CHECK (close_minute > open_minute)
+            );
+            """
+        )
+    )
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_practice_opening_hours_weekday ON practice_opening_hours (weekday, open_minute, close_minute);"))
+    session.execute(
+        text(
+            """
+            ALTER TABLE practice_opening_hours
+            ADD COLUMN IF NOT EXISTS precision VARCHAR NOT NULL DEFAULT 'parsed' CHECK (precision IN ('parsed', 'inferred'));
+            """
+        )
+    )
+    session.execute(text("ALTER TABLE vet_practices ADD COLUMN IF NOT EXISTS opening_hours_hash VARCHAR;"))
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS clinic_staffing_days (
+                organisation_id UUID NOT NULL REFERENCES organisations(organisation_id) ON DELETE CASCADE,
+                staffing_day DATE NOT NULL,
+                member_role VARCHAR NOT NULL,
+                rostered INTEGER NOT NULL DEFAULT 0,
+                on_leave INTEGER NOT NULL DEFAULT 0,
+                pending_leave INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (organisation_id, staffing_day, member_role)
+            );
+            """
+        )
+    )
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_clinic_staffing_days_day_org ON clinic_staffing_days (staffing_day, organisation_id);"))
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS clinic_staffing_months (
+                month_start DATE PRIMARY KEY,
+                refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+    )
+    session.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS visit_outbox (
+                outbox_id BIGSERIAL PRIMARY KEY,
+                event_type VARCHAR NOT NULL,
+                visit_id UUID NOT NULL,
+                idempotency_key VARCHAR NOT NULL UNIQUE,
+                payload JSONB NOT NULL,
+                status VARCHAR NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'SENT', 'FAILED')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                last_error TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                sent_at TIMESTAMP
+            );
+            """
+        )
+    )
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_visit_outbox_pending_due ON visit_outbox (next_attempt_at, outbox_id) WHERE status = 'PENDING';"))
+    session.execute(text("CREATE INDEX IF NOT EXISTS idx_visit_outbox_pending_visit ON visit_outbox (visit_id, outbox_id) WHERE status = 'PENDING';"))
     session.commit()
 
 
@@ -489,6 +641,13 @@ def reset_db(session) -> None:
     # Keep reset order explicit so FK dependencies truncate cleanly.
     session.execute(text("""
         TRUNCATE TABLE
+          visit_outbox,
+          practice_opening_hours,
+          clinic_staffing_months,
+          clinic_staffing_days,
+          visit_rollup_months,
+          visit_daily_rollup,
+          owner_activity_summary,
           dashboard_reminders,
           concern_flags,
           owner_notes,
@@ -736,126 +895,10 @@ def seed_owner_pets(session, owners: list[Owner], pets: list[Pet]) -> int:
     return len(links)
 
 
-def _vet_gateway_csv_path() -> Path:
-    return Path(__file__).resolve().parents[1] / "services" / "vet_gateway" / "tas_vet_practices_enriched_partial.csv"
-
-
-def _vet_staff_snapshot_csv_path() -> Path:
-    return Path(__file__).resolve().parents[1] / "services" / "vet_gateway" / "tas_practice_staff_snapshot.csv"
-
-
-def _parse_optional_float(value: str | None) -> float | None:
-    if value is None:
-        return None
-    v = str(value).strip()
-    if not v:
-        return None
-    try:
-        return float(v)
-    except ValueError:
-        return None
-
-
-def _parse_optional_int(value: str | None) -> int | None:
-    if value is None:
-        return None
-    v = str(value).strip()
-    if not v:
-        return None
-    try:
-        return int(v)
-    except ValueError:
-        return None
-
-
-def _normalize_optional_text(value: str | None) -> str | None:
-    if value is None:
-        return None
-    v = str(value).strip()
-    return v or None
-
-
-def _normalize_whitespace(value: str | None) -> str | None:
-    text_value = _normalize_optional_text(value)
-    if not text_value:
-        return None
-    return " ".join(text_value.split())
-
-
-def _normalize_role(value: str | None) -> tuple[str | None, str | None]:
-    role_raw = _normalize_whitespace(value)
-    if not role_raw:
-        return None, None
-    normalized = role_raw.lower()
-    if any(token in normalized for token in ["veterinarian", "vet ", "veterinary surgeon"]):
-        return "Veterinarian", role_raw
-    if "nurse" in normalized:
-        return "Vet Nurse", role_raw
-    if "manager" in normalized:
-        return "Practice Manager", role_raw
-    if any(token in normalized for token in ["reception", "client care"]):
-        return "Reception/Client Care", role_raw
-    return role_raw.title(), role_raw
-
-
-def _parse_optional_bool(value: str | None) -> bool | None:
-    raw = _normalize_optional_text(value)
-    if raw is None:
-        return None
-    normalized = raw.lower()
-    if normalized in {"1", "true", "yes", "y"}:
-        return True
-    if normalized in {"0", "false", "no", "n"}:
-        return False
-    return None
-
-
-def _parse_after_hours(value: str | None) -> tuple[bool | None, str | None]:
-    raw = _normalize_optional_text(value)
-    if not raw:
-        return None, None
-    val = raw.lower()
-    if val.startswith("yes"):
-        return True, raw
-    if val.startswith("no"):
-        return False, raw
-    return None, raw
-
-
-def _infer_practice_type(service_types: list[str], emergency_text: str | None) -> str:
-    svc = " ".join(service_types).lower()
-    em = (emergency_text or "").lower()
-    if "emergency" in svc or "emergency" in em:
-        return "emergency"
-    if "mobile" in svc:
-        return "mobile"
-    if "special" in svc:
-        return "specialist"
-    if "hospital" in svc:
-        return "hospital"
-    return "clinic"
-
-
-def _staff_guardrail_check(
-    source_url: str | None,
-    source_type: str | None,
-    is_publicly_listed: bool | None,
-) -> tuple[bool, str | None]:
-    if not source_url:
-        return False, "missing source_url"
-    url_lower = source_url.lower()
-    if "linkedin.com" in url_lower:
-        return False, "linkedin sources are blocked"
-    if source_type and source_type.lower() not in {"practice_website", "official_website"}:
-        return False, "source_type is not a practice website"
-    if is_publicly_listed is False:
-        return False, "row not marked as publicly listed"
-    return True, None
-
-
 def seed_vet_practices_and_clinics_from_tas_data(session) -> tuple[list[Organisation], list[VetPractice], int]:
     # Ingest Tasmania real-world snapshot and keep both vet_practices + organisations in sync.
-    csv_path = _vet_gateway_csv_path()
+    # Later refreshes go through app.scripts.ingest_vet_practices, which upserts instead of reloading.
+    csv_path = PRACTICES_CSV_PATH
     if not csv_path.exists():
         print(f"TAS vet dataset not found at {csv_path}, falling back to synthetic clinics.")
         fallback_clinics = seed_clinics(session, 5)
@@ -867,80 +910,25 @@ def seed_vet_practices_and_clinics_from_tas_data(session) -> tuple[list[Organisa
     with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            name = _normalize_optional_text(row.get("name"))
-            if not name:
+            values = parse_practice_row(row)
+            if values is None:
                 continue
-            address = _normalize_optional_text(row.get("address"))
-            suburb = _normalize_optional_text(row.get("suburb"))
-            state = _normalize_optional_text(row.get("state")) or "TAS"
-            postcode = _normalize_optional_text(row.get("postcode"))
-            phone = _normalize_optional_text(row.get("phone"))
-            website = _normalize_optional_text(row.get("website"))
-            email = _normalize_optional_text(row.get("email"))
-            facebook = _normalize_optional_text(row.get("facebook"))
-            instagram = _normalize_optional_text(row.get("instagram"))
-            emergency = _normalize_optional_text(row.get("emergency"))
-            opening_hours = _normalize_optional_text(row.get("opening_hours"))
-            service_types = [s.strip() for s in (row.get("service_types") or "").split(";") if s.strip()]
-            after_hours_available, after_hours_notes = _parse_after_hours(row.get("after_hours"))
-            source = _normalize_optional_text(row.get("source"))
-
-            lat = _parse_optional_float(row.get("latitude"))
-            lng = _parse_optional_float(row.get("longitude"))
-            rating = _parse_optional_float(row.get("rating"))
-            review_count = _parse_optional_int(row.get("review_count"))
-
-            scraped_raw = _normalize_optional_text(row.get("scraped_at")) or datetime.now(UTC).isoformat()
-            try:
-                scraped_at = datetime.fromisoformat(scraped_raw.replace("Z", "+00:00"))
-            except Exception:
-                scraped_at = datetime.now(UTC)
-
-            source_key = "|".join([(name or "").lower(), (address or "").lower(), (postcode or "").lower(), (source or "").lower()])
-            practice_type = _infer_practice_type(service_types, emergency)
-
-            practices.append(
-                VetPractice(
-                    source_key=source_key,
-                    source=source,
-                    name=name,
-                    abn=None,
-                    practice_type=practice_type,
-                    phone=phone,
-                    email=email,
-                    website=website,
-                    facebook_url=facebook,
-                    instagram_url=instagram,
-                    street_address=address,
-                    suburb=suburb,
-                    state=state,
-                    postcode=postcode,
-                    latitude=lat,
-                    longitude=lng,
-                    service_types=service_types or None,
-                    opening_hours_text=opening_hours,
-                    opening_hours_json=None,
-                    after_hours_available=after_hours_available,
-                    after_hours_notes=after_hours_notes,
-                    emergency_referral=emergency,
-                    rating=rating,
-                    review_count=review_count,
-                    scraped_at=scraped_at,
-                )
-            )
+            practice = VetPractice(id=uuid.uuid4(), **values)
+            practices.append(practice)
 
             clinics.append(
                 Organisation(
-                    name=name,
+                    practice_id=practice.id,
+                    name=values["name"],
                     org_type="vet_clinic",
-                    phone=phone,
-                    email=email,
-                    address=address,
-                    suburb=suburb,
-                    state=state,
-                    postcode=postcode,
-                    latitude=str(lat) if lat is not None else None,
-                    longitude=str(lng) if lng is not None else None,
+                    phone=values["phone"],
+                    email=values["email"],
+                    address=values["street_address"],
+                    suburb=values["suburb"],
+                    state=values["state"],
+                    postcode=values["postcode"],
+                    latitude=values["latitude"],
+                    longitude=values["longitude"],
                 )
             )
 
@@ -954,97 +942,45 @@ def seed_practice_staff_from_snapshot(session, practices: list[VetPractice]) ->
     """
     Load staff snapshots from vetted practice website sources only.
 
-    Expected CSV columns:
-      - practice_name, practice_address, practice_postcode
-      - staff_name, role, bio, profile_image_url
-      - source_url, source_type, is_publicly_listed
-      - scraped_at, http_status
+    See app.services.practice_ingest.parse_staff_row for the expected CSV columns.
     """
-    csv_path = _vet_staff_snapshot_csv_path()
+    csv_path = STAFF_SNAPSHOT_CSV_PATH
     if not csv_path.exists():
         return 0, 0
 
-    practice_index: dict[str, VetPractice] = {}
-    for practice in practices:
-        key = "|".join(
-            [
-                (practice.name or "").strip().lower(),
-                (practice.street_address or "").strip().lower(),
-                (practice.postcode or "").strip().lower(),
-            ]
-        )
-        practice_index[key] = practice
+    practice_index: dict[str, VetPractice] = {
+        practice_lookup_key(practice.name, practice.street_address, practice.postcode): practice
+        for practice in practices
+    }
 
     staff_rows: list[PracticeStaff] = []
     source_rows: list[PracticeStaffSource] = []
     seen_staff_keys: set[tuple[str, str, str, str]] = set()
     seen_source_keys: set[tuple[str, str]] = set()
 
-    # Guardrails are enforced per-row before staff records are admitted.
     with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            practice_name = _normalize_whitespace(row.get("practice_name") or row.get("name"))
-            practice_address = _normalize_whitespace(row.get("practice_address") or row.get("address")) or ""
-            practice_postcode = _normalize_whitespace(row.get("practice_postcode") or row.get("postcode")) or ""
-            if not practice_name:
-                continue
-
-            practice_key = "|".join([practice_name.lower(), practice_address.lower(), practice_postcode.lower()])
-            practice = practice_index.get(practice_key)
+            parsed = parse_staff_row(row)
+            practice = practice_index.get(parsed["practice_key"]) if parsed else None
             if not practice:
                 continue
 
-            source_url = _normalize_optional_text(row.get("source_url"))
-            source_type = _normalize_optional_text(row.get("source_type"))
-            is_publicly_listed = _parse_optional_bool(row.get("is_publicly_listed"))
-            allowed, note = _staff_guardrail_check(source_url, source_type, is_publicly_listed)
-
-            scraped_raw = _normalize_optional_text(row.get("scraped_at")) or datetime.now(UTC).isoformat()
-            try:
-                scraped_at = datetime.fromisoformat(scraped_raw.replace("Z", "+00:00"))
-            except Exception:
-                scraped_at = datetime.now(UTC)
-
-            source_key = (str(practice.id), source_url or "")
+            source = parsed["source"]
+            source_key = (str(practice.id), source["source_url"])
             if source_key not in seen_source_keys:
-                source_rows.append(
-                    PracticeStaffSource(
-                        practice_id=practice.id,
-                        source_url=source_url or "missing",
-                        http_status=_parse_optional_int(row.get("http_status")),
-                        last_scraped_at=scraped_at,
-                        parse_success=bool(allowed),
-                        notes=note,
-                    )
-                )
+                source_rows.append(PracticeStaffSource(practice_id=practice.id, **source))
                 seen_source_keys.add(source_key)
 
-            if not allowed:
+            staff = parsed["staff"]
+            if staff is None:
                 continue
 
-            staff_name = _normalize_whitespace(row.get("staff_name"))
-            role, role_raw = _normalize_role(row.get("role"))
-            if not staff_name or not role or not source_url:
-                continue
-
-            staff_key = (str(practice.id), staff_name.lower(), role.lower(), source_url.lower())
+            staff_key = (str(practice.id), staff["staff_name"].lower(), staff["role"].lower(), staff["source_url"].lower())
             if staff_key in seen_staff_keys:
                 continue
 
-            staff_rows.append(
-                PracticeStaff(
-                    practice_id=practice.id,
-                    staff_name=staff_name,
-                    role=role,
-                    role_raw=role_raw,
-                    bio=_normalize_optional_text(row.get("bio")),
-                    profile_image_url=_normalize_optional_text(row.get("profile_image_url")),
-                    source_url=source_url,
-                    scraped_at=scraped_at,
-                    is_active=True,
-                )
-            )
+            staff_rows.append(PracticeStaff(practice_id=practice.id, is_active=True, **staff))
             seen_staff_keys.add(staff_key)
 
     if source_rows:
@@ -1073,8 +1009,8 @@ def seed_clinics(session, n: int = 5) -> list[Organisation]:
             suburb=suburb,
             state=state,
             postcode=postcode,
-            latitude=str(lat),
-            longitude=str(lng),
+            latitude=lat,
+            longitude=lng,
         ))
     session.add_all(clinics)
     session.commit()
@@ -1174,12 +1110,12 @@ def seed_visits_weights_vax(session, pets: list[Pet], clinics: list[Organisation
         "Worming advice",
         "Weight check",
     ]
-    cancellation_reasons = [
-        "Cancelled: owner unavailable",
-        "Cancelled: clinic reschedule",
-        "No show: owner did not attend",
-        "Did not attend",
-    ]
+    cancellation_reasons = {
+        "Cancelled: owner unavailable": "CANCELLED",
+        "Cancelled: clinic reschedule": "CANCELLED",
+        "No show: owner did not attend": "NO_SHOW",
+        "Did not attend": "NO_SHOW",
+    }
 
     clinic_by_bucket: dict[str, list[Organisation]] = {"SOUTH": [], "NORTH_EAST": [], "NORTH_WEST": [], "UNKNOWN": []}
     for clinic in clinics:
@@ -1237,7 +1173,7 @@ def seed_visits_weights_vax(session, pets: list[Pet], clinics: list[Organisation
 
             # Seed a meaningful cancellation/no-show rate for analytics/testing.
             if random.random() < 0.18:
-                reason = random.choice(cancellation_reasons)
+                reason = random.choice(list(cancellation_reasons))
             else:
                 reason = random.choice(routine_reasons)
 
@@ -1247,6 +1183,7 @@ def seed_visits_weights_vax(session, pets: list[Pet], clinics: list[Organisation
                 vet_user_id=vet.user_id if vet else None,
                 visit_datetime=visit_dt,
                 reason=reason,
+                status=cancellation_reasons.get(reason, "COMPLETED"),
                 notes_visible_to_owner=fake.sentence(nb_words=10)
             )
             visits.append(visit)
@@ -1256,9 +1193,7 @@ def seed_visits_weights_vax(session, pets: list[Pet], clinics: list[Organisation
 
     for v in visits:
         # Cancelled/no-show visits should not produce measured clinical outcomes.
-        reason_text = (v.reason or "").lower()
-        is_cancelled = ("cancel" in reason_text) or ("no show" in reason_text) or ("did not attend" in reason_text)
-        if is_cancelled:
+        if v.status in MISSED_VISIT_STATUSES:
             continue
 
         base = 10.0 if random.random() < 0.5 else 4.5
@@ -1525,6 +1460,8 @@ def seed_staff_leave(session, clinics: list[Organisation], vet_users: list[User]
 
     now = datetime.now(UTC).date()
     leaves: list[StaffLeave] = []
+    # Staff in several clinics can be sampled twice; approved leave must not overlap (ex_staff_leaves_approved_overlap).
+    approved_by_user: dict[str, list[tuple[date, date]]] = {}
     sample_size = min(max(30, len(member_rows) // 3), len(member_rows))
     for row in random.sample(member_rows, k=sample_size):
         # Ensure we generate a mix of historical, current, and future leave states.
@@ -1551,6 +1488,11 @@ def seed_staff_leave(session, clinics: list[Organisation], vet_users: list[User]
             end_date = start_date + timedelta(days=duration)
             status = "PENDING"
 
+        if status == "APPROVED":
+            taken = approved_by_user.setdefault(row["user_id"], [])
+            if any(start_date <= end and start <= end_date for start, end in taken):
+                continue
+            taken.append((start_date, end_date))
         leaves.append(
             StaffLeave(
                 organisation_id=uuid.UUID(row["organisation_id"]),
@@ -1605,6 +1547,12 @@ if __name__ == "__main__":
         print("Seeding clinics (5)...")
         clinics, practices, practice_n = seed_vet_practices_and_clinics_from_tas_data(session)
 
+        print("Geocoding clinics...")
+        geo_counts = geocode_clinics(session)
+
+        print("Parsing practice opening hours...")
+        hours_counts = sync_practice_opening_hours(session)
+
         print("Seeding practice staff snapshot (if available)...")
         practice_staff_n, practice_staff_source_n = seed_practice_staff_from_snapshot(session, practices)
 
@@ -1617,6 +1565,9 @@ if __name__ == "__main__":
         leave_n = seed_staff_leave(session, clinics, vet_users)
         note_n, concern_n, reminder_n = seed_owner_notes_flags_and_reminders(session, owners, pets, clinics, vet_users)
 
+        print("Rebuilding owner activity summary...")
+        summary_n = rebuild_owner_activity_summary()
+
         all_users = session.execute(select(User)).scalars().all()
         creds_path = export_credentials(all_users)
 
@@ -1624,7 +1575,8 @@ if __name__ == "__main__":
             f"Done. visits={visit_n}, weights={weight_n}, vaccinations={vax_n}, medications={med_n}, "
             f"staff_leave={leave_n}, vet_practices={practice_n}, practice_staff={practice_staff_n}, "
             f"practice_staff_sources={practice_staff_source_n}, vet_guidelines={guideline_n}, "
-            f"owner_gov_profiles={gov_profile_n}, owner_notes={note_n}, concern_flags={concern_n}, reminders={reminder_n}"
+            f"owner_gov_profiles={gov_profile_n}, owner_notes={note_n}, concern_flags={concern_n}, reminders={reminder_n}, "
+            f"owner_activity_summary={summary_n}, clinic_geocoding={geo_counts}, opening_hours={hours_counts}"
         )
         print(f"Fixed account password: {FIXED_ACCOUNT_PASSWORD}")
         print("Fixed accounts: admin@petprotect.local, vet@petprotect.local, owner@petprotect.local")
@@ -0,0 +1,298 @@
+"""Module: availability."""
+
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Day is split into fixed slots; each (vet, day) is one SLOTS_PER_DAY-bit integer, bit i = slot i.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+# vet_visits has no duration column; every booked visit blocks this much of the vet's day.
+VISIT_DURATION_MINUTES = 30
+# Longest window one availability request may cover.
+MAX_AVAILABILITY_DAYS = 62
+
+# Member roles that take appointments.
+BOOKABLE_MEMBER_ROLES = ("veterinarian", "senior_veterinarian")
+
+# Used for clinics whose practice listing has no parsed hours: weekday() -> (open_minute, close_minute).
+DEFAULT_OPENING_HOURS: dict[int, list[tuple[int, int]]] = {
+    0: [(8 * 60, 18 * 60)],
+    1: [(8 * 60, 18 * 60)],
+    2: [(8 * 60, 18 * 60)],
+    3: [(8 * 60, 18 * 60)],
+    4: [(8 * 60, 18 * 60)],
+    5: [(9 * 60, 13 * 60)],
+    6: [],
+}
+
+# Serialises bookings per vet so two concurrent POSTs can't both see the same slot as free.
+_BOOKING_LOCK_NAMESPACE = 380
+
+
+# Raised when a requested visit would overlap an existing booking for the same vet.
+class SlotUnavailable(ValueError):
+    pass
+
+
+def _slot_mask(start_minute: int, end_minute: int) -> int:
+    # Bits covering [start_minute, end_minute), widened outward to whole slots and clipped to the day.
+    first = max(0, start_minute // SLOT_MINUTES)
+    last = min(SLOTS_PER_DAY, -(-end_minute // SLOT_MINUTES))
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def _minute_of_day(value: datetime) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _free_runs(bits: int, min_slots: int) -> list[tuple[int, int]]:
+    # Splits a bitmap into maximal runs of set bits as (first_slot, slot_count).
+    runs = []
+    while bits:
+        low = (bits & -bits).bit_length() - 1
+        shifted = bits >> low
+        length = (shifted ^ (shifted + 1)).bit_length() - 1
+        if length >= min_slots:
+            runs.append((low, length))
+        bits &= ~(((1 << length) - 1) << low)
+    return runs
+
+
+def load_opening_masks(db: Session, organisation_id: uuid.UUID) -> dict[int, int]:
+    # A clinic's hours are those parsed from its linked practice's listing (organisations.practice_id, set by
+    # practice_ingest). Hours only inferred from "Open until ..." are not trusted for booking.
+    rows = db.execute(
+        text(
+            """
+            SELECT h.weekday, h.open_minute, h.close_minute
+            FROM organisations o
+            JOIN practice_opening_hours h ON h.practice_id = o.practice_id
+            WHERE o.organisation_id = :organisation_id
+              AND h.precision = 'parsed'
+            """
+        ),
+        {"organisation_id": organisation_id},
+    ).all()
+    hours: dict[int, list[tuple[int, int]]] = defaultdict(list)
+    for weekday, open_minute, close_minute in rows:
+        hours[weekday].append((open_minute, close_minute))
+    source = hours if rows else DEFAULT_OPENING_HOURS
+
+    masks = {}
+    for weekday in range(7):
+        mask = 0
+        for open_minute, close_minute in source.get(weekday, []):
+            mask |= _slot_mask(open_minute, close_minute)
+        masks[weekday] = mask
+    return masks
+
+
+def _load_vets(db: Session, organisation_id: uuid.UUID, vet_user_id: uuid.UUID | None) -> list[dict]:
+    params: dict[str, object] = {"organisation_id": organisation_id, "roles": list(BOOKABLE_MEMBER_ROLES)}
+    vet_sql = ""
+    if vet_user_id:
+        vet_sql = "AND om.user_id = :vet_user_id"
+        params["vet_user_id"] = vet_user_id
+    rows = db.execute(
+        text(
+            f"""
+            SELECT om.user_id, u.full_name, om.member_role
+            FROM organisation_members om
+            JOIN users u ON u.user_id = om.user_id
+            WHERE om.organisation_id = :organisation_id
+              AND om.member_role = ANY(:roles)
+              {vet_sql}
+            ORDER BY u.full_name, om.user_id
+            """
+        ),
+        params,
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def build_occupancy(
+    db: Session, vet_ids: list[uuid.UUID], start: date, end: date
+) -> tuple[dict[tuple[uuid.UUID, date], int], set[tuple[uuid.UUID, date]]]:
+    # One query each for visits and approved leave across every vet and day in [start, end].
+    busy: dict[tuple[uuid.UUID, date], int] = defaultdict(int)
+    on_leave: set[tuple[uuid.UUID, date]] = set()
+    if not vet_ids:
+        return busy, on_leave
+
+    # Visits at any clinic count: a vet can't be in two places at once.
+    visits = db.execute(
+        text(
+            """
+            SELECT vet_user_id, visit_datetime
+            FROM vet_visits
+            WHERE vet_user_id = ANY(:vet_ids)
+              AND visit_datetime >= :start
+              AND visit_datetime < :end
+              AND status <> 'CANCELLED'
+            """
+        ),
+        {
+            "vet_ids": vet_ids,
+            "start": datetime.combine(start, time.min),
+            "end": datetime.combine(end + timedelta(days=1), time.min),
+        },
+    ).all()
+    for vet_id, visit_datetime in visits:
+        first_minute = _minute_of_day(visit_datetime)
+        busy[(vet_id, visit_datetime.date())] |= _slot_mask(first_minute, first_minute + VISIT_DURATION_MINUTES)
+
+    leaves = db.execute(
+        text(
+            """
+            SELECT user_id, GREATEST(start_date, :start) AS first_day, LEAST(end_date, :end) AS last_day
+            FROM staff_leaves
+            WHERE user_id = ANY(:vet_ids)
+              AND status = 'APPROVED'
+              AND leave_period && daterange(:start, :end, '[]')
+            """
+        ),
+        {"vet_ids": vet_ids, "start": start, "end": end},
+    ).all()
+    for vet_id, first_day, last_day in leaves:
+        day = first_day
+        while day <= last_day:
+            on_leave.add((vet_id, day))
+            day += timedelta(days=1)
+    return busy, on_leave
+
+
+def _slot_time(day: date, slot: int) -> datetime:
+    return datetime.combine(day, time.min) + timedelta(minutes=slot * SLOT_MINUTES)
+
+
+def clinic_availability(
+    db: Session,
+    organisation_id: uuid.UUID,
+    start: date,
+    end: date,
+    *,
+    vet_user_id: uuid.UUID | None = None,
+    duration_minutes: int = VISIT_DURATION_MINUTES,
+) -> list[dict]:
+    opening = load_opening_masks(db, organisation_id)
+    vets = _load_vets(db, organisation_id, vet_user_id)
+    busy, on_leave = build_occupancy(db, [v["user_id"] for v in vets], start, end)
+    min_slots = -(-duration_minutes // SLOT_MINUTES)
+
+    out = []
+    for vet in vets:
+        vet_id = vet["user_id"]
+        free_ranges = []
+        day = start
+        while day <= end:
+            if (vet_id, day) not in on_leave:
+                free = opening[day.weekday()] & ~busy.get((vet_id, day), 0)
+                for first_slot, length in _free_runs(free, min_slots):
+                    free_ranges.append(
+                        {
+                            "start": _slot_time(day, first_slot),
+                            "end": _slot_time(day, first_slot + length),
+                        }
+                    )
+            day += timedelta(days=1)
+        out.append(
+            {
+                "vet_user_id": str(vet_id),
+                "full_name": vet["full_name"],
+                "member_role": vet["member_role"],
+                "free": free_ranges,
+            }
+        )
+    return out
+
+
+def lock_vet_schedule(db: Session, vet_user_id: uuid.UUID) -> None:
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:vet_user_id))"),
+        {"namespace": _BOOKING_LOCK_NAMESPACE, "vet_user_id": str(vet_user_id)},
+    )
+
+
+def lock_vet_schedules(db: Session, vet_user_ids) -> None:
+    # Fixed order so two batches touching the same vets can't deadlock on each other.
+    for vet_user_id in sorted(set(vet_user_ids), key=str):
+        lock_vet_schedule(db, vet_user_id)
+
+
+def normalize_visit_datetimes(db: Session, values: list[datetime]) -> list[datetime]:
+    # vet_visits.visit_datetime is TIMESTAMP: Postgres stores an offset value as session-time wall clock. Apply the
+    # same conversion up front so checks and writes use what will be stored; naive values pass through unchanged.
+    if not values:
+        return []
+    return list(
+        db.execute(
+            text(
+                """
+                SELECT CAST(v AS timestamptz)::timestamp
+                FROM unnest(CAST(:values AS text[])) WITH ORDINALITY AS t(v, idx)
+                ORDER BY idx
+                """
+            ),
+            {"values": [value.isoformat() for value in values]},
+        ).scalars()
+    )
+
+
+def find_booking_conflicts(db: Session, bookings: list[tuple[uuid.UUID, datetime]]) -> list[dict]:
+    # bookings are (vet_user_id, visit_datetime) with times from normalize_visit_datetimes; checks against stored
+    # visits and against each other.
+    if not bookings:
+        return []
+    duration = timedelta(minutes=VISIT_DURATION_MINUTES)
+    rows = db.execute(
+        text(
+            """
+            SELECT DISTINCT ON (b.idx) b.idx, vv.visit_datetime
+            FROM unnest(CAST(:vet_ids AS uuid[]), CAST(:starts AS timestamp[])) WITH ORDINALITY
+              AS b(vet_user_id, visit_datetime, idx)
+            JOIN vet_visits vv
+              ON vv.vet_user_id = b.vet_user_id
+             AND vv.visit_datetime > b.visit_datetime - CAST(:duration AS interval)
+             AND vv.visit_datetime < b.visit_datetime + CAST(:duration AS interval)
+             AND vv.status <> 'CANCELLED'
+            ORDER BY b.idx, vv.visit_datetime
+            """
+        ),
+        {
+            "vet_ids": [vet_id for vet_id, _ in bookings],
+            "starts": [start for _, start in bookings],
+            "duration": duration,
+        },
+    ).all()
+    conflicts = [
+        {"vet_user_id": bookings[idx - 1][0], "visit_datetime": bookings[idx - 1][1], "conflicts_with": clash_at}
+        for idx, clash_at in rows
+    ]
+
+    by_vet: dict[uuid.UUID, list[datetime]] = defaultdict(list)
+    for vet_id, start in bookings:
+        by_vet[vet_id].append(start)
+    for vet_id, starts in by_vet.items():
+        starts.sort()
+        for earlier, later in zip(starts, starts[1:]):
+            if later - earlier < duration:
+                conflicts.append({"vet_user_id": vet_id, "visit_datetime": later, "conflicts_with": earlier})
+    return conflicts
+
+
+def ensure_slot_free(db: Session, vet_user_id: uuid.UUID, visit_datetime: datetime) -> None:
+    # Caller holds lock_vet_schedule for the rest of its transaction, so the check can't race another booking.
+    conflicts = find_booking_conflicts(db, [(vet_user_id, visit_datetime)])
+    if conflicts:
+        raise SlotUnavailable(
+            f"Vet already has a visit at {conflicts[0]['conflicts_with'].isoformat()} "
+            f"overlapping {visit_datetime.isoformat()}"
+        )
@@ -0,0 +1,267 @@
+"""Module: clinic_geo."""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+EARTH_RADIUS_KM = 6371.0088
+# Grid cell edge in degrees for the in-process index (~28 km of latitude).
+GRID_CELL_DEGREES = 0.25
+# The in-process index is rebuilt at most this often; clinics change rarely.
+GRID_INDEX_TTL_SECONDS = 300
+
+# Centroid precisions: the clinic is somewhere in that postcode/suburb, so distances to it are approximate.
+APPROXIMATE_GEO_PRECISIONS = ("postcode", "suburb")
+
+# Simulated coordinates are placeholders for clinics with no usable address; they are never searched or clustered
+# (the PostGIS geog column is NULL for them too).
+_CLINIC_POINTS_SQL = """
+    SELECT
+      organisation_id, name, suburb, state, postcode, geo_precision,
+      latitude::float8 AS latitude, longitude::float8 AS longitude
+    FROM organisations
+    WHERE org_type = 'vet_clinic'
+      AND latitude IS NOT NULL
+      AND longitude IS NOT NULL
+      AND geo_precision IS DISTINCT FROM 'simulated'
+"""
+
+_PRACTICE_POINTS_SQL = """
+    SELECT id AS organisation_id, name, suburb, state, postcode, latitude::float8 AS latitude, longitude::float8 AS longitude
+    FROM vet_practices
+    WHERE latitude IS NOT NULL
+      AND longitude IS NOT NULL
+"""
+
+# Map cluster grid: zoom z uses cells of CLUSTER_CELL_DEGREES_Z0 / 2**z degrees, precomputed for every level.
+CLUSTER_CELL_DEGREES_Z0 = 45.0
+MAX_CLUSTER_ZOOM = 16
+# A response never has more clusters than this; wide boxes at deep zooms step out to a coarser level.
+MAX_CLUSTER_CELLS = 1024
+CLUSTER_SAMPLE_SIZE = 3
+CLUSTER_KINDS = ("clinic", "practice")
+
+# Cached per process; PostGIS and the geog column are created at startup in app/main.py when available.
+_POSTGIS_AVAILABLE: bool | None = None
+
+
+def _postgis_available(db: Session) -> bool:
+    global _POSTGIS_AVAILABLE
+    if _POSTGIS_AVAILABLE is None:
+        _POSTGIS_AVAILABLE = bool(
+            db.execute(
+                text(
+                    """
+                    SELECT EXISTS (
+                      SELECT 1 FROM information_schema.columns
+                      WHERE table_name = 'organisations' AND column_name = 'geog'
+                    )
+                    """
+                )
+            ).scalar()
+        )
+    return _POSTGIS_AVAILABLE
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+# Uniform lat/lon grid over clinic points: a radius query only touches the cells its bounding box overlaps.
+class ClinicGridIndex:
+    def __init__(self, rows: list[dict], cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells: dict[tuple[int, int], list[dict]] = defaultdict(list)
+        for row in rows:
+            self.cells[self._cell(row["latitude"], row["longitude"])].append(row)
+        self.size = len(rows)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: int) -> list[dict]:
+        d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        # Longitude degrees shrink towards the poles; clamp so the box stays finite near them.
+        d_lon = d_lat / max(math.cos(math.radians(lat)), 0.01)
+        lat_lo, lon_lo = self._cell(lat - d_lat, lon - d_lon)
+        lat_hi, lon_hi = self._cell(lat + d_lat, lon + d_lon)
+
+        hits = []
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lon_lo, lon_hi + 1):
+                for row in self.cells.get((i, j), ()):
+                    distance = haversine_km(lat, lon, row["latitude"], row["longitude"])
+                    if distance <= radius_km:
+                        hits.append((distance, row))
+        hits.sort(key=lambda hit: hit[0])
+        return [{**row, "distance_km": distance} for distance, row in hits[:limit]]
+
+
+# Per-zoom cell aggregates (count, coordinate sums, a few sample points) for one kind of marker.
+class ClusterGrid:
+    def __init__(self, kind: str, rows: list[dict]):
+        self.kind = kind
+        self.levels: list[dict[tuple[int, int], dict]] = []
+        for zoom in range(MAX_CLUSTER_ZOOM + 1):
+            size = cluster_cell_degrees(zoom)
+            cells: dict[tuple[int, int], dict] = {}
+            for row in rows:
+                key = (math.floor(row["latitude"] / size), math.floor(row["longitude"] / size))
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = {"count": 0, "lat_sum": 0.0, "lon_sum": 0.0, "samples": []}
+                cell["count"] += 1
+                cell["lat_sum"] += row["latitude"]
+                cell["lon_sum"] += row["longitude"]
+                if len(cell["samples"]) < CLUSTER_SAMPLE_SIZE:
+                    cell["samples"].append({"id": str(row["organisation_id"]), "kind": kind, "name": row["name"]})
+            self.levels.append(cells)
+
+    def cells_in(self, zoom: int, lat_range: tuple[int, int], lon_range: tuple[int, int]):
+        cells = self.levels[zoom]
+        (lat_lo, lat_hi), (lon_lo, lon_hi) = lat_range, lon_range
+        span = (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1)
+        if span <= len(cells):
+            for i in range(lat_lo, lat_hi + 1):
+                for j in range(lon_lo, lon_hi + 1):
+                    if (i, j) in cells:
+                        yield (i, j), cells[(i, j)]
+        else:
+            for (i, j), cell in cells.items():
+                if lat_lo <= i <= lat_hi and lon_lo <= j <= lon_hi:
+                    yield (i, j), cell
+
+
+def cluster_cell_degrees(zoom: int) -> float:
+    return CLUSTER_CELL_DEGREES_Z0 / (2**zoom)
+
+
+_grid_lock = threading.Lock()
+_grid_index: ClinicGridIndex | None = None
+_grid_built_at = 0.0
+_cluster_grids: dict[str, ClusterGrid] | None = None
+_cluster_built_at = 0.0
+
+
+def invalidate_clinic_grid() -> None:
+    global _grid_index, _cluster_grids
+    with _grid_lock:
+        _grid_index = None
+        _cluster_grids = None
+
+
+def _clinic_grid(db: Session) -> ClinicGridIndex:
+    global _grid_index, _grid_built_at
+    with _grid_lock:
+        if _grid_index is None or time.monotonic() - _grid_built_at > GRID_INDEX_TTL_SECONDS:
+            rows = [dict(r) for r in db.execute(text(_CLINIC_POINTS_SQL)).mappings().all()]
+            _grid_index = ClinicGridIndex(rows)
+            _grid_built_at = time.monotonic()
+        return _grid_index
+
+
+def _cluster_grid_set(db: Session) -> dict[str, ClusterGrid]:
+    global _cluster_grids, _cluster_built_at
+    with _grid_lock:
+        if _cluster_grids is None or time.monotonic() - _cluster_built_at > GRID_INDEX_TTL_SECONDS:
+            _cluster_grids = {
+                kind: ClusterGrid(kind, [dict(r) for r in db.execute(text(sql)).mappings().all()])
+                for kind, sql in (("clinic", _CLINIC_POINTS_SQL), ("practice", _PRACTICE_POINTS_SQL))
+            }
+            _cluster_built_at = time.monotonic()
+        return _cluster_grids
+
+
+def map_clusters(
+    db: Session,
+    bbox: tuple[float, float, float, float],
+    zoom: int,
+    kinds: tuple[str, ...] = CLUSTER_KINDS,
+) -> dict:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    grids = _cluster_grid_set(db)
+
+    # Step out until the box covers at most MAX_CLUSTER_CELLS cells, which bounds the payload size.
+    level = min(zoom, MAX_CLUSTER_ZOOM)
+    while True:
+        size = cluster_cell_degrees(level)
+        lat_range = (math.floor(min_lat / size), math.floor(max_lat / size))
+        lon_range = (math.floor(min_lon / size), math.floor(max_lon / size))
+        span = (lat_range[1] - lat_range[0] + 1) * (lon_range[1] - lon_range[0] + 1)
+        if span <= MAX_CLUSTER_CELLS or level == 0:
+            break
+        level -= 1
+
+    merged: dict[tuple[int, int], dict] = {}
+    for kind in kinds:
+        for key, cell in grids[kind].cells_in(level, lat_range, lon_range):
+            out = merged.get(key)
+            if out is None:
+                out = merged[key] = {"count": 0, "lat_sum": 0.0, "lon_sum": 0.0, "counts": {}, "samples": []}
+            out["count"] += cell["count"]
+            out["lat_sum"] += cell["lat_sum"]
+            out["lon_sum"] += cell["lon_sum"]
+            out["counts"][kind] = cell["count"]
+            out["samples"].extend(cell["samples"][: CLUSTER_SAMPLE_SIZE - len(out["samples"])])
+
+    clusters = [
+        {
+            "count": cell["count"],
+            "latitude": round(cell["lat_sum"] / cell["count"], 6),
+            "longitude": round(cell["lon_sum"] / cell["count"], 6),
+            "counts": cell["counts"],
+            "samples": cell["samples"],
+        }
+        for _, cell in sorted(merged.items())
+    ]
+    return {"zoom": zoom, "grid_zoom": level, "cell_degrees": cluster_cell_degrees(level), "clusters": clusters}
+
+
+def nearby_clinics(db: Session, lat: float, lon: float, radius_km: float, limit: int) -> list[dict]:
+    if _postgis_available(db):
+        rows = db.execute(
+            text(
+                """
+                SELECT
+                  organisation_id, name, suburb, state, postcode, geo_precision,
+                  latitude::float8 AS latitude, longitude::float8 AS longitude,
+                  ST_Distance(geog, ref.pt) / 1000.0 AS distance_km
+                FROM organisations, (SELECT ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography AS pt) ref
+                WHERE org_type = 'vet_clinic'
+                  AND geo_precision IS DISTINCT FROM 'simulated'
+                  AND ST_DWithin(geog, ref.pt, :radius_m)
+                ORDER BY geog <-> ref.pt
+                LIMIT :limit
+                """
+            ),
+            {"lat": lat, "lon": lon, "radius_m": radius_km * 1000.0, "limit": limit},
+        ).mappings().all()
+        hits = [dict(r) for r in rows]
+    else:
+        hits = _clinic_grid(db).nearby(lat, lon, radius_km, limit)
+
+    return [
+        {
+            "id": str(hit["organisation_id"]),
+            "name": hit["name"],
+            "suburb": hit["suburb"],
+            "state": hit["state"],
+            "postcode": hit["postcode"],
+            "latitude": hit["latitude"],
+            "longitude": hit["longitude"],
+            "geo_precision": hit["geo_precision"],
+            "location_approximate": hit["geo_precision"] in APPROXIMATE_GEO_PRECISIONS,
+            "distance_km": round(hit["distance_km"], 3),
+        }
+        for hit in hits
+    ]
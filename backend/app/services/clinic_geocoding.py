@@ -0,0 +1,190 @@
+"""Module: clinic_geocoding."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.services.clinic_geo import invalidate_clinic_grid
+
+# How a clinic's coordinates were obtained, most to least precise.
+GEO_PRECISIONS = ("stored", "postcode", "suburb", "simulated")
+
+
+def _geo_input_hash_sql(prefix: str = "") -> str:
+    # Fingerprint of the address fields the fallback depends on; a change re-queues the clinic.
+    return f"md5(LOWER(TRIM(COALESCE({prefix}postcode, ''))) || '|' || LOWER(TRIM(COALESCE({prefix}suburb, ''))))"
+
+
+def _to_float(value) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clinic_seed(organisation_id: uuid.UUID) -> int:
+    return organisation_id.int % 1_000_000
+
+
+def _simulated_tas_coordinates(seed: int) -> tuple[float, float]:
+    """
+    Generate deterministic fallback coordinates within Tasmania bounds.
+    This keeps distances/maps usable when source data lacks lat/lon.
+    """
+    # Rough TAS bounds
+    lat_min, lat_max = -43.8, -39.2
+    lon_min, lon_max = 143.7, 148.6
+    # Deterministic pseudo-random fraction from stable seed
+    frac_a = ((seed * 1103515245 + 12345) % 10_000) / 10_000.0
+    frac_b = ((seed * 214013 + 2531011) % 10_000) / 10_000.0
+    lat = lat_min + (lat_max - lat_min) * frac_a
+    lon = lon_min + (lon_max - lon_min) * frac_b
+    return (round(lat, 6), round(lon, 6))
+
+
+# Approximate postcode centroids (TAS) used when imported data lacks lat/lon.
+POSTCODE_COORDS_TAS: dict[str, tuple[float, float]] = {
+    "7000": (-42.8821, 147.3272),  # Hobart
+    "7005": (-42.9050, 147.3230),  # Sandy Bay
+    "7008": (-42.8780, 147.3090),  # Lenah Valley / West Hobart
+    "7009": (-42.8620, 147.2860),  # Moonah area
+    "7011": (-42.8070, 147.2520),  # Claremont
+    "7015": (-42.8360, 147.3530),  # Lindisfarne
+    "7018": (-42.8720, 147.3650),  # Rosny/Bellerive
+    "7050": (-42.9750, 147.3080),  # Kingston
+    "7053": (-42.9850, 147.3200),  # Taroona/Kingston surrounds
+    "7172": (-42.7360, 147.5790),  # Dodges Ferry
+    "7173": (-42.7820, 147.5620),  # Sorell
+    "7216": (-41.3210, 148.2410),  # St Helens
+    "7249": (-41.4550, 147.1320),  # Kings Meadows/South Launceston
+    "7250": (-41.4330, 147.1380),  # Launceston
+    "7260": (-41.1670, 146.9560),  # Lilydale
+    "7268": (-41.1570, 147.5180),  # Scottsdale
+    "7275": (-41.2980, 146.9700),  # Exeter
+    "7301": (-41.5400, 146.6600),  # Deloraine/Longford region
+    "7304": (-41.3900, 146.3300),  # Sheffield
+    "7306": (-41.1900, 146.1650),  # Devonport surrounds
+    "7310": (-41.1760, 146.3510),  # Devonport
+    "7315": (-41.1600, 146.1660),  # Ulverstone
+    "7316": (-41.1100, 146.0700),  # Penguin
+    "7320": (-41.0540, 145.9030),  # Burnie
+    "7330": (-40.8440, 145.1240),  # Smithton
+}
+
+SUBURB_COORDS_TAS: dict[str, tuple[float, float]] = {
+    "sandy bay": (-42.9050, 147.3230),
+    "launceston": (-41.4330, 147.1380),
+    "devonport": (-41.1760, 146.3510),
+    "burnie": (-41.0540, 145.9030),
+    "ulverstone": (-41.1600, 146.1660),
+    "penguin": (-41.1100, 146.0700),
+    "kingston": (-42.9750, 147.3080),
+    "rosny park": (-42.8720, 147.3650),
+    "lindisfarne": (-42.8360, 147.3530),
+    "bellerive": (-42.8750, 147.3700),
+    "claremont": (-42.8070, 147.2520),
+    "st helens": (-41.3210, 148.2410),
+    "sorell": (-42.7820, 147.5620),
+    "smithton": (-40.8440, 145.1240),
+}
+
+
+def _jitter_from_seed(seed: int) -> tuple[float, float]:
+    # Keep clinics in same suburb/postcode visible as separate points without moving far.
+    d_lat = (((seed * 37) % 1000) / 1000.0 - 0.5) * 0.04
+    d_lon = (((seed * 53) % 1000) / 1000.0 - 0.5) * 0.04
+    return d_lat, d_lon
+
+
+def resolve_clinic_coordinates(
+    latitude, longitude, postcode: str | None, suburb: str | None, seed: int
+) -> tuple[float, float, str]:
+    # 1) Prefer stored coordinates if present.
+    lat = _to_float(latitude)
+    lon = _to_float(longitude)
+    if lat is not None and lon is not None:
+        return lat, lon, "stored"
+
+    # 2) Use postcode centroid when available.
+    postcode = (postcode or "").strip()
+    if postcode in POSTCODE_COORDS_TAS:
+        base_lat, base_lon = POSTCODE_COORDS_TAS[postcode]
+        j_lat, j_lon = _jitter_from_seed(seed)
+        return round(base_lat + j_lat, 6), round(base_lon + j_lon, 6), "postcode"
+
+    # 3) Fallback to suburb centroid.
+    suburb_key = (suburb or "").strip().lower()
+    if suburb_key in SUBURB_COORDS_TAS:
+        base_lat, base_lon = SUBURB_COORDS_TAS[suburb_key]
+        j_lat, j_lon = _jitter_from_seed(seed)
+        return round(base_lat + j_lat, 6), round(base_lon + j_lon, 6), "suburb"
+
+    # 4) Last resort for unknown suburb/postcode.
+    lat, lon = _simulated_tas_coordinates(seed)
+    return lat, lon, "simulated"
+
+
+def geocode_clinics(db: Session, *, full: bool = False) -> dict[str, int]:
+    # Incremental by default: clinics never geocoded, or whose postcode/suburb changed since their fallback was computed.
+    # Source-provided ("stored") coordinates are never overwritten.
+    pending_sql = "TRUE" if full else (
+        "geo_precision IS NULL"
+        f" OR (geo_precision <> 'stored' AND geo_input_hash IS DISTINCT FROM {_geo_input_hash_sql()})"
+    )
+    rows = db.execute(
+        text(
+            f"""
+            SELECT organisation_id, latitude, longitude, postcode, suburb, geo_precision
+            FROM organisations
+            WHERE {pending_sql}
+            """
+        )
+    ).mappings().all()
+
+    updates = []
+    counts = {precision: 0 for precision in GEO_PRECISIONS}
+    for row in rows:
+        if row["geo_precision"] == "stored":
+            lat, lon, precision = _to_float(row["latitude"]), _to_float(row["longitude"]), "stored"
+        elif row["geo_precision"] is None:
+            lat, lon, precision = resolve_clinic_coordinates(
+                row["latitude"], row["longitude"], row["postcode"], row["suburb"], clinic_seed(row["organisation_id"])
+            )
+        else:
+            # Previously derived coordinates are recomputed from the address, not treated as stored.
+            lat, lon, precision = resolve_clinic_coordinates(
+                None, None, row["postcode"], row["suburb"], clinic_seed(row["organisation_id"])
+            )
+        counts[precision] += 1
+        updates.append(
+            {"organisation_id": str(row["organisation_id"]), "latitude": lat, "longitude": lon, "geo_precision": precision}
+        )
+
+    if updates:
+        db.execute(
+            text(
+                f"""
+                UPDATE organisations o
+                SET latitude = u.latitude,
+                    longitude = u.longitude,
+                    geo_precision = u.geo_precision,
+                    geo_input_hash = {_geo_input_hash_sql("o.")},
+                    geocoded_at = :geocoded_at
+                FROM jsonb_to_recordset(:updates)
+                  AS u(organisation_id uuid, latitude numeric, longitude numeric, geo_precision varchar)
+                WHERE o.organisation_id = u.organisation_id
+                """
+            ).bindparams(bindparam("updates", type_=JSONB)),
+            {"updates": updates, "geocoded_at": datetime.now(UTC)},
+        )
+    db.commit()
+    if updates:
+        invalidate_clinic_grid()
+    return counts
@@ -0,0 +1,80 @@
+"""Module: loaders."""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable
+from typing import Any
+
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+from app.db.models.organisation import Organisation
+from app.db.models.owner import Owner
+from app.db.models.owner_gov_profile import OwnerGovProfile
+from app.db.models.pet import Pet
+from app.db.models.user import User
+
+
+# Collects keys for one entity type and resolves them with a single ANY(:ids) query, memoized per request.
+class BatchLoader:
+    def __init__(self, db: Session, model: type, key_column: Any):
+        self.db = db
+        self.model = model
+        self.key_column = key_column
+        self._cache: dict[Hashable, Any] = {}
+        self._pending: set[Hashable] = set()
+
+    def prime(self, keys: Iterable[Hashable]) -> None:
+        # Queue keys now so the next load() resolves them all in the same round trip.
+        self._pending.update(k for k in keys if k is not None and k not in self._cache)
+
+    def load(self, key: Hashable) -> Any | None:
+        if key is None:
+            return None
+        return self.load_many([key])[key]
+
+    def load_many(self, keys: Iterable[Hashable]) -> dict[Hashable, Any | None]:
+        wanted = [k for k in keys if k is not None]
+        self.prime(wanted)
+        self._dispatch()
+        return {k: self._cache.get(k) for k in wanted}
+
+    def clear(self, key: Hashable | None = None) -> None:
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def _dispatch(self) -> None:
+        if not self._pending:
+            return
+        ids = list(self._pending)
+        self._pending.clear()
+        rows = self.db.execute(
+            select(self.model).where(
+                self.key_column == any_(bindparam("ids", ids, type_=ARRAY(UUID(as_uuid=True))))
+            )
+        ).scalars().all()
+        key_name = self.key_column.key
+        for key in ids:
+            self._cache[key] = None
+        for row in rows:
+            self._cache[getattr(row, key_name)] = row
+
+
+class RequestLoaders:
+    def __init__(self, db: Session):
+        self.pets = BatchLoader(db, Pet, Pet.pet_id)
+        self.owners = BatchLoader(db, Owner, Owner.owner_id)
+        self.users = BatchLoader(db, User, User.user_id)
+        self.clinics = BatchLoader(db, Organisation, Organisation.organisation_id)
+        self.gov_profiles = BatchLoader(db, OwnerGovProfile, OwnerGovProfile.owner_id)
+
+
+def loaders_for(db: Session) -> RequestLoaders:
+    # get_db opens one session per request, so session.info scopes the loaders (and their memo) to the request.
+    loaders = db.info.get("loaders")
+    if loaders is None:
+        loaders = db.info["loaders"] = RequestLoaders(db)
+    return loaders
@@ -0,0 +1,297 @@
+"""Module: opening_hours."""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+# Every practice in the snapshot is Tasmanian; "now" and naive `at` values are read as local wall time here.
+PRACTICE_TIMEZONE = "Australia/Hobart"
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ALL_DAYS = tuple(range(7))
+WEEKDAYS = tuple(range(5))
+WEEKEND = (5, 6)
+
+# Listings that only say "Open until 6pm" are read as weekdays from this time until the stated close.
+INFERRED_OPEN_MINUTE = 8 * 60
+INFERRED_DAYS = WEEKDAYS
+
+# Bump when parse_opening_hours or the rows written for it change for existing text.
+OPENING_HOURS_PARSER_VERSION = 3
+
+_DAY = r"(mon|tue|wed|thu|fri|sat|sun)(?:day|days|s|sday|sdays|nesday|nesdays|r|rs|rsday|rsdays|urday|urdays)?\b\.?"
+_DAY_RANGE_RE = re.compile(rf"\b{_DAY}\s*(?:-|to)\s*{_DAY}")
+_DAY_RE = re.compile(rf"\b{_DAY}")
+# Start of any day group; used to split "Mon-Fri 9-5 Sat 9-12" into one piece per group.
+_DAY_TOKEN_RE = re.compile(rf"\b(?:{_DAY}\s*(?:-|to)\s*{_DAY}|{_DAY}|weekdays?\b|weekends?\b|daily\b|every day\b|7 days\b)")
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?"
+_TIME_RANGE_RE = re.compile(rf"\b{_TIME}\s*(?:-|to)\s*{_TIME}")
+_UNTIL_RE = re.compile(r"\buntil\s+(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)\b")
+_ALWAYS_OPEN_RE = re.compile(r"\b(24/7|24 hours|24hrs|open 24)\b")
+
+
+# Parsed weekly hours: weekday (0 = Monday) -> sorted, non-overlapping (open_minute, close_minute) ranges.
+@dataclass
+class WeeklyHours:
+    intervals: dict[int, list[tuple[int, int]]]
+    # "parsed" when the text gave days and times, "inferred" when only a closing time was stated.
+    precision: str
+
+
+def _minute(hour: str, minute: str | None, meridiem: str | None) -> int | None:
+    h, m = int(hour), int(minute or 0)
+    if m >= 60:
+        return None
+    if meridiem is None:
+        return h * 60 + m if h <= 24 else None
+    if not 1 <= h <= 12:
+        return None
+    return (h % 12 + (12 if meridiem == "pm" else 0)) * 60 + m
+
+
+def _time_ranges(segment: str, allow_bare: bool) -> list[tuple[int, int]]:
+    ranges = []
+    for match in _TIME_RANGE_RE.finditer(segment):
+        sh, sm, smer, eh, em, emer = match.groups()
+        if smer is None and emer is None:
+            # Bare numbers ("8-12", "9-5") only count next to days; "9:00-17:30" and "9-5:30" always do.
+            if not (sm or em or allow_bare):
+                continue
+            start, end = _minute(sh, sm, None), _minute(eh, em, None)
+            if start is None or end is None:
+                continue
+            # Without am/pm a closing time below the opening one is pm ("9-5:30"), unless that still ends
+            # before the opening, which is a genuine overnight range ("22:00-2:00").
+            if end < start and end < 13 * 60 and end + 12 * 60 > start:
+                end += 12 * 60
+            ranges.append((start, end))
+            continue
+        if smer is None and emer is not None:
+            # "9-5pm" starts in the morning, "1-5pm" in the afternoon.
+            smer = "am" if emer == "pm" and int(sh) % 12 > int(eh) % 12 else emer
+        start, end = _minute(sh, sm, smer), _minute(eh, em, emer)
+        if start is None or end is None:
+            continue
+        ranges.append((start, end or 24 * 60))
+    return ranges
+
+
+def _days(segment: str) -> list[int]:
+    days: set[int] = set()
+    for first, last in _DAY_RANGE_RE.findall(segment):
+        a, b = DAY_NAMES.index(first), DAY_NAMES.index(last)
+        days.update(range(a, b + 1) if a <= b else [*range(a, 7), *range(0, b + 1)])
+    segment = _DAY_RANGE_RE.sub(" ", segment)
+    days.update(DAY_NAMES.index(name) for name in _DAY_RE.findall(segment))
+    if re.search(r"\bweekdays?\b", segment):
+        days.update(WEEKDAYS)
+    if re.search(r"\bweekends?\b", segment):
+        days.update(WEEKEND)
+    if re.search(r"\b(daily|every day|7 days)\b", segment):
+        days.update(ALL_DAYS)
+    return sorted(days)
+
+
+def _day_groups(segment: str) -> list[str]:
+    # Cuts before a day token once the current piece already has both days and times:
+    # "mon-fri 7:30am-6:30pm sat 8am-12pm" -> ["mon-fri 7:30am-6:30pm ", "sat 8am-12pm"].
+    # Times written before their days ("9am-5pm mon-fri") stay together.
+    pieces, cut = [], 0
+    for match in _DAY_TOKEN_RE.finditer(segment):
+        piece = segment[cut : match.start()]
+        if _DAY_TOKEN_RE.search(piece) and _TIME_RANGE_RE.search(piece):
+            pieces.append(piece)
+            cut = match.start()
+    pieces.append(segment[cut:])
+    return pieces
+
+
+def _merge(intervals: dict[int, list[tuple[int, int]]]) -> dict[int, list[tuple[int, int]]]:
+    merged = {}
+    for day, ranges in intervals.items():
+        out: list[tuple[int, int]] = []
+        for start, end in sorted(ranges):
+            if out and start <= out[-1][1]:
+                out[-1] = (out[-1][0], max(out[-1][1], end))
+            else:
+                out.append((start, end))
+        merged[day] = out
+    return merged
+
+
+def _add(intervals: dict[int, list[tuple[int, int]]], day: int, start: int, end: int) -> None:
+    if end > start:
+        intervals[day].append((start, end))
+    elif end < start:
+        # Past midnight: the tail of the range belongs to the next day.
+        intervals[day].append((start, 24 * 60))
+        if end:
+            intervals[(day + 1) % 7].append((0, end))
+
+
+def parse_opening_hours(value: str | None) -> WeeklyHours | None:
+    # Free-text listing hours -> weekly minute ranges, or None when the text doesn't state any times.
+    if not value:
+        return None
+    normalized = value.lower().replace("–", "-").replace("—", "-")
+    if _ALWAYS_OPEN_RE.search(normalized):
+        return WeeklyHours({day: [(0, 24 * 60)] for day in ALL_DAYS}, "parsed")
+
+    intervals: dict[int, list[tuple[int, int]]] = {day: [] for day in ALL_DAYS}
+    found = False
+    last_days: list[int] | None = None
+    # Days listed on their own ("Mon, Wed, Fri 9am-5pm" splits into three segments) wait for the next times.
+    pending: set[int] = set()
+    segments = [piece for segment in re.split(r"[;,\n|]", normalized) for piece in _day_groups(segment)]
+    for segment in segments:
+        days = _days(segment)
+        ranges = _time_ranges(segment, allow_bare=bool(days or pending or last_days))
+        if ranges:
+            # A segment without days continues the previous one ("Mon-Fri 8-12, 1-5pm").
+            target = sorted(pending.union(days)) or last_days or list(ALL_DAYS)
+            for day in target:
+                for start, end in ranges:
+                    _add(intervals, day, start, end)
+            found = True
+            last_days, pending = target, set()
+        elif days and "closed" in segment:
+            found = True
+            pending = set()
+        else:
+            pending.update(days)
+    if found:
+        return WeeklyHours(_merge(intervals), "parsed")
+
+    for segment in segments:
+        match = _UNTIL_RE.search(segment)
+        if match:
+            close = _minute(*match.groups())
+            if close is None or close <= INFERRED_OPEN_MINUTE:
+                return None
+            return WeeklyHours(
+                {day: [(INFERRED_OPEN_MINUTE, close)] if day in (_days(segment) or INFERRED_DAYS) else [] for day in ALL_DAYS},
+                "inferred",
+            )
+    return None
+
+
+def _hhmm(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def opening_hours_json(hours: WeeklyHours | None) -> str | None:
+    # Stored in vet_practices.opening_hours_json for display; queries use practice_opening_hours instead.
+    if hours is None:
+        return None
+    return json.dumps(
+        {
+            "precision": hours.precision,
+            "days": {DAY_NAMES[day]: [[_hhmm(s), _hhmm(e)] for s, e in hours.intervals.get(day, [])] for day in ALL_DAYS},
+        },
+        separators=(",", ":"),
+    )
+
+
+def _opening_hours_hash_sql(prefix: str = "") -> str:
+    # The parser version is hashed in, so bumping it re-parses every listing on the next sync.
+    return f"md5('{OPENING_HOURS_PARSER_VERSION}:' || COALESCE({prefix}opening_hours_text, ''))"
+
+
+def sync_practice_opening_hours(db: Session, *, full: bool = False) -> dict[str, int]:
+    # Incremental by default: only practices whose opening_hours_text changed since it was last parsed.
+    pending_sql = "TRUE" if full else f"opening_hours_hash IS DISTINCT FROM {_opening_hours_hash_sql()}"
+    rows = db.execute(text(f"SELECT id, opening_hours_text FROM vet_practices WHERE {pending_sql}")).all()
+
+    counts = {"parsed": 0, "inferred": 0, "unknown": 0}
+    if not rows:
+        return counts
+    updates, intervals = [], []
+    for practice_id, hours_text in rows:
+        hours = parse_opening_hours(hours_text)
+        counts[hours.precision if hours else "unknown"] += 1
+        updates.append({"id": str(practice_id), "opening_hours_json": opening_hours_json(hours)})
+        for day, ranges in (hours.intervals.items() if hours else ()):
+            intervals.extend(
+                {
+                    "practice_id": str(practice_id),
+                    "weekday": day,
+                    "open_minute": s,
+                    "close_minute": e,
+                    "precision": hours.precision,
+                }
+                for s, e in ranges
+            )
+
+    db.execute(
+        text(
+            """
+            DELETE FROM practice_opening_hours h
+            USING jsonb_to_recordset(:updates) AS u(id uuid)
+            WHERE h.practice_id = u.id
+            """
+        ).bindparams(bindparam("updates", type_=JSONB)),
+        {"updates": updates},
+    )
+    if intervals:
+        db.execute(
+            text(
+                """
+                INSERT INTO practice_opening_hours (practice_id, weekday, open_minute, close_minute, precision)
+                SELECT r.practice_id, r.weekday, r.open_minute, r.close_minute, r.precision
+                FROM jsonb_to_recordset(:intervals)
+                  AS r(practice_id uuid, weekday smallint, open_minute smallint, close_minute smallint, precision varchar)
+                """
+            ).bindparams(bindparam("intervals", type_=JSONB)),
+            {"intervals": intervals},
+        )
+    db.execute(
+        text(
+            f"""
+            UPDATE vet_practices p
+            SET opening_hours_json = u.opening_hours_json,
+                opening_hours_hash = {_opening_hours_hash_sql("p.")}
+            FROM jsonb_to_recordset(:updates) AS u(id uuid, opening_hours_json varchar)
+            WHERE p.id = u.id
+            """
+        ).bindparams(bindparam("updates", type_=JSONB)),
+        {"updates": updates},
+    )
+    db.commit()
+    return counts
+
+
+def local_time_sql(at: datetime | None) -> tuple[str, dict]:
+    # SQL for the practice-local wall time being asked about; the conversion uses Postgres' tz database.
+    if at is None:
+        return "(NOW() AT TIME ZONE :practice_tz)", {"practice_tz": PRACTICE_TIMEZONE}
+    if at.tzinfo is not None:
+        return "(CAST(:at AS timestamptz) AT TIME ZONE :practice_tz)", {"at": at, "practice_tz": PRACTICE_TIMEZONE}
+    return "CAST(:at AS timestamp)", {"at": at}
+
+
+def open_at_cte(at: datetime | None) -> tuple[str, dict]:
+    # `ref` CTE body: the local time plus its weekday (0 = Monday) and minute of day.
+    local_sql, params = local_time_sql(at)
+    return (
+        f"""
+        SELECT t.local_at,
+               EXTRACT(ISODOW FROM t.local_at)::int - 1 AS weekday,
+               (EXTRACT(HOUR FROM t.local_at) * 60 + EXTRACT(MINUTE FROM t.local_at))::int AS minute
+        FROM (SELECT {local_sql} AS local_at) t
+        """,
+        params,
+    )
+
+
+# Matches practice_opening_hours rows covering the `ref` time; served by idx_practice_opening_hours_weekday.
+OPEN_AT_PREDICATE = "h.weekday = ref.weekday AND h.open_minute <= ref.minute AND h.close_minute > ref.minute"
+
+# Hours actually read from the listing; inferred rows are never reported as open.
+PARSED_HOURS_PREDICATE = "h.precision = 'parsed'"
@@ -0,0 +1,114 @@
+"""Module: owner_activity."""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Recomputes owner_activity_summary rows for the given owners in one statement.
+# Write paths call this inside their own transaction so the summary commits with the change.
+# Nothing here depends on the current date; rolling windows (visits in the last 12 months) are counted at read time.
+REFRESH_SQL = """
+    INSERT INTO owner_activity_summary (
+      owner_id,
+      visit_count_total,
+      latest_visit_at,
+      latest_visit_reason,
+      latest_visit_notes,
+      latest_clinic_id,
+      latest_clinic_name,
+      latest_note_text,
+      latest_note_at,
+      open_concern_count,
+      refreshed_at
+    )
+    SELECT
+      o.owner_id,
+      COALESCE(visit_counts.visit_count_total, 0),
+      recent_visits.visit_datetime,
+      recent_visits.reason,
+      recent_visits.notes_visible_to_owner,
+      recent_visits.organisation_id,
+      recent_visits.clinic_name,
+      recent_notes.note_text,
+      recent_notes.created_at,
+      COALESCE(open_concerns.open_count, 0),
+      :refreshed_at
+    FROM owners o
+    LEFT JOIN (
+      SELECT
+        op.owner_id,
+        COUNT(*)::int AS visit_count_total
+      FROM owner_pets op
+      JOIN vet_visits vv ON vv.pet_id = op.pet_id
+      WHERE op.owner_id = ANY(:owner_ids)
+      GROUP BY op.owner_id
+    ) visit_counts ON visit_counts.owner_id = o.owner_id
+    LEFT JOIN (
+      SELECT DISTINCT ON (op.owner_id)
+        op.owner_id,
+        vv.visit_datetime,
+        vv.reason,
+        vv.notes_visible_to_owner,
+        vv.organisation_id,
+        org.name AS clinic_name
+      FROM owner_pets op
+      JOIN vet_visits vv ON vv.pet_id = op.pet_id
+      LEFT JOIN organisations org ON org.organisation_id = vv.organisation_id
+      WHERE op.owner_id = ANY(:owner_ids)
+      ORDER BY op.owner_id, vv.visit_datetime DESC, vv.visit_id DESC
+    ) recent_visits ON recent_visits.owner_id = o.owner_id
+    LEFT JOIN (
+      SELECT DISTINCT ON (n.owner_id) n.owner_id, n.note_text, n.created_at
+      FROM owner_notes n
+      WHERE n.owner_id = ANY(:owner_ids)
+        AND n.deleted_at IS NULL
+      ORDER BY n.owner_id, n.created_at DESC, n.note_id DESC
+    ) recent_notes ON recent_notes.owner_id = o.owner_id
+    LEFT JOIN (
+      SELECT c.owner_id, COUNT(*)::int AS open_count
+      FROM concern_flags c
+      WHERE c.owner_id = ANY(:owner_ids)
+        AND c.status = 'OPEN'
+      GROUP BY c.owner_id
+    ) open_concerns ON open_concerns.owner_id = o.owner_id
+    WHERE o.owner_id = ANY(:owner_ids)
+    ON CONFLICT (owner_id) DO UPDATE SET
+      visit_count_total = EXCLUDED.visit_count_total,
+      latest_visit_at = EXCLUDED.latest_visit_at,
+      latest_visit_reason = EXCLUDED.latest_visit_reason,
+      latest_visit_notes = EXCLUDED.latest_visit_notes,
+      latest_clinic_id = EXCLUDED.latest_clinic_id,
+      latest_clinic_name = EXCLUDED.latest_clinic_name,
+      latest_note_text = EXCLUDED.latest_note_text,
+      latest_note_at = EXCLUDED.latest_note_at,
+      open_concern_count = EXCLUDED.open_concern_count,
+      refreshed_at = EXCLUDED.refreshed_at
+"""
+
+
+def refresh_owner_activity(db: Session, owner_ids: Iterable[uuid.UUID]) -> int:
+    ids = list({oid for oid in owner_ids if oid})
+    if not ids:
+        return 0
+    result = db.execute(
+        text(REFRESH_SQL),
+        {"owner_ids": ids, "refreshed_at": datetime.now(UTC)},
+    )
+    return result.rowcount
+
+
+def refresh_owner_activity_for_pets(db: Session, pet_ids: Iterable[uuid.UUID]) -> int:
+    # Visits are keyed by pet, so fan out to every owner linked to those pets.
+    ids = list({pid for pid in pet_ids if pid})
+    if not ids:
+        return 0
+    owner_ids = db.execute(
+        text("SELECT DISTINCT owner_id FROM owner_pets WHERE pet_id = ANY(:pet_ids)"),
+        {"pet_ids": ids},
+    ).scalars().all()
+    return refresh_owner_activity(db, owner_ids)
@@ -0,0 +1,216 @@
+"""Module: owner_timeline."""
+
+from __future__ import annotations
+
+import base64
+import heapq
+import uuid
+from datetime import datetime
+from itertools import groupby, islice
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Each source yields (occurred_at, id) in descending order from its own table; the
+# k-way merge below interleaves them without ever sorting the combined history. Pet
+# sources read each owned pet's newest rows through a LATERAL join, so every pet is one
+# backward scan of its (pet_id, occurred_at) index rather than a scan of the whole table.
+TIMELINE_SOURCES: dict[str, str] = {
+    "visit": """
+        SELECT e.*
+        FROM owned
+        CROSS JOIN LATERAL (
+          SELECT
+            'visit' AS type,
+            vv.visit_id::text AS id,
+            vv.visit_datetime AS occurred_at,
+            vv.pet_id AS pet_id,
+            COALESCE(NULLIF(vv.reason, ''), 'Vet visit') AS title,
+            org.name AS detail
+          FROM vet_visits vv
+          LEFT JOIN organisations org ON org.organisation_id = vv.organisation_id
+          WHERE vv.pet_id = owned.pet_id
+            AND {keyset}
+          ORDER BY vv.visit_datetime DESC, vv.visit_id DESC
+          LIMIT :fetch
+        ) e
+        ORDER BY e.occurred_at DESC, e.id DESC
+    """,
+    "vaccination": """
+        SELECT e.*
+        FROM owned
+        CROSS JOIN LATERAL (
+          SELECT
+            'vaccination' AS type,
+            v.vaccination_id::text AS id,
+            v.administered_at AS occurred_at,
+            v.pet_id AS pet_id,
+            v.vaccine_type AS title,
+            'Next due ' || to_char(v.due_at, 'YYYY-MM-DD') AS detail
+          FROM vaccinations v
+          WHERE v.pet_id = owned.pet_id
+            AND {keyset}
+          ORDER BY v.administered_at DESC, v.vaccination_id DESC
+          LIMIT :fetch
+        ) e
+        ORDER BY e.occurred_at DESC, e.id DESC
+    """,
+    "weight": """
+        SELECT e.*
+        FROM owned
+        CROSS JOIN LATERAL (
+          SELECT
+            'weight' AS type,
+            w.weight_id::text AS id,
+            w.measured_at AS occurred_at,
+            w.pet_id AS pet_id,
+            w.weight_kg::text || ' kg' AS title,
+            NULL::text AS detail
+          FROM weights w
+          WHERE w.pet_id = owned.pet_id
+            AND {keyset}
+          ORDER BY w.measured_at DESC, w.weight_id DESC
+          LIMIT :fetch
+        ) e
+        ORDER BY e.occurred_at DESC, e.id DESC
+    """,
+    "medication": """
+        SELECT e.*
+        FROM owned
+        CROSS JOIN LATERAL (
+          SELECT
+            'medication' AS type,
+            m.medication_id::text AS id,
+            m.start_date::timestamp AS occurred_at,
+            m.pet_id AS pet_id,
+            m.name AS title,
+            NULLIF(CONCAT_WS(' · ', m.dosage, m.instructions), '') AS detail
+          FROM medications m
+          WHERE m.pet_id = owned.pet_id
+            AND m.start_date IS NOT NULL
+            AND {keyset}
+          ORDER BY m.start_date DESC, m.medication_id DESC
+          LIMIT :fetch
+        ) e
+        ORDER BY e.occurred_at DESC, e.id DESC
+    """,
+    "note": """
+        SELECT
+          'note' AS type,
+          n.note_id::text AS id,
+          n.created_at AS occurred_at,
+          n.pet_id AS pet_id,
+          n.note_type AS title,
+          n.note_text AS detail
+        FROM owner_notes n
+        WHERE n.owner_id = :owner_id
+          AND n.deleted_at IS NULL
+          AND {keyset}
+        ORDER BY n.created_at DESC, n.note_id DESC
+    """,
+    "concern": """
+        SELECT
+          'concern' AS type,
+          c.flag_id::text AS id,
+          c.created_at AS occurred_at,
+          c.pet_id AS pet_id,
+          CONCAT_WS(' · ', c.category, c.severity, c.status) AS title,
+          c.description AS detail
+        FROM concern_flags c
+        WHERE c.owner_id = :owner_id
+          AND {keyset}
+        ORDER BY c.created_at DESC, c.flag_id DESC
+    """,
+}
+
+# Column pairs each source is ordered (and keyset-filtered) by.
+_SOURCE_KEYS: dict[str, tuple[str, str]] = {
+    "visit": ("vv.visit_datetime", "vv.visit_id"),
+    "vaccination": ("v.administered_at", "v.vaccination_id"),
+    "weight": ("w.measured_at", "w.weight_id"),
+    "medication": ("m.start_date", "m.medication_id"),
+    "note": ("n.created_at", "n.note_id"),
+    "concern": ("c.created_at", "c.flag_id"),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(occurred_at: datetime, event_type: str, event_id: str) -> str:
+    raw = f"{occurred_at.isoformat()}|{event_type}|{event_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, event_type, event_id = raw.split("|")
+        if event_type not in TIMELINE_SOURCES:
+            raise ValueError(event_type)
+        return datetime.fromisoformat(ts), event_type, uuid.UUID(event_id)
+    except ValueError as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _keyset_sql(source: str, cursor: tuple[datetime, str, uuid.UUID] | None) -> str:
+    # The global order is (occurred_at, type, id) DESC; translate it into a per-source predicate.
+    if cursor is None:
+        return "TRUE"
+    ts_col, id_col = _SOURCE_KEYS[source]
+    _, cursor_type, _ = cursor
+    if source == cursor_type:
+        return f"({ts_col}, {id_col}) < (:cursor_ts, :cursor_id)"
+    if source < cursor_type:
+        return f"{ts_col} <= :cursor_ts"
+    return f"{ts_col} < :cursor_ts"
+
+
+def _sort_key(event: dict) -> tuple:
+    return (event["occurred_at"], event["type"], event["id"])
+
+
+def timeline_sql(types: list[str], cursor: tuple[datetime, str, uuid.UUID] | None = None) -> str:
+    branches = [
+        f"({TIMELINE_SOURCES[source].format(keyset=_keyset_sql(source, cursor))} LIMIT :fetch)"
+        for source in types
+    ]
+    return f"""
+        WITH owned AS (
+          SELECT DISTINCT pet_id FROM owner_pets WHERE owner_id = :owner_id
+        )
+        SELECT e.type, e.id, e.occurred_at, e.pet_id::text AS pet_id,
+               (SELECT p.name FROM pets p WHERE p.pet_id = e.pet_id) AS pet_name, e.title, e.detail
+        FROM ({' UNION ALL '.join(branches)}) e
+    """
+
+
+def load_owner_timeline(
+    db: Session,
+    owner_id: uuid.UUID,
+    *,
+    limit: int,
+    types: list[str],
+    cursor: tuple[datetime, str, uuid.UUID] | None = None,
+) -> tuple[list[dict], str | None]:
+    params: dict[str, object] = {"owner_id": owner_id, "fetch": limit + 1}
+    if cursor is not None:
+        params["cursor_ts"], _, params["cursor_id"] = cursor
+
+    # One round trip fetches at most limit + 1 rows per source, so deep pages cost the same as page 1.
+    rows = db.execute(text(timeline_sql(types, cursor)), params).mappings().all()
+
+    events = sorted((dict(r) for r in rows), key=lambda e: e["type"])
+    streams = [
+        sorted(group, key=_sort_key, reverse=True)
+        for _, group in groupby(events, key=lambda e: e["type"])
+    ]
+    page = list(islice(heapq.merge(*streams, key=_sort_key, reverse=True), limit + 1))
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        next_cursor = encode_cursor(last["occurred_at"], last["type"], last["id"])
+    return page, next_cursor
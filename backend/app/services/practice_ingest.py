@@ -0,0 +1,561 @@
+"""Module: practice_ingest."""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from itertools import islice
+from pathlib import Path
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.services.clinic_geo import invalidate_clinic_grid
+from app.services.clinic_geocoding import geocode_clinics
+from app.services.opening_hours import opening_hours_json, parse_opening_hours, sync_practice_opening_hours
+
+PRACTICES_CSV_PATH = Path(__file__).resolve().parent / "vet_gateway" / "tas_vet_practices_enriched_partial.csv"
+STAFF_SNAPSHOT_CSV_PATH = Path(__file__).resolve().parent / "vet_gateway" / "tas_practice_staff_snapshot.csv"
+
+# CSV rows are upserted this many at a time, so a snapshot is never held in memory whole.
+INGEST_BATCH_ROWS = 500
+
+# Only one ingestion may run at a time; a second one waits for the first to commit.
+_INGEST_LOCK_KEY = 460
+
+# Practice fields that define a change; scraped_at is left out so a re-scrape of identical data is "unchanged".
+_PRACTICE_HASH_FIELDS = (
+    "source", "name", "abn", "practice_type", "phone", "email", "website", "facebook_url", "instagram_url",
+    "street_address", "suburb", "state", "postcode", "latitude", "longitude", "service_types",
+    "opening_hours_text", "opening_hours_json", "after_hours_available", "after_hours_notes",
+    "emergency_referral", "rating", "review_count",
+)
+_STAFF_HASH_FIELDS = ("role_raw", "bio", "profile_image_url")
+
+
+def _parse_optional_float(value: str | None) -> float | None:
+    if value is None:
+        return None
+    v = str(value).strip()
+    if not v:
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        return None
+
+
+def _parse_optional_int(value: str | None) -> int | None:
+    if value is None:
+        return None
+    v = str(value).strip()
+    if not v:
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        return None
+
+
+def _normalize_optional_text(value: str | None) -> str | None:
+    if value is None:
+        return None
+    v = str(value).strip()
+    return v or None
+
+
+def _normalize_whitespace(value: str | None) -> str | None:
+    text_value = _normalize_optional_text(value)
+    if not text_value:
+        return None
+    return " ".join(text_value.split())
+
+
+def _normalize_role(value: str | None) -> tuple[str | None, str | None]:
+    role_raw = _normalize_whitespace(value)
+    if not role_raw:
+        return None, None
+    normalized = role_raw.lower()
+    if any(token in normalized for token in ["veterinarian", "vet ", "veterinary surgeon"]):
+        return "Veterinarian", role_raw
+    if "nurse" in normalized:
+        return "Vet Nurse", role_raw
+    if "manager" in normalized:
+        return "Practice Manager", role_raw
+    if any(token in normalized for token in ["reception", "client care"]):
+        return "Reception/Client Care", role_raw
+    return role_raw.title(), role_raw
+
+
+def _parse_optional_bool(value: str | None) -> bool | None:
+    raw = _normalize_optional_text(value)
+    if raw is None:
+        return None
+    normalized = raw.lower()
+    if normalized in {"1", "true", "yes", "y"}:
+        return True
+    if normalized in {"0", "false", "no", "n"}:
+        return False
+    return None
+
+
+def _parse_after_hours(value: str | None) -> tuple[bool | None, str | None]:
+    raw = _normalize_optional_text(value)
+    if not raw:
+        return None, None
+    val = raw.lower()
+    if val.startswith("yes"):
+        return True, raw
+    if val.startswith("no"):
+        return False, raw
+    return None, raw
+
+
+def _infer_practice_type(service_types: list[str], emergency_text: str | None) -> str:
+    svc = " ".join(service_types).lower()
+    em = (emergency_text or "").lower()
+    if "emergency" in svc or "emergency" in em:
+        return "emergency"
+    if "mobile" in svc:
+        return "mobile"
+    if "special" in svc:
+        return "specialist"
+    if "hospital" in svc:
+        return "hospital"
+    return "clinic"
+
+
+def _staff_guardrail_check(
+    source_url: str | None,
+    source_type: str | None,
+    is_publicly_listed: bool | None,
+) -> tuple[bool, str | None]:
+    if not source_url:
+        return False, "missing source_url"
+    url_lower = source_url.lower()
+    if "linkedin.com" in url_lower:
+        return False, "linkedin sources are blocked"
+    if source_type and source_type.lower() not in {"practice_website", "official_website"}:
+        return False, "source_type is not a practice website"
+    if is_publicly_listed is False:
+        return False, "row not marked as publicly listed"
+    return True, None
+
+
+def _parse_scraped_at(value: str | None) -> datetime:
+    scraped_raw = _normalize_optional_text(value) or datetime.now(UTC).isoformat()
+    try:
+        return datetime.fromisoformat(scraped_raw.replace("Z", "+00:00"))
+    except Exception:
+        return datetime.now(UTC)
+
+
+def row_hash(values: dict, fields: tuple[str, ...]) -> str:
+    payload = json.dumps([values.get(field) for field in fields], default=str, separators=(",", ":"))
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def practice_lookup_key(name: str | None, address: str | None, postcode: str | None) -> str:
+    # How staff snapshot rows find their practice.
+    return "|".join([(name or "").strip().lower(), (address or "").strip().lower(), (postcode or "").strip().lower()])
+
+
+def parse_practice_row(row: dict) -> dict | None:
+    # One practices CSV row -> vet_practices column values, or None when the row has no name.
+    name = _normalize_optional_text(row.get("name"))
+    if not name:
+        return None
+    address = _normalize_optional_text(row.get("address"))
+    postcode = _normalize_optional_text(row.get("postcode"))
+    source = _normalize_optional_text(row.get("source"))
+    emergency = _normalize_optional_text(row.get("emergency"))
+    service_types = [s.strip() for s in (row.get("service_types") or "").split(";") if s.strip()]
+    after_hours_available, after_hours_notes = _parse_after_hours(row.get("after_hours"))
+
+    opening_hours = _normalize_optional_text(row.get("opening_hours"))
+
+    values = {
+        "source_key": "|".join([name.lower(), (address or "").lower(), (postcode or "").lower(), (source or "").lower()]),
+        "source": source,
+        "name": name,
+        "abn": None,
+        "practice_type": _infer_practice_type(service_types, emergency),
+        "phone": _normalize_optional_text(row.get("phone")),
+        "email": _normalize_optional_text(row.get("email")),
+        "website": _normalize_optional_text(row.get("website")),
+        "facebook_url": _normalize_optional_text(row.get("facebook")),
+        "instagram_url": _normalize_optional_text(row.get("instagram")),
+        "street_address": address,
+        "suburb": _normalize_optional_text(row.get("suburb")),
+        "state": _normalize_optional_text(row.get("state")) or "TAS",
+        "postcode": postcode,
+        "latitude": _parse_optional_float(row.get("latitude")),
+        "longitude": _parse_optional_float(row.get("longitude")),
+        "service_types": service_types or None,
+        "opening_hours_text": opening_hours,
+        "opening_hours_json": opening_hours_json(parse_opening_hours(opening_hours)),
+        "after_hours_available": after_hours_available,
+        "after_hours_notes": after_hours_notes,
+        "emergency_referral": emergency,
+        "rating": _parse_optional_float(row.get("rating")),
+        "review_count": _parse_optional_int(row.get("review_count")),
+        "scraped_at": _parse_scraped_at(row.get("scraped_at")),
+    }
+    values["source_hash"] = row_hash(values, _PRACTICE_HASH_FIELDS)
+    return values
+
+
+def parse_staff_row(row: dict) -> dict | None:
+    """
+    One staff snapshot row -> its practice key, source record and (when admitted) staff values.
+
+    Expected CSV columns:
+      - practice_name, practice_address, practice_postcode
+      - staff_name, role, bio, profile_image_url
+      - source_url, source_type, is_publicly_listed
+      - scraped_at, http_status
+    """
+    practice_name = _normalize_whitespace(row.get("practice_name") or row.get("name"))
+    if not practice_name:
+        return None
+    practice_address = _normalize_whitespace(row.get("practice_address") or row.get("address")) or ""
+    practice_postcode = _normalize_whitespace(row.get("practice_postcode") or row.get("postcode")) or ""
+
+    source_url = _normalize_optional_text(row.get("source_url"))
+    source_type = _normalize_optional_text(row.get("source_type"))
+    is_publicly_listed = _parse_optional_bool(row.get("is_publicly_listed"))
+    # Guardrails are enforced per-row before staff records are admitted.
+    allowed, note = _staff_guardrail_check(source_url, source_type, is_publicly_listed)
+    scraped_at = _parse_scraped_at(row.get("scraped_at"))
+
+    staff = None
+    staff_name = _normalize_whitespace(row.get("staff_name"))
+    role, role_raw = _normalize_role(row.get("role"))
+    if allowed and staff_name and role and source_url:
+        staff = {
+            "staff_name": staff_name,
+            "role": role,
+            "role_raw": role_raw,
+            "bio": _normalize_optional_text(row.get("bio")),
+            "profile_image_url": _normalize_optional_text(row.get("profile_image_url")),
+            "source_url": source_url,
+            "scraped_at": scraped_at,
+        }
+        staff["source_hash"] = row_hash(staff, _STAFF_HASH_FIELDS)
+
+    return {
+        "practice_key": practice_lookup_key(practice_name, practice_address, practice_postcode),
+        "source": {
+            "source_url": source_url or "missing",
+            "http_status": _parse_optional_int(row.get("http_status")),
+            "last_scraped_at": scraped_at,
+            "parse_success": bool(allowed),
+            "notes": note,
+        },
+        "staff": staff,
+    }
+
+
+def _read_csv(path: Path) -> Iterator[dict]:
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def _batches(rows: Iterator, size: int = INGEST_BATCH_ROWS) -> Iterator[list]:
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _json_rows(rows: list[dict]) -> list[dict]:
+    return [{k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()} for row in rows]
+
+
+_PRACTICE_COLUMNS = (
+    "source_key", "source", "name", "abn", "practice_type", "phone", "email", "website", "facebook_url",
+    "instagram_url", "street_address", "suburb", "state", "postcode", "latitude", "longitude", "service_types",
+    "opening_hours_text", "opening_hours_json", "after_hours_available", "after_hours_notes", "emergency_referral",
+    "rating", "review_count", "scraped_at", "source_hash",
+)
+
+# Rows whose hash matches the stored one are left alone and not returned; (xmax = 0) tells inserts from updates.
+_UPSERT_PRACTICES_SQL = text(
+    f"""
+    INSERT INTO vet_practices (id, {", ".join(_PRACTICE_COLUMNS)})
+    SELECT gen_random_uuid(), {", ".join(f"r.{c}" for c in _PRACTICE_COLUMNS)}
+    FROM jsonb_to_recordset(:rows) AS r(
+      source_key varchar, source varchar, name varchar, abn varchar, practice_type varchar, phone varchar,
+      email varchar, website varchar, facebook_url varchar, instagram_url varchar, street_address varchar,
+      suburb varchar, state varchar, postcode varchar, latitude numeric, longitude numeric, service_types text[],
+      opening_hours_text varchar, opening_hours_json varchar, after_hours_available boolean,
+      after_hours_notes varchar, emergency_referral varchar, rating numeric, review_count integer,
+      scraped_at timestamptz, source_hash varchar
+    )
+    ON CONFLICT (source_key) DO UPDATE SET
+      {", ".join(f"{c} = EXCLUDED.{c}" for c in _PRACTICE_COLUMNS if c != "source_key")}
+    WHERE vet_practices.source_hash IS DISTINCT FROM EXCLUDED.source_hash
+    RETURNING vet_practices.id::text AS practice_id, vet_practices.name, vet_practices.phone, vet_practices.email, vet_practices.street_address AS address,
+              vet_practices.suburb, vet_practices.state, vet_practices.postcode,
+              vet_practices.latitude::float8 AS latitude, vet_practices.longitude::float8 AS longitude,
+              (xmax = 0) AS inserted
+    """
+).bindparams(bindparam("rows", type_=JSONB))
+
+# Clinics that predate organisations.practice_id adopt the one practice sharing their name; a name shared by
+# several practices or clinics is ambiguous and stays unlinked. Also run once at startup for existing rows.
+LINK_CLINICS_SQL = """
+    UPDATE organisations o
+    SET practice_id = p.id
+    FROM vet_practices p
+    WHERE o.org_type = 'vet_clinic'
+      AND o.practice_id IS NULL
+      AND LOWER(p.name) = LOWER(o.name)
+      AND (CAST(:practice_ids AS uuid[]) IS NULL OR p.id = ANY(CAST(:practice_ids AS uuid[])))
+      AND NOT EXISTS (SELECT 1 FROM organisations x WHERE x.practice_id = p.id)
+      AND NOT EXISTS (SELECT 1 FROM vet_practices p2 WHERE LOWER(p2.name) = LOWER(p.name) AND p2.id <> p.id)
+      AND NOT EXISTS (
+        SELECT 1 FROM organisations o2
+        WHERE o2.org_type = 'vet_clinic' AND o2.practice_id IS NULL
+          AND LOWER(o2.name) = LOWER(o.name) AND o2.organisation_id <> o.organisation_id
+      )
+"""
+
+# Clinics follow their practice through organisations.practice_id; source coordinates become "stored",
+# otherwise the geocoding pass re-derives them when postcode/suburb changed.
+_SYNC_ORGANISATIONS_SQL = text(
+    """
+    WITH changed AS (
+      SELECT *
+      FROM jsonb_to_recordset(:rows) AS c(
+        practice_id uuid, name varchar, phone varchar, email varchar, address varchar, suburb varchar,
+        state varchar, postcode varchar, latitude numeric, longitude numeric
+      )
+    ),
+    updated AS (
+      UPDATE organisations o
+      SET name = c.name,
+          phone = c.phone,
+          email = c.email,
+          address = c.address,
+          suburb = c.suburb,
+          state = c.state,
+          postcode = c.postcode,
+          latitude = COALESCE(c.latitude, o.latitude),
+          longitude = COALESCE(c.longitude, o.longitude),
+          geo_precision = CASE WHEN c.latitude IS NOT NULL AND c.longitude IS NOT NULL THEN 'stored' ELSE o.geo_precision END
+      FROM changed c
+      WHERE o.practice_id = c.practice_id
+      RETURNING o.practice_id
+    ),
+    inserted AS (
+      INSERT INTO organisations (
+        organisation_id, practice_id, name, org_type, phone, email, address, suburb, state, postcode, latitude,
+        longitude, created_at
+      )
+      SELECT gen_random_uuid(), c.practice_id, c.name, 'vet_clinic', c.phone, c.email, c.address, c.suburb, c.state,
+             c.postcode, c.latitude, c.longitude, NOW()
+      FROM changed c
+      WHERE c.practice_id NOT IN (SELECT practice_id FROM updated)
+      RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM updated) AS updated, (SELECT count(*) FROM inserted) AS inserted
+    """
+).bindparams(bindparam("rows", type_=JSONB))
+
+_UPSERT_STAFF_SOURCES_SQL = text(
+    """
+    INSERT INTO practice_staff_sources (id, practice_id, source_url, http_status, last_scraped_at, parse_success, notes)
+    SELECT gen_random_uuid(), r.practice_id, r.source_url, r.http_status, r.last_scraped_at, r.parse_success, r.notes
+    FROM jsonb_to_recordset(:rows) AS r(
+      practice_id uuid, source_url text, http_status integer, last_scraped_at timestamptz, parse_success boolean, notes text
+    )
+    ON CONFLICT (practice_id, source_url) DO UPDATE SET
+      http_status = EXCLUDED.http_status,
+      last_scraped_at = EXCLUDED.last_scraped_at,
+      parse_success = EXCLUDED.parse_success,
+      notes = EXCLUDED.notes
+    """
+).bindparams(bindparam("rows", type_=JSONB))
+
+# Conflicts on uq_practice_staff_identity; a returning (previously deactivated) member counts as updated.
+_UPSERT_STAFF_SQL = text(
+    """
+    INSERT INTO practice_staff (id, practice_id, staff_name, role, role_raw, bio, profile_image_url, source_url, scraped_at, is_active, source_hash)
+    SELECT gen_random_uuid(), r.practice_id, r.staff_name, r.role, r.role_raw, r.bio, r.profile_image_url, r.source_url,
+           r.scraped_at, TRUE, r.source_hash
+    FROM jsonb_to_recordset(:rows) AS r(
+      practice_id uuid, staff_name text, role text, role_raw text, bio text, profile_image_url text,
+      source_url text, scraped_at timestamptz, source_hash text
+    )
+    ON CONFLICT (practice_id, staff_name, role, source_url) DO UPDATE SET
+      role_raw = EXCLUDED.role_raw,
+      bio = EXCLUDED.bio,
+      profile_image_url = EXCLUDED.profile_image_url,
+      scraped_at = EXCLUDED.scraped_at,
+      source_hash = EXCLUDED.source_hash,
+      is_active = TRUE
+    WHERE practice_staff.source_hash IS DISTINCT FROM EXCLUDED.source_hash
+       OR NOT practice_staff.is_active
+    RETURNING (xmax = 0) AS inserted
+    """
+).bindparams(bindparam("rows", type_=JSONB))
+
+_RECORD_SEEN_STAFF_SQL = text(
+    """
+    INSERT INTO ingest_seen_staff (practice_id, staff_name, role, source_url)
+    SELECT r.practice_id, r.staff_name, r.role, r.source_url
+    FROM jsonb_to_recordset(:rows) AS r(practice_id uuid, staff_name text, role text, source_url text)
+    """
+).bindparams(bindparam("rows", type_=JSONB))
+
+
+def _count_upserts(returned: list, total: int) -> dict[str, int]:
+    inserted = sum(1 for r in returned if r.inserted)
+    updated = len(returned) - inserted
+    return {"inserted": inserted, "updated": updated, "unchanged": total - inserted - updated}
+
+
+def ingest_practices(db: Session, csv_path: Path = PRACTICES_CSV_PATH) -> dict[str, dict[str, int]]:
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+    org_counts = {"inserted": 0, "updated": 0}
+    seen: set[str] = set()
+    for batch in _batches(_read_csv(csv_path)):
+        rows = []
+        for raw in batch:
+            values = parse_practice_row(raw)
+            # A source_key may only be touched once per statement; later duplicates are skipped.
+            if values is None or values["source_key"] in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(values["source_key"])
+            rows.append(values)
+        if not rows:
+            continue
+
+        returned = db.execute(_UPSERT_PRACTICES_SQL, {"rows": _json_rows(rows)}).all()
+        for key, n in _count_upserts(returned, len(rows)).items():
+            counts[key] += n
+        if returned:
+            changed = [{k: v for k, v in r._mapping.items() if k != "inserted"} for r in returned]
+            db.execute(text(LINK_CLINICS_SQL), {"practice_ids": [r["practice_id"] for r in changed]})
+            synced = db.execute(_SYNC_ORGANISATIONS_SQL, {"rows": changed}).one()
+            org_counts["inserted"] += synced.inserted
+            org_counts["updated"] += synced.updated
+    return {"practices": counts, "organisations": org_counts}
+
+
+def ingest_practice_staff(db: Session, csv_path: Path = STAFF_SNAPSHOT_CSV_PATH) -> dict[str, dict[str, int]]:
+    practice_ids = {
+        practice_lookup_key(name, address, postcode): practice_id
+        for practice_id, name, address, postcode in db.execute(
+            text("SELECT id, name, street_address, postcode FROM vet_practices")
+        ).all()
+    }
+    db.execute(
+        text(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS ingest_seen_staff (
+              practice_id uuid, staff_name text, role text, source_url text
+            ) ON COMMIT DROP
+            """
+        )
+    )
+    db.execute(text("TRUNCATE ingest_seen_staff"))
+
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "deactivated": 0}
+    source_count = 0
+    scraped_practices: set[str] = set()
+    seen_sources: set[tuple[str, str]] = set()
+    seen_staff: set[tuple[str, str, str, str]] = set()
+    for batch in _batches(_read_csv(csv_path)):
+        sources, staff_rows = [], []
+        for raw in batch:
+            parsed = parse_staff_row(raw)
+            practice_id = practice_ids.get(parsed["practice_key"]) if parsed else None
+            if practice_id is None:
+                counts["skipped"] += 1
+                continue
+            practice_id = str(practice_id)
+
+            source = parsed["source"]
+            if (practice_id, source["source_url"]) not in seen_sources:
+                seen_sources.add((practice_id, source["source_url"]))
+                sources.append({"practice_id": practice_id, **source})
+
+            staff = parsed["staff"]
+            if staff is None:
+                counts["skipped"] += 1
+                continue
+            scraped_practices.add(practice_id)
+            key = (practice_id, staff["staff_name"].lower(), staff["role"].lower(), staff["source_url"].lower())
+            if key in seen_staff:
+                counts["skipped"] += 1
+                continue
+            seen_staff.add(key)
+            staff_rows.append({"practice_id": practice_id, **staff})
+
+        if sources:
+            db.execute(_UPSERT_STAFF_SOURCES_SQL, {"rows": _json_rows(sources)})
+            source_count += len(sources)
+        if staff_rows:
+            returned = db.execute(_UPSERT_STAFF_SQL, {"rows": _json_rows(staff_rows)}).all()
+            for key, n in _count_upserts(returned, len(staff_rows)).items():
+                counts[key] += n
+            db.execute(
+                _RECORD_SEEN_STAFF_SQL,
+                {"rows": [{k: row[k] for k in ("practice_id", "staff_name", "role", "source_url")} for row in staff_rows]},
+            )
+
+    # Only practices present in this snapshot lose members; a practice that wasn't scraped keeps its staff.
+    if scraped_practices:
+        counts["deactivated"] = db.execute(
+            text(
+                """
+                UPDATE practice_staff s
+                SET is_active = FALSE
+                WHERE s.is_active
+                  AND s.practice_id = ANY(CAST(:practice_ids AS uuid[]))
+                  AND NOT EXISTS (
+                    SELECT 1 FROM ingest_seen_staff x
+                    WHERE x.practice_id = s.practice_id
+                      AND x.staff_name = s.staff_name
+                      AND x.role = s.role
+                      AND x.source_url = s.source_url
+                  )
+                """
+            ),
+            {"practice_ids": sorted(scraped_practices)},
+        ).rowcount
+    return {"staff": counts, "staff_sources": {"upserted": source_count}}
+
+
+def ingest_practice_snapshots(
+    db: Session,
+    *,
+    practices_csv: Path | None = PRACTICES_CSV_PATH,
+    staff_csv: Path | None = STAFF_SNAPSHOT_CSV_PATH,
+    dry_run: bool = False,
+) -> dict[str, dict[str, int]]:
+    # Practices, clinics and staff change in one transaction so readers never see a half-applied snapshot.
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _INGEST_LOCK_KEY})
+    report: dict[str, dict[str, int]] = {}
+    if practices_csv is not None:
+        report.update(ingest_practices(db, practices_csv))
+    if staff_csv is not None:
+        report.update(ingest_practice_staff(db, staff_csv))
+
+    if dry_run:
+        db.rollback()
+        return report
+    db.commit()
+    practices = report.get("practices", {})
+    if practices.get("inserted") or practices.get("updated"):
+        # Map markers and clusters read practice and clinic coordinates.
+        report["geocoded"] = geocode_clinics(db)
+        invalidate_clinic_grid()
+    # Incremental on opening_hours_text, so this also backfills practices loaded before hours were parsed.
+    report["opening_hours"] = sync_practice_opening_hours(db)
+    return report
@@ -0,0 +1,210 @@
+"""Module: practice_search."""
+
+from __future__ import annotations
+
+import base64
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.opening_hours import OPEN_AT_PREDICATE, PARSED_HOURS_PREDICATE, open_at_cte
+
+# sort -> (keyset expression, direction). Unrated practices sort after every rated one.
+PRACTICE_SORTS: dict[str, tuple[str, str]] = {
+    "name": ("lower(p.name)", "ASC"),
+    "rating": ("COALESCE(p.rating, -1)", "DESC"),
+}
+# Suburb facet is capped so a statewide search doesn't return every suburb.
+SUBURB_FACET_LIMIT = 20
+
+_PRACTICE_COLUMNS = """
+    p.id, p.name, p.practice_type, p.phone, p.email, p.website,
+    p.street_address, p.suburb, p.state, p.postcode,
+    p.latitude::float8 AS latitude, p.longitude::float8 AS longitude,
+    p.service_types, p.opening_hours_text, p.opening_hours_json::jsonb AS opening_hours,
+    p.after_hours_available, p.after_hours_notes,
+    p.emergency_referral, p.rating::float8 AS rating, p.review_count
+"""
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_value, practice_id) -> str:
+    raw = f"{sort_value}|{practice_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[object, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        # Names may contain "|", the id never does.
+        value, practice_id = raw.rsplit("|", 1)
+        return (Decimal(value) if sort == "rating" else value), uuid.UUID(practice_id)
+    except (ValueError, InvalidOperation) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _filter_sql(filters: dict) -> tuple[str, dict]:
+    # Each predicate is written so the planner can use the matching vet_practices index.
+    clauses, params = [], {}
+    if filters.get("service_types"):
+        clauses.append("p.service_types @> CAST(:service_types AS text[])")
+        params["service_types"] = filters["service_types"]
+    if filters.get("after_hours") is not None:
+        # NULL means the source didn't say; it is treated as "no after-hours service".
+        clauses.append("p.after_hours_available" if filters["after_hours"] else "p.after_hours_available IS NOT TRUE")
+    if filters.get("min_rating") is not None:
+        clauses.append("p.rating >= :min_rating")
+        params["min_rating"] = filters["min_rating"]
+    if filters.get("suburb"):
+        clauses.append("p.suburb = :suburb")
+        params["suburb"] = filters["suburb"]
+    if filters.get("postcode"):
+        clauses.append("p.postcode = :postcode")
+        params["postcode"] = filters["postcode"]
+    if filters.get("practice_type"):
+        clauses.append("p.practice_type = :practice_type")
+        params["practice_type"] = filters["practice_type"]
+    if filters.get("open_now"):
+        # `ref` is the current practice-local time, defined by search_sql.
+        clauses.append(
+            "EXISTS (SELECT 1 FROM practice_opening_hours h, ref "
+            f"WHERE h.practice_id = p.id AND {OPEN_AT_PREDICATE} AND {PARSED_HOURS_PREDICATE})"
+        )
+    return (" AND ".join(clauses) or "TRUE"), params
+
+
+def search_sql(filters: dict, sort: str, has_cursor: bool) -> tuple[str, dict]:
+    where, params = _filter_sql(filters)
+    sort_col, direction = PRACTICE_SORTS[sort]
+    op = ">" if direction == "ASC" else "<"
+    keyset = f"(f.sort_value, f.id) {op} (:cursor_value, :cursor_id)" if has_cursor else "TRUE"
+    ref_cte = ""
+    if filters.get("open_now"):
+        ref_sql, ref_params = open_at_cte(None)
+        ref_cte = f"ref AS ({ref_sql}),"
+        params.update(ref_params)
+    sql = f"""
+        WITH {ref_cte}
+        filtered AS MATERIALIZED (
+          SELECT {_PRACTICE_COLUMNS}, {sort_col} AS sort_value
+          FROM vet_practices p
+          WHERE {where}
+        ),
+        page AS (
+          SELECT *
+          FROM filtered f
+          WHERE {keyset}
+          ORDER BY f.sort_value {direction}, f.id {direction}
+          LIMIT :fetch
+        )
+        SELECT
+          (SELECT COALESCE(jsonb_agg(to_jsonb(page) ORDER BY page.sort_value {direction}, page.id {direction}), '[]'::jsonb)
+           FROM page) AS items,
+          (SELECT count(*) FROM filtered) AS total,
+          (SELECT COALESCE(json_object_agg(service_type, n ORDER BY n DESC, service_type), '{{}}'::json)
+           FROM (SELECT unnest(service_types) AS service_type, count(*) AS n FROM filtered GROUP BY 1) s) AS service_types,
+          (SELECT COALESCE(json_object_agg(practice_type, n ORDER BY n DESC, practice_type), '{{}}'::json)
+           FROM (SELECT COALESCE(practice_type, 'unknown') AS practice_type, count(*) AS n FROM filtered GROUP BY 1) t) AS practice_types,
+          (SELECT json_build_object(
+                    'true', count(*) FILTER (WHERE after_hours_available),
+                    'false', count(*) FILTER (WHERE after_hours_available IS NOT TRUE))
+           FROM filtered) AS after_hours,
+          (SELECT json_build_object(
+                    '4+', count(*) FILTER (WHERE rating >= 4),
+                    '3+', count(*) FILTER (WHERE rating >= 3),
+                    'unrated', count(*) FILTER (WHERE rating IS NULL))
+           FROM filtered) AS ratings,
+          (SELECT COALESCE(json_object_agg(suburb, n ORDER BY n DESC, suburb), '{{}}'::json)
+           FROM (
+             SELECT suburb, count(*) AS n FROM filtered WHERE suburb IS NOT NULL
+             GROUP BY suburb ORDER BY n DESC, suburb LIMIT {SUBURB_FACET_LIMIT}
+           ) b) AS suburbs
+    """
+    return sql, params
+
+
+def search_practices(
+    db: Session,
+    filters: dict,
+    *,
+    sort: str = "name",
+    limit: int = 50,
+    cursor: tuple[object, uuid.UUID] | None = None,
+) -> dict:
+    sql, params = search_sql(filters, sort, cursor is not None)
+    params["fetch"] = limit + 1
+    if cursor is not None:
+        params["cursor_value"], params["cursor_id"] = cursor
+
+    # Page and facets come back in one row from one statement, so counts always match the filtered set.
+    row = db.execute(text(sql), params).mappings().one()
+    items = row["items"] if isinstance(row["items"], list) else json.loads(row["items"])
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last["sort_value"], last["id"])
+    for item in items:
+        item.pop("sort_value", None)
+
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "total": row["total"],
+        "facets": {
+            "service_types": row["service_types"],
+            "practice_type": row["practice_types"],
+            "after_hours": row["after_hours"],
+            "rating": row["ratings"],
+            "suburb": row["suburbs"],
+        },
+    }
+
+
+def open_practices(db: Session, at: datetime | None = None, limit: int = 50) -> dict:
+    # Index lookup on (weekday, open_minute, close_minute); practices closing latest come first. Practices whose
+    # hours were only inferred from "Open until ..." come back separately as `unconfirmed`, never in `items`.
+    ref_sql, params = open_at_cte(at)
+    row = db.execute(
+        text(
+            f"""
+            WITH ref AS ({ref_sql}),
+            open_now AS (
+              SELECT {_PRACTICE_COLUMNS}, h.close_minute, h.precision AS hours_precision
+              FROM ref
+              JOIN practice_opening_hours h ON {OPEN_AT_PREDICATE}
+              JOIN vet_practices p ON p.id = h.practice_id
+            ),
+            ranked AS (
+              SELECT o.*, row_number() OVER (PARTITION BY o.hours_precision ORDER BY o.close_minute DESC, lower(o.name), o.id) AS rn
+              FROM open_now o
+            )
+            SELECT
+              ref.local_at,
+              (SELECT COALESCE(jsonb_agg(to_jsonb(o) - 'rn' ORDER BY o.rn), '[]'::jsonb)
+               FROM ranked o WHERE o.hours_precision = 'parsed' AND o.rn <= :limit) AS items,
+              (SELECT COALESCE(jsonb_agg(to_jsonb(o) - 'rn' ORDER BY o.rn), '[]'::jsonb)
+               FROM ranked o WHERE o.hours_precision = 'inferred' AND o.rn <= :limit) AS unconfirmed
+            FROM ref
+            """
+        ),
+        {**params, "limit": limit},
+    ).mappings().one()
+
+    result = {"at": row["local_at"]}
+    for key in ("items", "unconfirmed"):
+        items = row[key] if isinstance(row[key], list) else json.loads(row[key])
+        for item in items:
+            close_minute = item.pop("close_minute")
+            item["open_until"] = f"{close_minute // 60:02d}:{close_minute % 60:02d}"
+        result[key] = items
+    return result
@@ -0,0 +1,160 @@
+"""Module: staff_capacity."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Longest range GET /staff/capacity serves in one request.
+MAX_CAPACITY_DAYS = 366
+
+# Serialises month builds and incremental refreshes so a refresh can't miss a month being built.
+_STAFFING_LOCK_KEY = 720332
+
+# Rostered members by role per clinic per day, minus members with approved leave covering the day. Leave is
+# per person: someone on leave is off at every clinic they belong to. Only days inside built months are written.
+_REFRESH_SQL = """
+    INSERT INTO clinic_staffing_days (organisation_id, staffing_day, member_role, rostered, on_leave, pending_leave)
+    WITH days AS (
+      SELECT g::date AS staffing_day
+      FROM generate_series(CAST(:start AS date), CAST(:end AS date), interval '1 day') g
+      WHERE date_trunc('month', g)::date IN (SELECT month_start FROM clinic_staffing_months)
+    ),
+    roster AS (
+      SELECT om.organisation_id, om.user_id, COALESCE(NULLIF(TRIM(om.member_role), ''), 'unassigned') AS member_role
+      FROM organisation_members om
+      WHERE CAST(:organisation_ids AS uuid[]) IS NULL OR om.organisation_id = ANY(CAST(:organisation_ids AS uuid[]))
+    ),
+    leave_days AS (
+      SELECT sl.user_id, g::date AS staffing_day,
+             bool_or(sl.status = 'APPROVED') AS approved,
+             bool_or(sl.status = 'PENDING') AS pending
+      FROM staff_leaves sl
+      CROSS JOIN LATERAL generate_series(
+        GREATEST(sl.start_date, CAST(:start AS date)), LEAST(sl.end_date, CAST(:end AS date)), interval '1 day'
+      ) g
+      WHERE sl.status IN ('APPROVED', 'PENDING')
+        AND sl.leave_period && daterange(CAST(:start AS date), CAST(:end AS date), '[]')
+        AND sl.user_id IN (SELECT user_id FROM roster)
+      GROUP BY sl.user_id, g::date
+    )
+    SELECT r.organisation_id, d.staffing_day, r.member_role,
+           COUNT(*)::int,
+           COUNT(*) FILTER (WHERE ld.approved)::int,
+           COUNT(*) FILTER (WHERE ld.pending AND NOT ld.approved)::int
+    FROM roster r
+    CROSS JOIN days d
+    LEFT JOIN leave_days ld ON ld.user_id = r.user_id AND ld.staffing_day = d.staffing_day
+    GROUP BY r.organisation_id, d.staffing_day, r.member_role
+"""
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + 1, 1, 1) if value.month == 12 else date(value.year, value.month + 1, 1)
+
+
+def _lock(db: Session) -> None:
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _STAFFING_LOCK_KEY})
+
+
+def _rewrite(db: Session, start: date, end: date, organisation_ids: list[uuid.UUID] | None) -> None:
+    db.execute(
+        text(
+            """
+            DELETE FROM clinic_staffing_days
+            WHERE staffing_day BETWEEN :start AND :end
+              AND (CAST(:organisation_ids AS uuid[]) IS NULL OR organisation_id = ANY(CAST(:organisation_ids AS uuid[])))
+            """
+        ),
+        {"start": start, "end": end, "organisation_ids": organisation_ids},
+    )
+    db.execute(text(_REFRESH_SQL), {"start": start, "end": end, "organisation_ids": organisation_ids})
+
+
+def refresh_staffing_for_leave(db: Session, user_id: uuid.UUID, start_date: date, end_date: date) -> None:
+    # Leave writes call this before committing: every clinic the person belongs to, over the leave's dates.
+    _lock(db)
+    organisation_ids = db.execute(
+        text("SELECT organisation_id FROM organisation_members WHERE user_id = :user_id"), {"user_id": user_id}
+    ).scalars().all()
+    if organisation_ids:
+        _rewrite(db, start_date, end_date, list(organisation_ids))
+
+
+def refresh_clinic_staffing(db: Session, organisation_ids: list[uuid.UUID]) -> None:
+    # Membership writes call this before committing; rebuilds every built month for those clinics.
+    _lock(db)
+    bounds = db.execute(
+        text("SELECT MIN(month_start), MAX(month_start) FROM clinic_staffing_months")
+    ).one()
+    if bounds[0] is not None and organisation_ids:
+        _rewrite(db, bounds[0], _next_month(bounds[1]) - timedelta(days=1), list(organisation_ids))
+
+
+def _ensure_months(db: Session, start: date, end: date) -> None:
+    months = []
+    month = _month_start(start)
+    while month <= end:
+        months.append(month)
+        month = _next_month(month)
+    built = set(
+        db.execute(
+            text("SELECT month_start FROM clinic_staffing_months WHERE month_start = ANY(:months)"), {"months": months}
+        ).scalars()
+    )
+    missing = [m for m in months if m not in built]
+    if not missing:
+        return
+    _lock(db)
+    for month in missing:
+        # Another request may have built it while this one waited on the lock; the upsert keeps the rebuild harmless.
+        db.execute(
+            text(
+                """
+                INSERT INTO clinic_staffing_months (month_start, refreshed_at)
+                VALUES (:start, :refreshed_at)
+                ON CONFLICT (month_start) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+                """
+            ),
+            {"start": month, "refreshed_at": datetime.now(UTC)},
+        )
+        _rewrite(db, month, _next_month(month) - timedelta(days=1), None)
+    # Commit the built months so later requests read them straight from the table.
+    db.commit()
+
+
+def staffing_capacity(
+    db: Session, start: date, end: date, organisation_ids: list[uuid.UUID] | None = None
+) -> list[dict]:
+    _ensure_months(db, start, end)
+    rows = db.execute(
+        text(
+            """
+            SELECT s.organisation_id, o.name AS organisation_name, s.staffing_day AS date,
+                   SUM(s.rostered)::int AS rostered,
+                   SUM(s.on_leave)::int AS on_leave,
+                   SUM(s.rostered - s.on_leave)::int AS available,
+                   SUM(s.pending_leave)::int AS pending_leave,
+                   json_object_agg(
+                     s.member_role,
+                     json_build_object('rostered', s.rostered, 'on_leave', s.on_leave, 'available', s.rostered - s.on_leave)
+                     ORDER BY s.member_role
+                   ) AS roles
+            FROM clinic_staffing_days s
+            JOIN organisations o ON o.organisation_id = s.organisation_id
+            WHERE s.staffing_day BETWEEN :start AND :end
+              AND (CAST(:organisation_ids AS uuid[]) IS NULL OR s.organisation_id = ANY(CAST(:organisation_ids AS uuid[])))
+            GROUP BY s.organisation_id, o.name, s.staffing_day
+            ORDER BY o.name, s.organisation_id, s.staffing_day
+            """
+        ),
+        {"start": start, "end": end, "organisation_ids": organisation_ids},
+    ).mappings().all()
+    return [dict(r) for r in rows]
@@ -0,0 +1,195 @@
+"""Module: staff_dashboard."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Per-clinic sections (staff, leave now, leave upcoming) are reused for this long unless a write invalidates them.
+# Invalidation is per process; other workers pick up changes when their entries expire.
+STAFF_DASHBOARD_TTL_SECONDS = 60
+
+STAFF_POLICIES = [
+    {"id": "onboarding", "title": "Onboarding Handbook", "category": "Onboarding"},
+    {"id": "leave-policy", "title": "Leave and Entitlements Policy", "category": "HR"},
+    {"id": "clinical-protocols", "title": "Clinical Safety Protocols", "category": "Clinical"},
+    {"id": "incident-form", "title": "Incident Report Form", "category": "Forms"},
+    {"id": "med-order-form", "title": "Medication Order Request Form", "category": "Forms"},
+]
+
+_LEAVE_JSON = """
+    json_build_object(
+      'leave_id', sl.leave_id, 'organisation_id', sl.organisation_id, 'user_id', sl.user_id,
+      'staff_name', lu.full_name, 'start_date', sl.start_date, 'end_date', sl.end_date,
+      'reason', sl.reason, 'status', sl.status
+    )
+"""
+
+# One round trip: the user's role, the clinics they may see, and the sections of every clinic in scope
+# that isn't already cached. Only the columns the page shows are read.
+_DASHBOARD_SQL = text(
+    f"""
+    WITH u AS (
+      SELECT UPPER(COALESCE(role, '')) = 'ADMIN' AS is_admin
+      FROM users
+      WHERE user_id = :user_id
+    ),
+    allowed AS (
+      SELECT o.organisation_id, o.name
+      FROM organisations o, u
+      WHERE (u.is_admin AND o.org_type = 'vet_clinic')
+         OR (NOT u.is_admin AND o.organisation_id IN (
+               SELECT organisation_id FROM organisation_members WHERE user_id = :user_id))
+    ),
+    scope AS (
+      SELECT organisation_id
+      FROM allowed
+      WHERE (CAST(:organisation_id AS uuid) IS NULL OR organisation_id = CAST(:organisation_id AS uuid))
+        AND organisation_id <> ALL(CAST(:cached AS uuid[]))
+    ),
+    staff AS (
+      SELECT om.organisation_id,
+             json_agg(
+               json_build_object(
+                 'organisation_id', om.organisation_id, 'member_role', om.member_role, 'user_id', us.user_id,
+                 'full_name', us.full_name, 'email', us.email, 'phone', us.phone
+               ) ORDER BY us.full_name, us.user_id
+             ) AS rows
+      FROM organisation_members om
+      JOIN users us ON us.user_id = om.user_id
+      WHERE om.organisation_id IN (SELECT organisation_id FROM scope)
+      GROUP BY om.organisation_id
+    ),
+    leave_now AS (
+      SELECT sl.organisation_id, json_agg({_LEAVE_JSON} ORDER BY sl.start_date, sl.leave_id) AS rows
+      FROM staff_leaves sl
+      LEFT JOIN users lu ON lu.user_id = sl.user_id
+      WHERE sl.status = 'APPROVED'
+        AND sl.leave_period @> CAST(:today AS date)
+        AND sl.organisation_id IN (SELECT organisation_id FROM scope)
+      GROUP BY sl.organisation_id
+    ),
+    leave_upcoming AS (
+      SELECT sl.organisation_id, json_agg({_LEAVE_JSON} ORDER BY sl.start_date, sl.leave_id) AS rows
+      FROM staff_leaves sl
+      LEFT JOIN users lu ON lu.user_id = sl.user_id
+      WHERE sl.organisation_id IN (SELECT organisation_id FROM scope)
+        AND (sl.status = 'PENDING' OR (sl.status = 'APPROVED' AND sl.start_date > :today))
+      GROUP BY sl.organisation_id
+    )
+    SELECT
+      EXISTS (SELECT 1 FROM u) AS user_found,
+      COALESCE((SELECT is_admin FROM u), FALSE) AS is_admin,
+      (SELECT COALESCE(json_agg(json_build_object('id', organisation_id, 'name', name) ORDER BY name, organisation_id), '[]')
+       FROM allowed) AS clinics,
+      (SELECT COALESCE(json_object_agg(
+                s.organisation_id,
+                json_build_object(
+                  'staff', COALESCE(st.rows, '[]'),
+                  'leave_now', COALESCE(ln.rows, '[]'),
+                  'leave_upcoming', COALESCE(lu.rows, '[]')
+                )
+              ), '{{}}')
+       FROM scope s
+       LEFT JOIN staff st ON st.organisation_id = s.organisation_id
+       LEFT JOIN leave_now ln ON ln.organisation_id = s.organisation_id
+       LEFT JOIN leave_upcoming lu ON lu.organisation_id = s.organisation_id) AS sections
+    """
+)
+
+
+# Raised when the user id doesn't exist.
+class StaffUserNotFound(LookupError):
+    pass
+
+
+# Raised when an admin asks for an organisation that isn't a vet clinic.
+class ClinicNotFound(LookupError):
+    pass
+
+
+# Raised when a non-admin asks for a clinic they aren't a member of.
+class ClinicAccessDenied(ValueError):
+    pass
+
+
+_cache_lock = threading.Lock()
+# organisation_id -> (day the sections were computed for, monotonic time stored, sections)
+_clinic_sections: dict[str, tuple[date, float, dict]] = {}
+# Bumped on every invalidation so a load that raced a write doesn't store what it read.
+_generation = 0
+
+
+def invalidate_staff_dashboard(*organisation_ids: uuid.UUID | str) -> None:
+    # Call after leave or membership writes; with no ids every clinic is dropped.
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        if not organisation_ids:
+            _clinic_sections.clear()
+        for organisation_id in organisation_ids:
+            _clinic_sections.pop(str(organisation_id), None)
+
+
+def _fresh_sections(today: date) -> tuple[dict[str, dict], int]:
+    now = time.monotonic()
+    with _cache_lock:
+        fresh = {
+            cid: sections
+            for cid, (day, stored_at, sections) in _clinic_sections.items()
+            if day == today and now - stored_at <= STAFF_DASHBOARD_TTL_SECONDS
+        }
+        return fresh, _generation
+
+
+def _store_sections(today: date, generation: int, sections: dict[str, dict]) -> None:
+    with _cache_lock:
+        if generation != _generation:
+            return
+        stored_at = time.monotonic()
+        for cid, value in sections.items():
+            _clinic_sections[cid] = (today, stored_at, value)
+
+
+def load_staff_dashboard(db: Session, user_id: uuid.UUID, organisation_id: uuid.UUID | None = None) -> dict:
+    today = date.today()
+    cached, generation = _fresh_sections(today)
+    row = db.execute(
+        _DASHBOARD_SQL,
+        {
+            "user_id": user_id,
+            "organisation_id": organisation_id,
+            "cached": list(cached),
+            "today": today,
+        },
+    ).mappings().one()
+
+    if not row["user_found"]:
+        raise StaffUserNotFound(str(user_id))
+    clinics = row["clinics"] if isinstance(row["clinics"], list) else json.loads(row["clinics"])
+    allowed_ids = [c["id"] for c in clinics]
+    if organisation_id is not None and str(organisation_id) not in allowed_ids:
+        if row["is_admin"]:
+            raise ClinicNotFound(str(organisation_id))
+        raise ClinicAccessDenied(str(organisation_id))
+
+    loaded = row["sections"] if isinstance(row["sections"], dict) else json.loads(row["sections"])
+    _store_sections(today, generation, loaded)
+
+    scope = [str(organisation_id)] if organisation_id is not None else allowed_ids
+    if not scope:
+        return {"clinics": [], "staff": [], "leave_now": [], "leave_upcoming": [], "policies": []}
+    sections = [loaded.get(cid) or cached.get(cid) for cid in scope]
+    return {
+        "clinics": clinics,
+        "staff": [item for s in sections if s for item in s["staff"]],
+        "leave_now": [item for s in sections if s for item in s["leave_now"]],
+        "leave_upcoming": [item for s in sections if s for item in s["leave_upcoming"]],
+        "policies": STAFF_POLICIES,
+    }
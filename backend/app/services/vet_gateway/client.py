@@ -1,3 +1,69 @@
 """Module: client."""
 
+from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
+
+import httpx
+
+from app.core.config import settings
+
+# Upper bound on simultaneous pushes; also sizes the connection pool.
+MAX_CONCURRENT_PUSHES = 10
+PUSH_TIMEOUT_SECONDS = 10.0
+
+
+# Outcome of one push: retryable failures go back to the outbox with backoff, the rest are final.
+@dataclass
+class PushResult:
+    key: str
+    ok: bool
+    retryable: bool = False
+    error: str | None = None
+
+
+# Async client for the vet gateway; one instance (and one keep-alive pool) per dispatcher.
+class VetGatewayClient:
+    def __init__(self, base_url: str | None = None, *, transport: httpx.AsyncBaseTransport | None = None):
+        self._client = httpx.AsyncClient(
+            base_url=base_url or settings.mock_vet_base_url,
+            timeout=PUSH_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=MAX_CONCURRENT_PUSHES, max_keepalive_connections=MAX_CONCURRENT_PUSHES),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_PUSHES)
+
+    async def __aenter__(self) -> VetGatewayClient:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def push_visit(self, idempotency_key: str, payload: dict) -> PushResult:
+        # The gateway dedupes on Idempotency-Key, so a retry after a lost response is harmless.
+        async with self._semaphore:
+            try:
+                response = await self._client.post(
+                    "/visits/push",
+                    json=payload,
+                    headers={"Idempotency-Key": idempotency_key},
+                )
+            except httpx.HTTPError as exc:
+                return PushResult(idempotency_key, ok=False, retryable=True, error=f"{type(exc).__name__}: {exc}")
+        if response.is_success:
+            return PushResult(idempotency_key, ok=True)
+        retryable = response.status_code >= 500 or response.status_code in (408, 409, 425, 429)
+        return PushResult(
+            idempotency_key,
+            ok=False,
+            retryable=retryable,
+            error=f"HTTP {response.status_code}: {response.text[:200]}",
+        )
+
+    async def push_visits(self, events: list[tuple[str, dict]]) -> list[PushResult]:
+        # Sent concurrently: callers must pass at most one event per visit (claim_due_events does).
+        return list(await asyncio.gather(*(self.push_visit(key, payload) for key, payload in events)))
@@ -0,0 +1,211 @@
+"""Module: visit_outbox."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.services.vet_gateway.client import PushResult, VetGatewayClient
+
+logger = logging.getLogger(__name__)
+
+VISIT_CREATED = "visit.created"
+VISIT_CANCELLED = "visit.cancelled"
+
+OUTBOX_BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 15 * 60
+# A claimed row is invisible to other dispatchers for this long; if its dispatcher dies it is retried afterwards.
+CLAIM_LEASE_SECONDS = 60
+
+_ENQUEUE_SQL = text(
+    """
+    INSERT INTO visit_outbox (event_type, visit_id, idempotency_key, payload)
+    SELECT e.event_type, e.visit_id, e.idempotency_key, e.payload
+    FROM jsonb_to_recordset(:events) AS e(event_type varchar, visit_id uuid, idempotency_key varchar, payload jsonb)
+    ON CONFLICT (idempotency_key) DO NOTHING
+    """
+).bindparams(bindparam("events", type_=JSONB))
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value) if value is not None else None
+
+
+def visit_event_payload(event_type: str, visit) -> dict:
+    # Accepts a VetVisit or a plain row dict with the same keys.
+    get = visit.get if isinstance(visit, dict) else lambda key: getattr(visit, key)
+    return {
+        "event": event_type,
+        "visit_id": _json_value(get("visit_id")),
+        "pet_id": _json_value(get("pet_id")),
+        "organisation_id": _json_value(get("organisation_id")),
+        "vet_user_id": _json_value(get("vet_user_id")),
+        "visit_datetime": _json_value(get("visit_datetime")),
+        "status": get("status"),
+        "reason": get("reason"),
+    }
+
+
+def enqueue_visit_events(db: Session, event_type: str, visits: list) -> None:
+    # Runs inside the caller's transaction: the event is committed (or rolled back) together with the visit.
+    if not visits:
+        return
+    events = []
+    for visit in visits:
+        payload = visit_event_payload(event_type, visit)
+        events.append(
+            {
+                "event_type": event_type,
+                "visit_id": payload["visit_id"],
+                "idempotency_key": f"{event_type}:{payload['visit_id']}",
+                "payload": payload,
+            }
+        )
+    db.execute(_ENQUEUE_SQL, {"events": events})
+
+
+def claim_due_events(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> list[dict]:
+    # SKIP LOCKED lets several dispatchers (one per worker) drain the outbox without double-sending. Only a visit's
+    # oldest pending event is due, so a visit.cancelled waits until its visit.created is sent (or has failed for good),
+    # even while the earlier one is claimed or backing off (idx_visit_outbox_pending_visit).
+    rows = db.execute(
+        text(
+            """
+            UPDATE visit_outbox o
+            SET attempts = o.attempts + 1,
+                next_attempt_at = NOW() + make_interval(secs => :lease)
+            FROM (
+              SELECT e.outbox_id
+              FROM visit_outbox e
+              WHERE e.status = 'PENDING' AND e.next_attempt_at <= NOW()
+                AND NOT EXISTS (
+                  SELECT 1
+                  FROM visit_outbox earlier
+                  WHERE earlier.visit_id = e.visit_id
+                    AND earlier.status = 'PENDING'
+                    AND earlier.outbox_id < e.outbox_id
+                )
+              ORDER BY e.next_attempt_at, e.outbox_id
+              LIMIT :limit
+              FOR UPDATE SKIP LOCKED
+            ) due
+            WHERE o.outbox_id = due.outbox_id
+            RETURNING o.outbox_id, o.idempotency_key, o.payload, o.attempts
+            """
+        ),
+        {"limit": limit, "lease": CLAIM_LEASE_SECONDS},
+    ).mappings().all()
+    db.commit()
+    return [dict(r) for r in rows]
+
+
+def backoff_seconds(attempts: int) -> float:
+    # Exponential with full jitter so a recovering gateway isn't hit by every retry at once.
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def record_results(db: Session, claimed: list[dict], results: list[PushResult]) -> dict[str, int]:
+    by_key = {r.key: r for r in results}
+    sent, retry, failed = [], [], []
+    for event in claimed:
+        result = by_key[event["idempotency_key"]]
+        if result.ok:
+            sent.append(event["outbox_id"])
+        elif result.retryable and event["attempts"] < MAX_ATTEMPTS:
+            retry.append(
+                {"outbox_id": event["outbox_id"], "delay": backoff_seconds(event["attempts"]), "error": result.error}
+            )
+        else:
+            failed.append({"outbox_id": event["outbox_id"], "error": result.error})
+
+    if sent:
+        db.execute(
+            text("UPDATE visit_outbox SET status = 'SENT', sent_at = NOW(), last_error = NULL WHERE outbox_id = ANY(:ids)"),
+            {"ids": sent},
+        )
+    if retry:
+        db.execute(
+            text(
+                """
+                UPDATE visit_outbox o
+                SET next_attempt_at = NOW() + make_interval(secs => r.delay), last_error = r.error
+                FROM jsonb_to_recordset(:retry) AS r(outbox_id bigint, delay double precision, error text)
+                WHERE o.outbox_id = r.outbox_id
+                """
+            ).bindparams(bindparam("retry", type_=JSONB)),
+            {"retry": retry},
+        )
+    if failed:
+        db.execute(
+            text(
+                """
+                UPDATE visit_outbox o
+                SET status = 'FAILED', last_error = f.error
+                FROM jsonb_to_recordset(:failed) AS f(outbox_id bigint, error text)
+                WHERE o.outbox_id = f.outbox_id
+                """
+            ).bindparams(bindparam("failed", type_=JSONB)),
+            {"failed": failed},
+        )
+    db.commit()
+    return {"sent": len(sent), "retry": len(retry), "failed": len(failed)}
+
+
+def _claim() -> list[dict]:
+    db = SessionLocal()
+    try:
+        return claim_due_events(db)
+    finally:
+        db.close()
+
+
+def _record(claimed: list[dict], results: list[PushResult]) -> dict[str, int]:
+    db = SessionLocal()
+    try:
+        return record_results(db, claimed, results)
+    finally:
+        db.close()
+
+
+async def dispatch_once(client: VetGatewayClient) -> dict[str, int]:
+    # DB work runs in a thread so the event loop keeps serving requests while a batch is claimed or recorded.
+    claimed = await asyncio.to_thread(_claim)
+    if not claimed:
+        return {"sent": 0, "retry": 0, "failed": 0}
+    payloads = [
+        (e["idempotency_key"], e["payload"] if isinstance(e["payload"], dict) else json.loads(e["payload"]))
+        for e in claimed
+    ]
+    results = await client.push_visits(payloads)
+    return await asyncio.to_thread(_record, claimed, results)
+
+
+async def run_outbox_dispatcher(poll_seconds: float, stop: asyncio.Event) -> None:
+    async with VetGatewayClient() as client:
+        while not stop.is_set():
+            try:
+                counts = await dispatch_once(client)
+            except Exception:
+                logger.exception("Visit outbox dispatch failed")
+                counts = {"sent": 0, "retry": 0, "failed": 0}
+            if counts["sent"] or counts["retry"] or counts["failed"]:
+                logger.info("Visit outbox batch: %s", counts)
+            # A full batch means more are probably due; otherwise wait for the next poll.
+            if sum(counts.values()) < OUTBOX_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=poll_seconds)
+                except TimeoutError:
+                    pass
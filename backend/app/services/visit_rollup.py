@@ -0,0 +1,125 @@
+"""Module: visit_rollup."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.models.vet_visit import MISSED_VISIT_STATUSES
+
+# Visits counted in the calendar's "cancelled or missed" bucket.
+CANCELLED_OR_MISSED_SQL = "vv.status IN (" + ", ".join(f"'{s}'" for s in MISSED_VISIT_STATUSES) + ")"
+
+# Per-month lock namespace: serialises a month's rebuilds with each other and with writers invalidating it.
+_ROLLUP_LOCK_KEY = 720331
+
+
+def _month_bounds(value: date | datetime) -> tuple[date, date]:
+    start = date(value.year, value.month, 1)
+    end = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start, end
+
+
+def _current_month_start() -> date:
+    return _month_bounds(datetime.now(UTC))[0]
+
+
+def _lock_month(db: Session, start: date) -> None:
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:key, :month)"), {"key": _ROLLUP_LOCK_KEY, "month": start.toordinal()}
+    )
+
+
+def refresh_visit_rollup_month(db: Session, month_start: date) -> None:
+    start, end = _month_bounds(month_start)
+    _lock_month(db, start)
+    db.execute(
+        text("DELETE FROM visit_daily_rollup WHERE visit_day >= :start AND visit_day < :end"),
+        {"start": start, "end": end},
+    )
+    db.execute(
+        text(
+            f"""
+            INSERT INTO visit_daily_rollup (organisation_id, visit_day, total_visits, cancelled_or_missed)
+            SELECT
+              vv.organisation_id,
+              vv.visit_datetime::date,
+              COUNT(*)::int,
+              COUNT(*) FILTER (WHERE {CANCELLED_OR_MISSED_SQL})::int
+            FROM vet_visits vv
+            WHERE vv.visit_datetime >= :start
+              AND vv.visit_datetime < :end
+            GROUP BY vv.organisation_id, vv.visit_datetime::date
+            """
+        ),
+        {"start": start, "end": end},
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO visit_rollup_months (month_start, refreshed_at)
+            VALUES (:start, :refreshed_at)
+            ON CONFLICT (month_start) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+            """
+        ),
+        {"start": start, "refreshed_at": datetime.now(UTC)},
+    )
+
+
+def invalidate_visit_rollup(db: Session, visit_datetime: datetime | None) -> None:
+    # Writes call this so a past month is rebuilt on its next read; the current month is always live.
+    if visit_datetime is None:
+        return
+    start, _ = _month_bounds(visit_datetime)
+    # Held until the writer commits, so a concurrent rebuild either finishes first (and its month row is deleted
+    # here) or waits and then reads this write.
+    _lock_month(db, start)
+    db.execute(text("DELETE FROM visit_rollup_months WHERE month_start = :start"), {"start": start})
+
+
+def calendar_summary(db: Session, month_start: date, organisation_id: uuid.UUID | None = None) -> list[dict]:
+    start, end = _month_bounds(month_start)
+    params: dict[str, object] = {"start": start, "end": end}
+    rollup_org_sql = live_org_sql = ""
+    if organisation_id:
+        rollup_org_sql = "AND organisation_id = :organisation_id"
+        live_org_sql = "AND vv.organisation_id = :organisation_id"
+        params["organisation_id"] = organisation_id
+
+    if start < _current_month_start():
+        cached = db.execute(
+            text("SELECT 1 FROM visit_rollup_months WHERE month_start = :start"), {"start": start}
+        ).scalar()
+        if not cached:
+            # Commit the rebuilt month so later requests read it straight from the rollup.
+            refresh_visit_rollup_month(db, start)
+            db.commit()
+        sql = f"""
+            SELECT
+              to_char(visit_day, 'YYYY-MM-DD') AS day,
+              SUM(total_visits)::int AS total_visits,
+              SUM(cancelled_or_missed)::int AS cancelled_or_missed
+            FROM visit_daily_rollup
+            WHERE visit_day >= :start
+              AND visit_day < :end
+              {rollup_org_sql}
+            GROUP BY visit_day
+            ORDER BY visit_day
+        """
+    else:
+        sql = f"""
+            SELECT
+              to_char(vv.visit_datetime::date, 'YYYY-MM-DD') AS day,
+              COUNT(*)::int AS total_visits,
+              COUNT(*) FILTER (WHERE {CANCELLED_OR_MISSED_SQL})::int AS cancelled_or_missed
+            FROM vet_visits vv
+            WHERE vv.visit_datetime >= :start
+              AND vv.visit_datetime < :end
+              {live_org_sql}
+            GROUP BY vv.visit_datetime::date
+            ORDER BY vv.visit_datetime::date
+        """
+    return [dict(r) for r in db.execute(text(sql), params).mappings().all()]
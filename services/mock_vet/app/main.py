@@ -1,17 +1,31 @@
-﻿from fastapi import FastAPI
+﻿from fastapi import FastAPI, Header, HTTPException
 from datetime import datetime
+import os
+import random
 
 app = FastAPI(title="Mock Vet System", version="0.1.0")
 
+# Responses already returned per Idempotency-Key, so retried pushes are acknowledged once.
+_processed: dict[str, dict] = {}
+# Set MOCK_VET_FAILURE_RATE (0-1) to exercise the backend's retry/backoff path.
+FAILURE_RATE = float(os.getenv("MOCK_VET_FAILURE_RATE", "0"))
+
 @app.get("/ping")
 def ping():
     return {"status": "ok", "service": "mock-vet", "time": datetime.utcnow().isoformat()}
 
 @app.post("/visits/push")
-def push_visit(payload: dict):
-    return {
+def push_visit(payload: dict, idempotency_key: str | None = Header(default=None)):
+    if idempotency_key and idempotency_key in _processed:
+        return {**_processed[idempotency_key], "duplicate": True}
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        raise HTTPException(status_code=503, detail="Simulated upstream outage")
+    response = {
         "ack": True,
         "message": "Simulated visit ingestion",
         "received": payload,
         "processed_at": datetime.utcnow().isoformat()
     }
+    if idempotency_key:
+        _processed[idempotency_key] = response
+    return response